@@ -141,6 +141,7 @@ struct StreamConfig {
 };
 
 using SampleCallback = std::function<void(const StreamSample&)>;
+using SampleBatchCallback = std::function<void(const std::vector<StreamSample>&)>;
 using ConfigCallback = std::function<bool(const StreamConfig&)>;
 
 struct DataVariant {
@@ -201,6 +202,11 @@ class StreamProducer {
 // consumer, which will never fail (no limit on the number of consumers on a stream). The callback
 // function for each signal must be specified on construction. Only the SampleCallback is required.
 // The public signal receive functions shall be called by the StreamInterface that was hooked.
+// If a SampleBatchCallback is given, it is called instead of the SampleCallback, once with all
+// of the samples drained from the queue. Batch callbacks require an async consumer. The size of
+// a batch can be limited with setMaxBatchSize, and setMaxBatchWait lets a batch collect samples
+// until it is full or its first sample has waited that many seconds. A batch that is still
+// waiting when the consumer is destroyed is passed on then.
 class StreamConsumer {
  public:
   // Hooks into the StreamInterface and stores callbacks
@@ -208,7 +214,8 @@ class StreamConsumer {
       StreamInterface* si,
       SampleCallback callback,
       ConfigCallback configCallback = nullptr,
-      bool async = false);
+      bool async = false,
+      SampleBatchCallback batchCallback = nullptr);
 
   // Unhooks from the StreamInterface
   virtual ~StreamConsumer();
@@ -228,10 +235,19 @@ class StreamConsumer {
   uint64_t getQueueCapacity() const;
   void setQueueCapacity(uint64_t capacity);
 
+  // The most samples passed to the batch callback at once (0 for no limit)
+  uint64_t getMaxBatchSize() const;
+  void setMaxBatchSize(uint64_t maxBatchSize);
+
+  // The most seconds a batch waits to be filled (0 to pass on each drained batch)
+  double getMaxBatchWait() const;
+  void setMaxBatchWait(double maxBatchWait);
+
  protected:
   StreamInterface* consumedStream_ = nullptr;
   SampleCallback callback_;
   ConfigCallback configCallback_;
+  SampleBatchCallback batchCallback_;
 
   mutable bool inhibitSampleCallback_;
 
@@ -243,6 +259,8 @@ class StreamConsumer {
   mutable std::mutex queueMutex_;
   mutable std::queue<DataVariant> queue_;
   uint64_t queueCapacity_;
+  uint64_t maxBatchSize_ = 0;
+  double maxBatchWait_ = 0;
   static constexpr uint64_t DEFAULT_QUEUE_CAPACITY = 10;
 };
 
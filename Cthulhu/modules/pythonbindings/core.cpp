@@ -216,11 +216,13 @@ void bindings(py::module_& m) {
               cthulhu::PyStreamInterface,
               cthulhu::PySampleCallback,
               cthulhu::PyConfigCallback,
-              bool>(),
+              bool,
+              cthulhu::PySampleBatchCallback>(),
           py::arg("si"),
           py::arg("sampleCb"),
           py::arg("configCb") = nullptr,
-          py::arg("async") = false)
+          py::arg("async") = false,
+          py::arg("sampleBatchCb") = nullptr)
       .def("close", &cthulhu::PyStreamConsumer::close)
       .def_property_readonly("closed", &cthulhu::PyStreamConsumer::isClosed)
       .def("get_performance_summary", &cthulhu::PyStreamConsumer::getPerformanceSummary)
@@ -228,6 +230,14 @@ void bindings(py::module_& m) {
           "queue_capacity",
           &cthulhu::PyStreamConsumer::getQueueCapacity,
           &cthulhu::PyStreamConsumer::setQueueCapacity)
+      .def_property(
+          "max_batch_size",
+          &cthulhu::PyStreamConsumer::getMaxBatchSize,
+          &cthulhu::PyStreamConsumer::setMaxBatchSize)
+      .def_property(
+          "max_batch_wait",
+          &cthulhu::PyStreamConsumer::getMaxBatchWait,
+          &cthulhu::PyStreamConsumer::setMaxBatchWait)
       .def("__bool__", [](const cthulhu::PyStreamConsumer& cons) -> bool {
         return !cons.isClosed();
       });
@@ -412,6 +412,7 @@ class PyStreamSample {
 };
 
 using PySampleCallback = std::function<void(const PyStreamSample&)>;
+using PySampleBatchCallback = std::function<void(const std::vector<PyStreamSample>&)>;
 using PyConfigCallback = std::function<bool(const PyStreamConfig&)>;
 
 class PyStreamConsumer {
@@ -420,7 +421,8 @@ class PyStreamConsumer {
       const PyStreamInterface& si,
       const PySampleCallback& sampleCb,
       const PyConfigCallback& configCb,
-      bool async) {
+      bool async,
+      const PySampleBatchCallback& sampleBatchCb) {
     pybind11::gil_scoped_release unlock;
 
     auto typeInfo =
@@ -438,14 +440,20 @@ class PyStreamConsumer {
       sampleSizeInBytes_.store(sampleParameterSize);
     }
 
+    // Consumers with only a batch callback are passed no sample callback
+    SampleCallback sampleCallback = nullptr;
+    if (sampleCb) {
+      sampleCallback = [this, sampleCb, sampleParameterSize](const StreamSample& sample) -> void {
+        PyStreamSample pysample(
+            sample, sample.numberOfSubSamples * sampleSizeInBytes_.load(), sampleParameterSize);
+        pybind11::gil_scoped_acquire lock;
+        sampleCb(pysample);
+      };
+    }
+
     consumer_ = std::make_unique<StreamConsumer>(
         si.impl_,
-        [this, sampleCb, sampleParameterSize](const StreamSample& sample) -> void {
-          PyStreamSample pysample(
-              sample, sample.numberOfSubSamples * sampleSizeInBytes_.load(), sampleParameterSize);
-          pybind11::gil_scoped_acquire lock;
-          sampleCb(pysample);
-        },
+        sampleCallback,
         configCb ? std::function<bool(const StreamConfig&)>(
                        [this,
                         configCb,
@@ -460,7 +468,23 @@ class PyStreamConsumer {
                          return configCb(pyconfig);
                        })
                  : nullptr,
-        async);
+        async,
+        // Converts all of the drained samples, then acquires the GIL once for the batch
+        sampleBatchCb ? SampleBatchCallback(
+                            [this, sampleBatchCb, sampleParameterSize](
+                                const std::vector<StreamSample>& samples) -> void {
+                              std::vector<PyStreamSample> pysamples;
+                              pysamples.reserve(samples.size());
+                              for (const auto& sample : samples) {
+                                pysamples.emplace_back(
+                                    sample,
+                                    sample.numberOfSubSamples * sampleSizeInBytes_.load(),
+                                    sampleParameterSize);
+                              }
+                              pybind11::gil_scoped_acquire lock;
+                              sampleBatchCb(pysamples);
+                            })
+                      : nullptr);
   }
 
   void close() {
@@ -484,6 +508,22 @@ class PyStreamConsumer {
     consumer_->setQueueCapacity(capacity);
   }
 
+  uint64_t getMaxBatchSize() const {
+    return consumer_->getMaxBatchSize();
+  }
+
+  void setMaxBatchSize(uint64_t maxBatchSize) {
+    consumer_->setMaxBatchSize(maxBatchSize);
+  }
+
+  double getMaxBatchWait() const {
+    return consumer_->getMaxBatchWait();
+  }
+
+  void setMaxBatchWait(double maxBatchWait) {
+    consumer_->setMaxBatchWait(maxBatchWait);
+  }
+
   ~PyStreamConsumer() {
     close();
   }
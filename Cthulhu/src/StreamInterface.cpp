@@ -2,6 +2,9 @@
 
 #include <cthulhu/StreamInterface.h>
 
+#include <chrono>
+#include <stdexcept>
+
 #define DEFAULT_LOG_CHANNEL "Cthulhu"
 #include <logging/Log.h>
 
@@ -96,19 +99,37 @@ StreamConsumer::StreamConsumer(
     StreamInterface* si,
     SampleCallback callback,
     ConfigCallback configCallback,
-    bool async)
+    bool async,
+    SampleBatchCallback batchCallback)
     : callback_(callback),
       configCallback_(configCallback),
+      batchCallback_(batchCallback),
       inhibitSampleCallback_(configCallback != nullptr),
       async_(async),
       performanceMonitor_{},
       queueCapacity_(DEFAULT_QUEUE_CAPACITY) {
+  if (batchCallback_ != nullptr && !async) {
+    throw std::invalid_argument("A batch callback requires an async consumer");
+  }
   si->hookConsumer(this);
   consumedStream_ = si;
 
   if (async) {
     thread_ = std::thread(
         [this](std::future<void> signal) -> void {
+          // Consecutive samples are passed to the batch callback together. If a batch
+          // wait is set, a batch collects samples across iterations until it is full or
+          // its first sample has waited that long.
+          std::vector<StreamSample> batch;
+          std::chrono::steady_clock::time_point batchStart;
+          auto flushBatch = [this, &batch]() -> void {
+            if (!batch.empty()) {
+              performanceMonitor_.startMeasurement();
+              batchCallback_(batch);
+              performanceMonitor_.endMeasurement();
+              batch.clear();
+            }
+          };
           while (signal.wait_for(std::chrono::milliseconds(1)) == std::future_status::timeout) {
             try {
               Framework::validate();
@@ -117,13 +138,18 @@ StreamConsumer::StreamConsumer(
             }
 
             std::queue<DataVariant> tempQueue;
+            uint64_t maxBatchSize;
+            std::chrono::duration<double> maxBatchWait;
             {
               std::lock_guard<std::mutex> lock(queueMutex_);
               std::swap(tempQueue, queue_);
+              maxBatchSize = maxBatchSize_;
+              maxBatchWait = std::chrono::duration<double>(maxBatchWait_);
             }
             while (!tempQueue.empty()) {
               DataVariant& item = tempQueue.front();
               if (item.type == DataVariant::Type::CONFIG) {
+                flushBatch();
                 if (configCallback_ == nullptr) {
                   XR_LOGW("config received with no handler");
                 } else {
@@ -131,14 +157,30 @@ StreamConsumer::StreamConsumer(
                 }
               } else if (item.type == DataVariant::Type::SAMPLE) {
                 if (!inhibitSampleCallback_) {
-                  performanceMonitor_.startMeasurement();
-                  callback_(item.sample);
-                  performanceMonitor_.endMeasurement();
+                  if (batchCallback_ != nullptr) {
+                    if (batch.empty()) {
+                      batchStart = std::chrono::steady_clock::now();
+                    }
+                    batch.push_back(std::move(item.sample));
+                    if (maxBatchSize > 0 && batch.size() >= maxBatchSize) {
+                      flushBatch();
+                    }
+                  } else {
+                    performanceMonitor_.startMeasurement();
+                    callback_(item.sample);
+                    performanceMonitor_.endMeasurement();
+                  }
                 }
               }
               tempQueue.pop();
             }
+            if (maxBatchWait.count() <= 0 ||
+                std::chrono::steady_clock::now() - batchStart >= maxBatchWait) {
+              flushBatch();
+            }
           }
+          // Pass on the samples of a batch that was still waiting to be filled
+          flushBatch();
         },
         stopSignal_.get_future());
   }
@@ -177,6 +219,7 @@ void StreamConsumer::receiveConfig(const StreamConfig& config) const {
 
 void StreamConsumer::consumeSample(const StreamSample& sample) const {
   if (!async_) {
+    // Batch callbacks require an async consumer, so there is no batch to collect
     if (!inhibitSampleCallback_) {
       performanceMonitor_.startMeasurement();
       callback_(sample);
@@ -209,4 +252,24 @@ void StreamConsumer::setQueueCapacity(uint64_t capacity) {
   queueCapacity_ = capacity;
 }
 
+uint64_t StreamConsumer::getMaxBatchSize() const {
+  std::lock_guard<std::mutex> lock(queueMutex_);
+  return maxBatchSize_;
+}
+
+void StreamConsumer::setMaxBatchSize(uint64_t maxBatchSize) {
+  std::lock_guard<std::mutex> lock(queueMutex_);
+  maxBatchSize_ = maxBatchSize;
+}
+
+double StreamConsumer::getMaxBatchWait() const {
+  std::lock_guard<std::mutex> lock(queueMutex_);
+  return maxBatchWait_;
+}
+
+void StreamConsumer::setMaxBatchWait(double maxBatchWait) {
+  std::lock_guard<std::mutex> lock(queueMutex_);
+  maxBatchWait_ = maxBatchWait;
+}
+
 } // namespace cthulhu
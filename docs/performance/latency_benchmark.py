@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Copyright 2004-present Facebook. All Rights Reserved.
+
+# Measures the delivery latency of messages between two nodes run by a `LocalRunner`,
+# i.e., the time from publishing a message to its subscriber being called. Messages
+# are published at a low, fixed rate so that each one wakes the event loop up from
+# idle. Logs the 50th and 99th percentile latencies.
+#
+# Sample run: python latency_benchmark.py --rate 100 --duration 10
+
+import asyncio
+import dataclasses
+import time
+from typing import List
+
+import labgraph as lg
+import numpy as np
+
+
+logger = lg.util.logger.get_logger(__name__)
+
+
+class LatencyBenchmarkConfig(lg.Config):
+    rate: float = 100.0  # Messages per second
+    duration: float = 10.0  # Seconds
+
+
+class LatencyBenchmarkMessage(lg.TimestampedMessage):
+    counter: int
+
+
+class LatencyBenchmarkPublisher(lg.Node):
+    OUTPUT = lg.Topic(LatencyBenchmarkMessage)
+    config: LatencyBenchmarkConfig
+
+    @lg.publisher(OUTPUT)
+    async def publish(self) -> lg.AsyncPublisher:
+        counter = 0
+        start_time = time.perf_counter()
+        while time.perf_counter() - start_time < self.config.duration:
+            yield self.OUTPUT, LatencyBenchmarkMessage(
+                timestamp=time.perf_counter(), counter=counter
+            )
+            counter += 1
+            await asyncio.sleep(1 / self.config.rate)
+
+
+class LatencyBenchmarkSubscriberState(lg.State):
+    latencies: List[float] = dataclasses.field(default_factory=list)
+
+
+class LatencyBenchmarkSubscriber(lg.Node):
+    INPUT = lg.Topic(LatencyBenchmarkMessage)
+    config: LatencyBenchmarkConfig
+    state: LatencyBenchmarkSubscriberState
+
+    @lg.subscriber(INPUT)
+    async def receive(self, message: LatencyBenchmarkMessage) -> None:
+        self.state.latencies.append(time.perf_counter() - message.timestamp)
+
+    @lg.background
+    async def log_result(self) -> None:
+        # Wait for the publisher to finish, and for its last messages to arrive
+        await asyncio.sleep(self.config.duration + 1)
+        latencies = np.array(self.state.latencies) * 1e6
+        logger.info(f"Messages received: {len(latencies)}")
+        if len(latencies) > 0:
+            logger.info(f"p50 latency: {np.percentile(latencies, 50):.1f} us")
+            logger.info(f"p99 latency: {np.percentile(latencies, 99):.1f} us")
+            logger.info(f"Max latency: {latencies.max():.1f} us")
+        raise lg.NormalTermination()
+
+
+class LatencyBenchmark(lg.Graph):
+    PUBLISHER: LatencyBenchmarkPublisher
+    SUBSCRIBER: LatencyBenchmarkSubscriber
+
+    config: LatencyBenchmarkConfig
+
+    def setup(self) -> None:
+        self.PUBLISHER.configure(self.config)
+        self.SUBSCRIBER.configure(self.config)
+
+    def connections(self) -> lg.Connections:
+        return ((self.PUBLISHER.OUTPUT, self.SUBSCRIBER.INPUT),)
+
+
+if __name__ == "__main__":
+    lg.run(LatencyBenchmark)
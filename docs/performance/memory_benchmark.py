@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# Copyright 2004-present Facebook. All Rights Reserved.
+
+# Measures the memory held by buffered Labgraph messages, e.g. in a logger's queue or
+# an aligner's window. For each message shape, prints the Python heap bytes allocated
+# per buffered message (as traced by `tracemalloc`) and the fraction of buffered
+# messages that still hold their Cthulhu sample, whose shared memory is allocated
+# outside the Python heap.
+#
+# Sample run: python memory_benchmark.py --number 10000
+
+import argparse
+import dataclasses
+import gc
+import tracemalloc
+from typing import Callable, List, Tuple
+
+import labgraph as lg
+import numpy as np
+
+
+DEFAULT_NUMBER = 10000
+BLOCK_SHAPE = (64, 100)
+LIST_LENGTH = 100
+
+
+class SmallMessage(lg.TimestampedMessage):
+    counter: int
+    value: float
+
+
+class UncachedSmallMessage(lg.TimestampedMessage):
+    counter: int
+    value: float = dataclasses.field(metadata={"cache": False})
+
+
+class BlockMessage(lg.TimestampedMessage):
+    data: np.ndarray
+
+
+class ListMessage(lg.TimestampedMessage):
+    values: List[float]
+
+
+def measure(
+    make: Callable[[], lg.Message], read: bool, release: bool, number: int
+) -> Tuple[float, float]:
+    """
+    Returns the heap bytes per buffered message and the fraction of buffered messages
+    that hold their sample.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    messages = [make() for _ in range(number)]
+    if read:
+        for message in messages:
+            for name in message.__field_names__:
+                getattr(message, name)
+    if release:
+        for message in messages:
+            message.release()
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    held = sum(message._sample is not None for message in messages)
+    return size / number, held / number
+
+
+def benchmark(number: int) -> List[Tuple[str, float, float]]:
+    block = np.random.rand(*BLOCK_SHAPE)
+    values = [float(i) for i in range(LIST_LENGTH)]
+    shapes = [
+        ("small", lambda: SmallMessage(timestamp=1.0, counter=1, value=2.0)),
+        (
+            "small (uncached field)",
+            lambda: UncachedSmallMessage(timestamp=1.0, counter=1, value=2.0),
+        ),
+        ("numpy block", lambda: BlockMessage(timestamp=1.0, data=block)),
+        ("list", lambda: ListMessage(timestamp=1.0, values=values)),
+    ]
+    results = []
+    for name, make in shapes:
+        results.append((f"{name}, unread", *measure(make, False, False, number)))
+        results.append((f"{name}, read", *measure(make, True, False, number)))
+        try:
+            results.append((f"{name}, released", *measure(make, False, True, number)))
+        except lg.LabgraphError:
+            # The message type has fields that are read from the sample
+            tracemalloc.stop()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=DEFAULT_NUMBER)
+    args = parser.parse_args()
+
+    print(f"{'':<40} {'bytes/message':>14} {'samples held':>13}")
+    for name, size, held in benchmark(args.number):
+        print(f"{name:<40} {size:14.1f} {held:13.0%}")
+
+
+if __name__ == "__main__":
+    main()
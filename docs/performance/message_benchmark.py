@@ -0,0 +1,614 @@
+#!/usr/bin/env python3
+# Copyright 2004-present Facebook. All Rights Reserved.
+
+# Microbenchmarks for the Python-side cost of Labgraph messages. Each benchmark prints
+# the mean time per operation for the current implementation next to a reference
+# implementation (either a plain Python object or the previous Labgraph code path).
+#
+# Sample run: python message_benchmark.py --number 100000
+
+import argparse
+import dataclasses
+import pickle
+import struct
+import timeit
+from io import BytesIO
+from typing import Callable, List, Optional, Tuple
+
+import labgraph as lg
+import numpy as np
+from labgraph.messages.types import (
+    DEFAULT_BYTE_ORDER,
+    DEFAULT_LEN_LENGTH,
+    DataclassType,
+    FloatType,
+    ListType,
+    NumpyDynamicType,
+    ObjectDynamicType,
+    StructType,
+    get_len_bytes,
+    get_next_bytes,
+    get_field_type,
+    get_packed_value,
+    get_unpacked_value,
+)
+
+
+DEFAULT_NUMBER = 100000
+LIST_LENGTH = 10000
+BATCH_SIZE = 1000
+OBJECT_ARRAY_SHAPE = (1000, 1000)
+TRANSFORM_LENGTH = 100
+WINDOW_LENGTH = 100
+PAYLOAD_SIZE = 1000000
+
+
+class BenchmarkMessage(lg.TimestampedMessage):
+    counter: int
+    value: float
+
+
+BLOCK_SHAPE = (64, 100)
+
+
+class UncachedBenchmarkMessage(lg.Message):
+    timestamp: float = dataclasses.field(metadata={"cache": False})
+
+
+class NativeUncachedBenchmarkMessage(lg.Message, layout="native"):
+    valid: bool = dataclasses.field(metadata={"cache": False})
+    timestamp: float = dataclasses.field(metadata={"cache": False})
+
+
+# The fields of the following messages are not cached, so each read decodes the field
+class BlockMessage(lg.Message):
+    data: lg.NumpyType(shape=BLOCK_SHAPE, dtype=np.float64) = (  # type: ignore
+        dataclasses.field(metadata={"cache": False})
+    )
+
+
+class ZeroCopyBlockMessage(lg.Message):
+    data: lg.NumpyType(  # type: ignore
+        shape=BLOCK_SHAPE, dtype=np.float64, zero_copy=True
+    ) = dataclasses.field(metadata={"cache": False})
+
+
+class PayloadMessage(lg.Message):
+    data: bytes = dataclasses.field(metadata={"cache": False})
+
+
+class PayloadViewMessage(lg.Message):
+    data: lg.BytesView = dataclasses.field(metadata={"cache": False})
+
+
+@dataclasses.dataclass
+class BenchmarkDataclass:
+    counter: int
+    value: float
+    valid: bool
+    name: str
+
+
+class OptionalMessage(lg.Message):
+    timestamp: Optional[float] = dataclasses.field(metadata={"cache": False})
+
+
+# `Optional` fields were pickled before they had a native field type
+class LegacyOptionalMessage(lg.Message):
+    timestamp: ObjectDynamicType() = dataclasses.field(  # type: ignore
+        metadata={"cache": False}
+    )
+
+
+class TransformMessage(lg.TimestampedMessage):
+    values: List[float]
+    data: np.ndarray
+
+
+class PlainObject:
+    def __init__(self, timestamp: float, counter: int, value: float) -> None:
+        self.timestamp = timestamp
+        self.counter = counter
+        self.value = value
+
+
+def legacy_get_field(message: lg.Message, name: str) -> float:
+    """
+    The field read performed by `Message.__getattribute__` before message classes
+    compiled their codecs.
+    """
+    field = message.__class__.__message_fields__[name]
+    assert isinstance(field.data_type, StructType)
+    field_memoryview = memoryview(message.__sample__.parameters)[
+        field.offset : field.offset + field.data_type.size
+    ]
+    return field.data_type.postprocess(  # type: ignore
+        struct.unpack(
+            DEFAULT_BYTE_ORDER.value + field.data_type.format_string,
+            field_memoryview,
+        )[0]
+    )
+
+
+def legacy_numpy_dynamic_preprocess(arr: np.ndarray) -> bytes:
+    """
+    The `NumpyDynamicType` encoding used before the binary header format.
+    """
+    dtype_bytes = pickle.dumps(arr.dtype)
+    buf = BytesIO()
+    np.save(buf, arr)
+    array_bytes = buf.getvalue()
+    return b"".join(
+        (
+            get_len_bytes(dtype_bytes),
+            dtype_bytes,
+            get_len_bytes(array_bytes),
+            array_bytes,
+        )
+    )
+
+
+def legacy_numpy_dynamic_postprocess(obj_bytes: bytes) -> np.ndarray:
+    """
+    The `NumpyDynamicType` decoding used before the binary header format.
+    """
+    raw, curr = get_next_bytes(obj_bytes, 0)
+    dtype = pickle.loads(raw)
+    raw, curr = get_next_bytes(obj_bytes, curr)
+    return np.load(BytesIO(raw)).astype(dtype)
+
+
+def legacy_list_preprocess(obj: List[float]) -> bytes:
+    """
+    The `ListType` encoding used before binary length prefixes and typed arrays.
+    """
+    sub_type = FloatType()
+    values = [get_len_bytes(obj)]
+    for item in obj:
+        value = get_packed_value(sub_type, item)
+        values.append(get_len_bytes(value))
+        values.append(value)
+    return b"".join(values)
+
+
+def legacy_list_postprocess(obj_bytes: bytes) -> List[float]:
+    """
+    The `ListType` decoding used before binary length prefixes and typed arrays.
+    """
+    sub_type = FloatType()
+    obj_len = int(obj_bytes[0:DEFAULT_LEN_LENGTH])
+    curr = DEFAULT_LEN_LENGTH
+    values = []
+    for _ in range(obj_len):
+        raw, curr = get_next_bytes(obj_bytes, curr)
+        values.append(get_unpacked_value(sub_type, raw))
+    return values
+
+
+def legacy_dataclass_preprocess(obj: object) -> bytes:
+    """
+    The `DataclassType` encoding used before per-type codecs.
+    """
+    type_ = pickle.dumps(type(obj))
+    values = [get_len_bytes(type_), type_]
+    for field in dataclasses.fields(obj):
+        sub_type = get_field_type(field.type)
+        value = get_packed_value(sub_type, getattr(obj, field.name))
+        values.append(get_len_bytes(value))
+        values.append(value)
+    return b"".join(values)
+
+
+def legacy_dataclass_postprocess(obj_bytes: bytes) -> object:
+    """
+    The `DataclassType` decoding used before per-type codecs.
+    """
+    raw, curr = get_next_bytes(obj_bytes, 0)
+    type_ = pickle.loads(raw)
+    values = {}
+    for field in dataclasses.fields(type_):
+        sub_type = get_field_type(field.type)
+        raw, curr = get_next_bytes(obj_bytes, curr)
+        values[field.name] = get_unpacked_value(sub_type, raw)
+    return type_(**values)
+
+
+def time_per_call(fn: Callable[[], object], number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number
+
+
+def benchmark_field_access(number: int) -> List[Tuple[str, float]]:
+    message = BenchmarkMessage(timestamp=1.0, counter=1, value=2.0)
+    uncached_message = UncachedBenchmarkMessage(timestamp=1.0)
+    native_message = NativeUncachedBenchmarkMessage(valid=True, timestamp=1.0)
+    converted_message = UncachedBenchmarkMessage(
+        __sample__=message.__sample__, __original_message_type__=BenchmarkMessage
+    )
+    plain = PlainObject(timestamp=1.0, counter=1, value=2.0)
+    return [
+        ("plain attribute", time_per_call(lambda: plain.timestamp, number)),
+        (
+            "field read (legacy)",
+            time_per_call(lambda: legacy_get_field(message, "timestamp"), number),
+        ),
+        (
+            "field read (uncached)",
+            time_per_call(lambda: uncached_message.timestamp, number),
+        ),
+        (
+            "field read (converted, uncached)",
+            time_per_call(lambda: converted_message.timestamp, number),
+        ),
+        (
+            "field read (native layout, uncached)",
+            time_per_call(lambda: native_message.timestamp, number),
+        ),
+        ("as_record", time_per_call(native_message.as_record, number)),
+        ("field read (cached)", time_per_call(lambda: message.timestamp, number)),
+        (
+            "versioned_name",
+            time_per_call(lambda: BenchmarkMessage.versioned_name, number),
+        ),
+    ]
+
+
+def benchmark_construction(number: int) -> List[Tuple[str, float]]:
+    counters = np.arange(number)
+    values = np.random.rand(number)
+    timestamps = np.random.rand(number)
+    return [
+        (
+            "construct",
+            time_per_call(
+                lambda: BenchmarkMessage(timestamp=1.0, counter=1, value=2.0), number
+            ),
+        ),
+        (
+            "construct (create_unchecked)",
+            time_per_call(
+                lambda: BenchmarkMessage.create_unchecked(
+                    timestamp=1.0, counter=1, value=2.0
+                ),
+                number,
+            ),
+        ),
+        (
+            "construct (build_many, per message)",
+            time_per_call(
+                lambda: BenchmarkMessage.build_many(
+                    {"timestamp": timestamps, "counter": counters, "value": values}
+                ),
+                1,
+            )
+            / number,
+        ),
+    ]
+
+
+def benchmark_batch(number: int) -> List[Tuple[str, float]]:
+    columns = {
+        "timestamp": np.random.rand(BATCH_SIZE),
+        "counter": np.arange(BATCH_SIZE),
+        "value": np.random.rand(BATCH_SIZE),
+    }
+    batch_type = lg.MessageBatch[BenchmarkMessage]
+    messages = BenchmarkMessage.build_many(columns)
+    batch = batch_type(**columns)
+    records = BenchmarkMessage.to_records(messages)
+    return [
+        (
+            f"{BATCH_SIZE} messages: build",
+            time_per_call(lambda: BenchmarkMessage.build_many(columns), number),
+        ),
+        (
+            f"{BATCH_SIZE} messages: build (batch)",
+            time_per_call(lambda: batch_type(**columns), number),
+        ),
+        (
+            f"{BATCH_SIZE} messages: sum field",
+            time_per_call(lambda: sum(message.value for message in messages), number),
+        ),
+        (
+            f"{BATCH_SIZE} messages: sum field (batch)",
+            time_per_call(lambda: batch.value.sum(), number),
+        ),
+        (
+            f"{BATCH_SIZE} messages: to records (loop)",
+            time_per_call(lambda: legacy_to_records(messages), number),
+        ),
+        (
+            f"{BATCH_SIZE} messages: to records",
+            time_per_call(lambda: BenchmarkMessage.to_records(messages), number),
+        ),
+        (
+            f"{BATCH_SIZE} messages: from records",
+            time_per_call(lambda: BenchmarkMessage.from_records(records), number),
+        ),
+    ]
+
+
+def legacy_to_records(messages: List[BenchmarkMessage]) -> np.ndarray:
+    return np.array(
+        [(message.timestamp, message.counter, message.value) for message in messages],
+        dtype=BenchmarkMessage.__records_dtype__,
+    )
+
+
+def benchmark_optional(number: int) -> List[Tuple[str, float]]:
+    message = OptionalMessage(timestamp=1.0)
+    legacy_message = LegacyOptionalMessage(timestamp=1.0)
+    return [
+        (
+            "Optional[float] construct (legacy)",
+            time_per_call(lambda: LegacyOptionalMessage(timestamp=1.0), number),
+        ),
+        (
+            "Optional[float] construct",
+            time_per_call(lambda: OptionalMessage(timestamp=1.0), number),
+        ),
+        (
+            "Optional[float] read (legacy)",
+            time_per_call(lambda: legacy_message.timestamp, number),
+        ),
+        (
+            "Optional[float] read",
+            time_per_call(lambda: message.timestamp, number),
+        ),
+    ]
+
+
+def legacy_replace(message: lg.Message, **kwargs: object) -> lg.Message:
+    """
+    `Message.replace` before fields were replaced in the message's buffers
+    """
+    values = message.asdict()
+    values.update(kwargs)
+    return message.__class__(**values)
+
+
+def legacy_equal(message: lg.Message, other: lg.Message) -> bool:
+    """
+    `Message.__eq__` before messages were compared by their buffers, which decoded
+    every field of both messages (`np.array_equal` stands in for `==` so that numpy
+    fields can be compared)
+    """
+    return all(
+        np.array_equal(
+            accessor.decode(message.__sample__), accessor.decode(other.__sample__)
+        )
+        for accessor in type(message).__field_accessors__
+    )
+
+
+def benchmark_replace(number: int) -> List[Tuple[str, float]]:
+    message = TransformMessage(
+        timestamp=1.0,
+        values=[1.0] * TRANSFORM_LENGTH,
+        data=np.random.rand(*BLOCK_SHAPE),
+    )
+    other = message.replace(timestamp=1.0)
+    return [
+        (
+            "replace timestamp (legacy)",
+            time_per_call(lambda: legacy_replace(message, timestamp=2.0), number),
+        ),
+        (
+            "replace timestamp",
+            time_per_call(lambda: message.replace(timestamp=2.0), number),
+        ),
+        (
+            "equality (legacy)",
+            time_per_call(lambda: legacy_equal(message, other), number),
+        ),
+        ("equality", time_per_call(lambda: message == other, number)),
+        ("copy", time_per_call(message.copy, number)),
+    ]
+
+
+def benchmark_numpy_access(number: int) -> List[Tuple[str, float]]:
+    data = np.random.rand(*BLOCK_SHAPE)
+    message = BlockMessage(data=data)
+    zero_copy_message = ZeroCopyBlockMessage(data=data)
+    return [
+        (
+            f"NumpyType{BLOCK_SHAPE} read (copy)",
+            time_per_call(lambda: message.data, number),
+        ),
+        (
+            f"NumpyType{BLOCK_SHAPE} read (zero_copy)",
+            time_per_call(lambda: zero_copy_message.data, number),
+        ),
+    ]
+
+
+def benchmark_numpy_dynamic(number: int) -> List[Tuple[str, float]]:
+    data = np.random.rand(*BLOCK_SHAPE)
+    field_type = NumpyDynamicType()
+    legacy_bytes = legacy_numpy_dynamic_preprocess(data)
+    data_bytes = field_type.preprocess(data)
+    return [
+        (
+            "NumpyDynamicType encode (legacy)",
+            time_per_call(lambda: legacy_numpy_dynamic_preprocess(data), number),
+        ),
+        (
+            "NumpyDynamicType encode",
+            time_per_call(lambda: field_type.preprocess(data), number),
+        ),
+        (
+            "NumpyDynamicType decode (legacy)",
+            time_per_call(
+                lambda: legacy_numpy_dynamic_postprocess(legacy_bytes), number
+            ),
+        ),
+        (
+            "NumpyDynamicType decode",
+            time_per_call(lambda: field_type.postprocess(data_bytes), number),
+        ),
+    ]
+
+
+def benchmark_compressed(number: int) -> List[Tuple[str, float]]:
+    # A smooth, spectrogram-like block compresses well
+    data = np.repeat(
+        np.arange(BLOCK_SHAPE[1], dtype=np.uint16)[None], BLOCK_SHAPE[0], 0
+    )
+    field_type = lg.Compressed[np.ndarray]
+    data_bytes = field_type.preprocess(data)
+    compressed_size, raw_size = field_type.get_sizes(data_bytes)
+    print(f"Compressed[np.ndarray] size: {compressed_size} bytes (raw: {raw_size})")
+    return [
+        (
+            "Compressed[np.ndarray] encode",
+            time_per_call(lambda: field_type.preprocess(data), number),
+        ),
+        (
+            "Compressed[np.ndarray] decode",
+            time_per_call(lambda: field_type.postprocess(data_bytes), number),
+        ),
+    ]
+
+
+def benchmark_list(number: int) -> List[Tuple[str, float]]:
+    data = np.random.rand(LIST_LENGTH).tolist()
+    field_type = ListType(float)
+    legacy_bytes = legacy_list_preprocess(data)
+    data_bytes = field_type.preprocess(data)
+    return [
+        (
+            f"List[float]({LIST_LENGTH}) encode (legacy)",
+            time_per_call(lambda: legacy_list_preprocess(data), number),
+        ),
+        (
+            f"List[float]({LIST_LENGTH}) encode",
+            time_per_call(lambda: field_type.preprocess(data), number),
+        ),
+        (
+            f"List[float]({LIST_LENGTH}) decode (legacy)",
+            time_per_call(lambda: legacy_list_postprocess(legacy_bytes), number),
+        ),
+        (
+            f"List[float]({LIST_LENGTH}) decode",
+            time_per_call(lambda: field_type.postprocess(data_bytes), number),
+        ),
+    ]
+
+
+def benchmark_dataclass(number: int) -> List[Tuple[str, float]]:
+    data = BenchmarkDataclass(counter=1, value=2.0, valid=True, name="hello")
+    field_type = DataclassType(BenchmarkDataclass)
+    legacy_bytes = legacy_dataclass_preprocess(data)
+    data_bytes = field_type.preprocess(data)
+    return [
+        (
+            "DataclassType encode (legacy)",
+            time_per_call(lambda: legacy_dataclass_preprocess(data), number),
+        ),
+        (
+            "DataclassType encode",
+            time_per_call(lambda: field_type.preprocess(data), number),
+        ),
+        (
+            "DataclassType decode (legacy)",
+            time_per_call(lambda: legacy_dataclass_postprocess(legacy_bytes), number),
+        ),
+        (
+            "DataclassType decode",
+            time_per_call(lambda: field_type.postprocess(data_bytes), number),
+        ),
+    ]
+
+
+def benchmark_payload(number: int) -> List[Tuple[str, float]]:
+    payload = np.random.bytes(PAYLOAD_SIZE)
+    message = PayloadMessage(data=payload)
+    view_message = PayloadViewMessage(data=payload)
+    return [
+        ("1 MB bytes field read", time_per_call(lambda: message.data, number)),
+        (
+            "1 MB BytesView field read",
+            time_per_call(lambda: view_message.data, number),
+        ),
+    ]
+
+
+def benchmark_window(number: int) -> List[Tuple[str, float]]:
+    window = [
+        BenchmarkMessage(timestamp=float(i), counter=i, value=2.0)
+        for i in range(WINDOW_LENGTH)
+    ]
+    field_type = ListType(BenchmarkMessage)
+    # Messages were serialized as dataclasses before `MessageFieldType`
+    legacy_type = ListType(BenchmarkMessage)
+    legacy_type._sub_type = DataclassType(BenchmarkMessage)
+    legacy_bytes = legacy_type.preprocess(window)
+    data_bytes = field_type.preprocess(window)
+    return [
+        (
+            "message window encode (legacy)",
+            time_per_call(lambda: legacy_type.preprocess(window), number),
+        ),
+        (
+            "message window encode",
+            time_per_call(lambda: field_type.preprocess(window), number),
+        ),
+        (
+            "message window decode (legacy)",
+            time_per_call(lambda: legacy_type.postprocess(legacy_bytes), number),
+        ),
+        (
+            "message window decode",
+            time_per_call(lambda: field_type.postprocess(data_bytes), number),
+        ),
+    ]
+
+
+def benchmark_object(number: int) -> List[Tuple[str, float]]:
+    data = {"name": "block", "data": np.random.rand(*OBJECT_ARRAY_SHAPE)}
+    field_type = ObjectDynamicType()
+    legacy_bytes = pickle.dumps(data)
+    data_bytes = field_type.preprocess(data)
+    return [
+        (
+            "ObjectDynamicType encode (legacy)",
+            time_per_call(lambda: pickle.dumps(data), number),
+        ),
+        (
+            "ObjectDynamicType encode",
+            time_per_call(lambda: field_type.preprocess(data), number),
+        ),
+        (
+            "ObjectDynamicType decode (legacy)",
+            time_per_call(lambda: pickle.loads(bytearray(legacy_bytes)), number),
+        ),
+        (
+            "ObjectDynamicType decode",
+            time_per_call(lambda: field_type.postprocess(data_bytes), number),
+        ),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=DEFAULT_NUMBER)
+    args = parser.parse_args()
+
+    results = benchmark_field_access(args.number)
+    results += benchmark_construction(args.number)
+    results += benchmark_optional(args.number)
+    results += benchmark_replace(max(args.number // 10, 1))
+    results += benchmark_numpy_access(args.number)
+    results += benchmark_numpy_dynamic(args.number)
+    results += benchmark_compressed(max(args.number // 10, 1))
+    results += benchmark_list(max(args.number // LIST_LENGTH, 1))
+    results += benchmark_dataclass(args.number)
+    results += benchmark_payload(max(args.number // 100, 1))
+    results += benchmark_window(max(args.number // WINDOW_LENGTH, 1))
+    results += benchmark_object(max(args.number // 1000, 1))
+    results += benchmark_batch(max(args.number // BATCH_SIZE, 1))
+    for name, seconds in results:
+        print(f"{name:<40} {seconds * 1e9:10.1f} ns")
+
+
+if __name__ == "__main__":
+    main()
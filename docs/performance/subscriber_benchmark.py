@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# Copyright 2004-present Facebook. All Rights Reserved.
+
+# Measures the per-message overhead of calling a trivial subscriber in a graph run by a
+# `LocalRunner`, for a subscriber called on the event loop and for an inline
+# subscriber called directly on the Cthulhu consumer thread. Prints the number of
+# messages received and the process CPU time per message, which includes the cost of
+# publishing the messages and of running the graph.
+#
+# Sample run: python subscriber_benchmark.py --number 100000
+
+import argparse
+import asyncio
+import time
+
+import labgraph as lg
+
+
+DEFAULT_NUMBER = 100000
+# Publish in bursts that fit in a producer's queue
+BURST_SIZE = 50
+BURST_INTERVAL = 0.001  # Seconds
+
+
+class SubscriberBenchmarkConfig(lg.Config):
+    number: int = DEFAULT_NUMBER
+
+
+class SubscriberBenchmarkMessage(lg.Message):
+    counter: int
+
+
+class SubscriberBenchmarkPublisher(lg.Node):
+    OUTPUT = lg.Topic(SubscriberBenchmarkMessage)
+    config: SubscriberBenchmarkConfig
+
+    @lg.publisher(OUTPUT)
+    async def publish(self) -> lg.AsyncPublisher:
+        for counter in range(self.config.number):
+            yield self.OUTPUT, SubscriberBenchmarkMessage(counter=counter)
+            if counter % BURST_SIZE == BURST_SIZE - 1:
+                await asyncio.sleep(BURST_INTERVAL)
+        # Wait for the last messages to arrive
+        await asyncio.sleep(1)
+        raise lg.NormalTermination()
+
+
+class CounterState(lg.State):
+    count: int = 0
+
+
+class QueuedCounter(lg.Node):
+    INPUT = lg.Topic(SubscriberBenchmarkMessage)
+    state: CounterState
+
+    @lg.subscriber(INPUT)
+    def count(self, message: SubscriberBenchmarkMessage) -> None:
+        self.state.count += 1
+
+
+class InlineCounter(lg.Node):
+    INPUT = lg.Topic(SubscriberBenchmarkMessage)
+    state: CounterState
+
+    @lg.subscriber(INPUT, inline=True)
+    def count(self, message: SubscriberBenchmarkMessage) -> None:
+        self.state.count += 1
+
+
+class QueuedBenchmark(lg.Graph):
+    PUBLISHER: SubscriberBenchmarkPublisher
+    COUNTER: QueuedCounter
+
+    config: SubscriberBenchmarkConfig
+
+    def setup(self) -> None:
+        self.PUBLISHER.configure(self.config)
+
+    def connections(self) -> lg.Connections:
+        return ((self.PUBLISHER.OUTPUT, self.COUNTER.INPUT),)
+
+
+class InlineBenchmark(lg.Graph):
+    PUBLISHER: SubscriberBenchmarkPublisher
+    COUNTER: InlineCounter
+
+    config: SubscriberBenchmarkConfig
+
+    def setup(self) -> None:
+        self.PUBLISHER.configure(self.config)
+
+    def connections(self) -> lg.Connections:
+        return ((self.PUBLISHER.OUTPUT, self.COUNTER.INPUT),)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=DEFAULT_NUMBER)
+    args = parser.parse_args()
+
+    print(f"{'':<10} {'received':>10} {'CPU us/message':>15}")
+    for name, graph_type in (("queued", QueuedBenchmark), ("inline", InlineBenchmark)):
+        graph = graph_type()
+        graph.configure(SubscriberBenchmarkConfig(number=args.number))
+        start = time.process_time()
+        lg.LocalRunner(module=graph).run()
+        cpu_time = time.process_time() - start
+        received = graph.COUNTER.state.count
+        print(f"{name:<10} {received:>10} {cpu_time / max(received, 1) * 1e6:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
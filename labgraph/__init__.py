@@ -8,8 +8,12 @@ __all__ = [
     "BaseEventGenerator",
     "BaseEventGeneratorNode",
     "BytesType",
+    "BytesView",
+    "BytesViewType",
     "CFloatType",
     "CIntType",
+    "Compressed",
+    "CompressedType",
     "Config",
     "Connections",
     "CPPNodeConfig",
@@ -30,12 +34,16 @@ __all__ = [
     "LoggerConfig",
     "main",
     "Message",
+    "MessageBatch",
+    "MessageFieldType",
+    "MessageLayout",
     "Module",
     "LocalRunner",
     "Node",
     "NodeTestHarness",
     "NormalTermination",
     "NumpyType",
+    "OverflowPolicy",
     "publisher",
     "run",
     "RunnerOptions",
@@ -43,6 +51,8 @@ __all__ = [
     "run_with_harness",
     "State",
     "StrType",
+    "StrView",
+    "StrViewType",
     "subscriber",
     "TerminationMessage",
     "TimestampAligner",
@@ -75,6 +85,7 @@ from .graphs import (
     Module,
     Node,
     NodeTestHarness,
+    OverflowPolicy,
     State,
     Topic,
     background,
@@ -88,15 +99,24 @@ from .loggers import Logger, LoggerConfig
 from .loggers.hdf5.logger import HDF5Logger
 from .messages import (
     BytesType,
+    BytesView,
+    BytesViewType,
     CFloatType,
     CIntType,
+    Compressed,
+    CompressedType,
     FieldType,
     FloatType,
     IntType,
     Message,
+    MessageBatch,
+    MessageFieldType,
+    MessageLayout,
     NumpyDynamicType,
     NumpyType,
     StrType,
+    StrView,
+    StrViewType,
     TimestampedMessage,
 )
 from .runners import (
@@ -3,7 +3,7 @@
 
 from enum import Enum, auto
 from types import TracebackType
-from typing import Callable, Generic, Optional, Type, TypeVar
+from typing import Any, Callable, Dict, Generic, List, Optional, Type, TypeVar
 
 from ..messages.message import Message
 from ..util.error import LabgraphError
@@ -34,6 +34,7 @@ class LabgraphCallbackParams(Generic[T]):
 
 LabgraphCallback = Callable[..., None]
 CthulhuCallback = Callable[[StreamSample], None]
+CthulhuBatchCallback = Callable[[List[StreamSample]], None]
 
 
 class Mode(Enum):
@@ -49,61 +50,83 @@ class Consumer(StreamConsumer):  # type: ignore
     Args:
         stream_interface: The stream interface to use.
         sample_callback: The callback to use (uses Labgraph messages).
+        mode: Whether to call the callback in the producer's thread (`Mode.SYNC`) or
+            in a thread of the consumer's own, from a queue (`Mode.ASYNC`).
+        stream_id: The stream id to pass to callbacks taking `LabgraphCallbackParams`.
+        batch_callback: A callback to use instead of `sample_callback`, which accepts
+            a list of Labgraph messages. It is called once with all of the samples
+            drained from the queue, so it requires `Mode.ASYNC`. The batches can be
+            limited with the consumer's `max_batch_size` and `max_batch_wait`.
     """
 
     def __init__(
         self,
         stream_interface: StreamInterface,
-        sample_callback: LabgraphCallback,
+        sample_callback: Optional[LabgraphCallback] = None,
         mode: Mode = Mode.SYNC,
         stream_id: Optional[str] = None,
+        batch_callback: Optional[LabgraphCallback] = None,
     ) -> None:
-        super(Consumer, self).__init__(
-            **{
-                "si": stream_interface,
-                "sampleCb": self._to_cthulhu_callback(sample_callback),
-                "async": mode == Mode.ASYNC,
-            }
-        )
+        if (sample_callback is None) == (batch_callback is None):
+            raise LabgraphError(
+                "Expected exactly one of a sample callback and a batch callback"
+            )
+        if batch_callback is not None and mode != Mode.ASYNC:
+            raise LabgraphError("A batch callback requires an async consumer")
+        kwargs: Dict[str, Any] = {"si": stream_interface, "async": mode == Mode.ASYNC}
+        if sample_callback is not None:
+            kwargs["sampleCb"] = self._to_cthulhu_callback(sample_callback)
+        else:
+            assert batch_callback is not None
+            kwargs["sampleCb"] = None
+            kwargs["sampleBatchCb"] = self._to_cthulhu_batch_callback(batch_callback)
+        super(Consumer, self).__init__(**kwargs)
         self.stream_id = stream_id
 
     def _to_cthulhu_callback(self, callback: LabgraphCallback) -> CthulhuCallback:
         """
         Given a Labgraph callback, creates a Cthulhu callback (accepting
-        `StreamSample`s).
+        `StreamSample`s). The message type is looked up once, from the callback's
+        annotations.
         """
+        message_type = _get_message_type(callback)
+        if is_generic_subclass(message_type, LabgraphCallbackParams):
+            (arg_type,) = message_type.__args__
 
-        def wrapped_callback(sample: StreamSample) -> None:
-            assert hasattr(callback, "__annotations__")
-            annotated_types = {
-                arg: arg_type
-                for arg, arg_type in callback.__annotations__.items()
-                if not arg == "return"
-            }
-
-            message_types = [
-                arg_type
-                for arg_type in annotated_types.values()
-                if is_generic_subclass(arg_type, LabgraphCallbackParams)
-                or issubclass(arg_type, Message)
-            ]
-            assert len(message_types) == 1
-
-            message_type = message_types[0]
-            if is_generic_subclass(message_type, LabgraphCallbackParams):
-                (arg_type,) = message_type.__args__
+            def wrapped_params_callback(sample: StreamSample) -> None:
                 message = arg_type(__sample__=sample)
-                params = LabgraphCallbackParams(message, self.stream_id)
-                callback(params)
-            elif issubclass(message_type, Message):
-                message = message_type(__sample__=sample)
-                callback(message)
-            else:
-                raise TypeError(
-                    f"Expected callback taking type '{Message.__name__}' or '{LabgraphCallbackParams.__name__}', got '{message_type.__name__}'"
-                )
-
-        return wrapped_callback
+                callback(LabgraphCallbackParams(message, self.stream_id))
+
+            return wrapped_params_callback
+        elif issubclass(message_type, Message):
+
+            def wrapped_callback(sample: StreamSample) -> None:
+                callback(message_type(__sample__=sample))
+
+            return wrapped_callback
+        else:
+            raise TypeError(
+                f"Expected callback taking type '{Message.__name__}' or '{LabgraphCallbackParams.__name__}', got '{message_type.__name__}'"
+            )
+
+    def _to_cthulhu_batch_callback(
+        self, callback: LabgraphCallback
+    ) -> CthulhuBatchCallback:
+        """
+        Given a Labgraph callback accepting a list of messages, creates a Cthulhu
+        callback (accepting lists of `StreamSample`s).
+        """
+        message_type = _get_message_type(callback, batch=True)
+        if not issubclass(message_type, Message):
+            raise TypeError(
+                f"Expected batch callback taking type 'List[{Message.__name__}]', got "
+                f"'List[{message_type.__name__}]'"
+            )
+
+        def wrapped_batch_callback(samples: List[StreamSample]) -> None:
+            callback([message_type(__sample__=sample) for sample in samples])
+
+        return wrapped_batch_callback
 
     def __enter__(self) -> "Consumer":
         return self
@@ -117,6 +140,34 @@ class Consumer(StreamConsumer):  # type: ignore
         self.close()
 
 
+def _get_message_type(callback: LabgraphCallback, batch: bool = False) -> Any:
+    """
+    Returns the message type that a callback accepts, from its annotations. If `batch`
+    is set, the callback is expected to accept a list of messages.
+    """
+    assert hasattr(callback, "__annotations__")
+    annotated_types = [
+        arg_type
+        for arg, arg_type in callback.__annotations__.items()
+        if not arg == "return"
+    ]
+    if batch:
+        annotated_types = [
+            arg_type.__args__[0]
+            for arg_type in annotated_types
+            if is_generic_subclass(arg_type, list)
+        ]
+
+    message_types = [
+        arg_type
+        for arg_type in annotated_types
+        if is_generic_subclass(arg_type, LabgraphCallbackParams)
+        or (isinstance(arg_type, type) and issubclass(arg_type, Message))
+    ]
+    assert len(message_types) == 1
+    return message_types[0]
+
+
 class Producer(StreamProducer):  # type: ignore
     """
     Convenience wrapper of Cthulhu's `StreamProducer` that accepts a Labgraph message.
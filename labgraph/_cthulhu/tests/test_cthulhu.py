@@ -2,13 +2,21 @@
 # Copyright 2004-present Facebook. All Rights Reserved.
 
 import time
+from typing import List
 
 import pytest
 
 from ...messages.message import Message
+from ...util.error import LabgraphError
 from ...util.random import random_string
 from ...util.testing import local_test
-from ..cthulhu import Consumer, LabgraphCallbackParams, Producer, register_stream
+from ..cthulhu import (
+    Consumer,
+    LabgraphCallbackParams,
+    Mode,
+    Producer,
+    register_stream,
+)
 
 
 RANDOM_ID_LENGTH = 128
@@ -84,3 +92,83 @@ def test_complex_graph() -> None:
 
     for i in range(NUM_MESSAGES):
         assert received_messages[i].int_field == i * 2
+
+
+@local_test
+def test_batch_consumer() -> None:
+    """
+    Tests that an async consumer with a batch callback receives every message, in
+    lists of the messages drained from its queue.
+    """
+    stream_name = random_string(length=RANDOM_ID_LENGTH)
+    stream_interface = register_stream(name=stream_name, message_type=MyMessage)
+
+    received_batches = []
+
+    with Producer(stream_interface=stream_interface) as producer:
+
+        def callback(messages: List[MyMessage]) -> None:
+            received_batches.append(messages)
+
+        with Consumer(
+            stream_interface=stream_interface,
+            mode=Mode.ASYNC,
+            batch_callback=callback,
+        ) as consumer:
+            consumer.queue_capacity = NUM_MESSAGES
+            for i in range(NUM_MESSAGES):
+                producer.produce_message(MyMessage(int_field=i))
+            time.sleep(1)
+
+    received_messages = [message for batch in received_batches for message in batch]
+    assert len(received_messages) == NUM_MESSAGES
+
+    for i in range(NUM_MESSAGES):
+        assert received_messages[i].int_field == i
+
+
+@local_test
+def test_batch_consumer_limits() -> None:
+    """
+    Tests that an async consumer passes batches of at most its `max_batch_size`
+    messages, and collects messages for up to its `max_batch_wait`.
+    """
+    stream_name = random_string(length=RANDOM_ID_LENGTH)
+    stream_interface = register_stream(name=stream_name, message_type=MyMessage)
+
+    received_batches = []
+
+    with Producer(stream_interface=stream_interface) as producer:
+
+        def callback(messages: List[MyMessage]) -> None:
+            received_batches.append(messages)
+
+        with Consumer(
+            stream_interface=stream_interface,
+            mode=Mode.ASYNC,
+            batch_callback=callback,
+        ) as consumer:
+            consumer.queue_capacity = NUM_MESSAGES
+            consumer.max_batch_size = 10
+            consumer.max_batch_wait = 10.0
+            for i in range(NUM_MESSAGES):
+                producer.produce_message(MyMessage(int_field=i))
+                time.sleep(1 / SAMPLE_RATE)
+            time.sleep(1)
+
+    assert [len(batch) for batch in received_batches] == [10] * (NUM_MESSAGES // 10)
+    received_messages = [message for batch in received_batches for message in batch]
+    for i in range(NUM_MESSAGES):
+        assert received_messages[i].int_field == i
+
+
+def test_sync_batch_consumer() -> None:
+    """
+    Tests that a batch callback requires an async consumer.
+    """
+
+    def callback(messages: List[MyMessage]) -> None:
+        pass
+
+    with pytest.raises(LabgraphError):
+        Consumer(stream_interface=None, mode=Mode.SYNC, batch_callback=callback)
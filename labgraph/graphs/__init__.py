@@ -13,6 +13,7 @@ __all__ = [
     "Module",
     "Node",
     "NodeTestHarness",
+    "OverflowPolicy",
     "publisher",
     "run_async",
     "run_with_harness",
@@ -30,4 +31,4 @@ from .module import Module
 from .node import Node
 from .node_test_harness import NodeTestHarness, run_async, run_with_harness
 from .state import State
-from .topic import Topic
+from .topic import OverflowPolicy, Topic
@@ -13,8 +13,22 @@ class Config(Message):
     """
     Represents a configuration for a module. A configuration defines how a module will
     behave.
+
+    Modules materialize their configs (see `materialize`) when they are configured, so
+    reading a config field in a module is a plain attribute read.
     """
 
+    def materialize(self) -> None:
+        """
+        Decodes every field of the config and stores it on the config as a plain
+        attribute, including fields that opt out of caching. The config's sample is
+        kept for pickling and `asdict`.
+        """
+        values = self.__dict__
+        for name in self.__field_names__:
+            if name not in values:
+                values[name] = getattr(self, name)
+
     @classmethod
     def fromargs(cls, args: Optional[List[str]] = None) -> "Config":
         """
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # Copyright 2004-present Facebook. All Rights Reserved.
 
+import inspect
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import (
@@ -18,7 +19,7 @@ from typing import (
 from typing_extensions import Protocol
 
 from ..util.error import LabgraphError
-from .topic import Topic
+from .topic import OverflowPolicy, Topic
 
 
 _METADATA_LABEL = "_METADATA"
@@ -79,6 +80,12 @@ class MethodMetadata:
     name: str
     published_topics: List[Topic] = field(default_factory=list)
     subscribed_topic: Optional[Topic] = None
+    batch: bool = False
+    max_batch_size: Optional[int] = None
+    max_wait: Optional[float] = None
+    queue_capacity: Optional[int] = None
+    overflow_policy: Optional[OverflowPolicy] = None
+    inline: bool = False
     is_background: bool = False
     is_main: bool = False
 
@@ -99,6 +106,8 @@ class MethodMetadata:
                 subscribed_topic_path=self.subscribed_topic.name
                 if self.subscribed_topic is not None
                 else None,
+                queue_capacity=self.queue_capacity,
+                overflow_policy=self.overflow_policy,
             )
         elif len(self.published_topics) > 0:
             return Publisher(
@@ -113,6 +122,12 @@ class MethodMetadata:
                 subscribed_topic_path=self.subscribed_topic.name
                 if self.subscribed_topic is not None
                 else None,
+                batch=self.batch,
+                max_batch_size=self.max_batch_size,
+                max_wait=self.max_wait,
+                queue_capacity=self.queue_capacity,
+                overflow_policy=self.overflow_policy,
+                inline=self.inline,
             )
         elif self.is_background:
             return Background(name=self.name)
@@ -153,6 +168,18 @@ class MethodMetadata:
                     f"Method '{self.name}' cannot have both a @{subscriber.__name__} "
                     f"decorator and a @{main.__name__} decorator"
                 )
+            if self.batch and len(self.published_topics) > 0:
+                raise LabgraphError(
+                    f"Method '{self.name}' cannot have both a batched "
+                    f"@{subscriber.__name__} decorator and a @{publisher.__name__} "
+                    "decorator"
+                )
+            if self.inline and len(self.published_topics) > 0:
+                raise LabgraphError(
+                    f"Method '{self.name}' cannot have both an inline "
+                    f"@{subscriber.__name__} decorator and a @{publisher.__name__} "
+                    "decorator"
+                )
 
         if self.is_background and self.is_main:
             raise LabgraphError(
@@ -209,36 +236,122 @@ class Subscriber(NodeMethod):
     """
 
     subscribed_topic_path: str
+    batch: bool
+    max_batch_size: Optional[int]
+    max_wait: Optional[float]
+    queue_capacity: Optional[int]
+    overflow_policy: Optional[OverflowPolicy]
+    inline: bool
 
-    def __init__(self, name: str, subscribed_topic_path: str) -> None:
+    def __init__(
+        self,
+        name: str,
+        subscribed_topic_path: str,
+        batch: bool = False,
+        max_batch_size: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        queue_capacity: Optional[int] = None,
+        overflow_policy: Optional[OverflowPolicy] = None,
+        inline: bool = False,
+    ) -> None:
         NodeMethod.__init__(self, name)
         self.subscribed_topic_path = subscribed_topic_path
-
-
-def subscriber(topic: Topic) -> Callable[[SubscriberType], SubscriberType]:
+        self.batch = batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue_capacity = queue_capacity
+        self.overflow_policy = overflow_policy
+        self.inline = inline
+
+
+def subscriber(
+    topic: Topic,
+    batch: bool = False,
+    max_batch_size: Optional[int] = None,
+    max_wait: Optional[float] = None,
+    queue_capacity: Optional[int] = None,
+    overflow_policy: Optional[OverflowPolicy] = None,
+    inline: bool = False,
+) -> Callable[[SubscriberType], SubscriberType]:
     """
     Decorator for methods on a `Node` subclass. `@subscriber(T)` causes the method to be
     subscribed to the topic `T`.
+
+    `@subscriber(T, batch=True)` causes the method to receive a list of the messages
+    that have arrived on `T` since it was last called, instead of one message at a time.
+
+    Args:
+        topic: The topic to subscribe to.
+        batch: Whether the method receives lists of messages.
+        max_batch_size: The most messages to pass to a batched subscriber at once.
+        max_wait:
+            If set, a batched subscriber is called once `max_batch_size` messages have
+            arrived or `max_wait` seconds after the first message of a batch has
+            arrived, whichever is sooner. Otherwise, it is called with the messages
+            that are available as soon as they arrive.
+        queue_capacity:
+            The most messages that can wait for the method. Overrides the topic's
+            queue capacity, if set.
+        overflow_policy:
+            What to do with a message that arrives when the method's queue is full.
+            Overrides the topic's overflow policy, if set.
+        inline:
+            Whether to call the method directly in the thread that receives the
+            message, instead of on the event loop. The other methods of a node with
+            inline subscribers hold the node's lock while they run, except while they
+            await, so that they never run at the same time as an inline subscriber.
+            @main methods do not take the lock. The method must not be async.
     """
+    if not batch and (max_batch_size is not None or max_wait is not None):
+        raise LabgraphError(
+            "Expected batch=True for a subscriber with a max batch size or max wait"
+        )
+    if max_batch_size is not None and max_batch_size < 1:
+        raise LabgraphError(
+            f"Expected a positive max batch size for a subscriber, got {max_batch_size}"
+        )
+    if max_wait is not None and max_wait <= 0:
+        raise LabgraphError(
+            f"Expected a positive max wait for a subscriber, got {max_wait}"
+        )
+    if queue_capacity is not None and queue_capacity < 1:
+        raise LabgraphError(
+            "Expected a positive queue capacity for a subscriber, got "
+            f"{queue_capacity}"
+        )
+    if inline and batch:
+        raise LabgraphError("Expected a subscriber to be either inline or batched")
+    if inline and (queue_capacity is not None or overflow_policy is not None):
+        raise LabgraphError(
+            "Expected no queue capacity or overflow policy for an inline subscriber"
+        )
 
     def subscriber_wrapper(method: SubscriberType) -> SubscriberType:
+        if inline and inspect.iscoroutinefunction(method):
+            raise LabgraphError(
+                f"Expected inline subscriber '{method.__name__}' not to be async"
+            )
         annotations = {
             arg: arg_type
             for arg, arg_type in method.__annotations__.items()
             if arg not in ("self", "return")
         }
+        message_type = List[topic.message_type] if batch else topic.message_type
         if (
             not len(annotations) == 1
-            or list(annotations.values())[0] != topic.message_type
+            or list(annotations.values())[0] != message_type
             or method.__code__.co_argcount != 2
             or method.__code__.co_varnames[0] != "self"
             or method.__code__.co_varnames[1] != list(annotations.keys())[0]
             # TODO: We could also check the return type here
         ):
+            if batch:
+                signature = f"messages: List[{topic.message_type.__name__}]"
+            else:
+                signature = f"message: {topic.message_type.__name__}"
             raise LabgraphError(
                 f"Expected subscriber '{method.__name__}' to have signature def "
-                f"{method.__name__}(self, message: {topic.message_type.__name__}) -> "
-                "None"
+                f"{method.__name__}(self, {signature}) -> None"
             )
 
         metadata = get_method_metadata(method)
@@ -249,6 +362,12 @@ def subscriber(topic: Topic) -> Callable[[SubscriberType], SubscriberType]:
             )
 
         metadata.subscribed_topic = topic
+        metadata.batch = batch
+        metadata.max_batch_size = max_batch_size
+        metadata.max_wait = max_wait
+        metadata.queue_capacity = queue_capacity
+        metadata.overflow_policy = overflow_policy
+        metadata.inline = inline
         metadata.validate()
         return method
 
@@ -265,9 +384,17 @@ class Transformer(Publisher, Subscriber):
         name: str,
         published_topic_paths: Sequence[str],
         subscribed_topic_path: str,
+        queue_capacity: Optional[int] = None,
+        overflow_policy: Optional[OverflowPolicy] = None,
     ) -> None:
         Publisher.__init__(self, name, published_topic_paths)
-        Subscriber.__init__(self, name, subscribed_topic_path)
+        Subscriber.__init__(
+            self,
+            name,
+            subscribed_topic_path,
+            queue_capacity=queue_capacity,
+            overflow_policy=overflow_policy,
+        )
 
 
 class Background(NodeMethod):
@@ -121,6 +121,8 @@ class Module(ABC, metaclass=ModuleMeta):
         self, config: Optional[Config] = None, state: Optional[State] = None
     ) -> None:
         self.state = state or self.__class__.__state_type__()
+        if config is not None:
+            config.materialize()
         self._config = config
         self.__topics__ = deepcopy(self.__class__.__topics__)
         for topic_name, topic in self.__topics__.items():
@@ -147,8 +149,10 @@ class Module(ABC, metaclass=ModuleMeta):
 
     def configure(self, config: Config) -> None:
         """
-        Sets the configuration for this module.
+        Sets the configuration for this module. The config's fields are decoded once
+        here, so the module reads them as plain attributes.
         """
+        config.materialize()
         self._config = config
 
     @property
@@ -161,12 +165,14 @@ class Module(ABC, metaclass=ModuleMeta):
             try:
                 # Try to create a default config with no arguments (would work with a
                 # message type with fields that all have default values)
-                self._config = self.__class__.__config_type__()
+                config = self.__class__.__config_type__()
             except TypeError:
                 raise LabgraphError(
                     f"Configuration not set. Call {self.__class__.__name__}.configure() to set the "
                     "configuration."
                 )
+            config.materialize()
+            self._config = config
         return self._config
 
     @property
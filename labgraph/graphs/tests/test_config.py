@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 # Copyright 2004-present Facebook. All Rights Reserved.
 
+import dataclasses
 from enum import Enum, IntEnum
+from typing import List
 
 import pytest
 
@@ -29,6 +31,13 @@ class MyConfig(Config):
     str_enum_field: MyStrEnum
 
 
+class MyListConfig(Config):
+    list_field: List[int]
+    uncached_field: List[int] = dataclasses.field(
+        default_factory=list, metadata={"cache": False}
+    )
+
+
 class MyNode(Node):
     config: MyConfig
 
@@ -96,3 +105,17 @@ def test_node_no_config() -> None:
         "Configuration not set. Call MyNode.configure() to set the configuration."
         in str(err.value)
     )
+
+
+def test_node_config_materialized() -> None:
+    """
+    Test that configuring a node stores the config's fields as plain attributes.
+    """
+    config = MyListConfig(list_field=[1, 2], uncached_field=[3])
+    assert "uncached_field" not in config.__dict__
+    node = Node()
+    node.configure(config)
+    assert config.__dict__["list_field"] == [1, 2]
+    assert config.__dict__["uncached_field"] == [3]
+    assert node.config.uncached_field is node.config.uncached_field
+    assert config.asdict() == {"list_field": [1, 2], "uncached_field": [3]}
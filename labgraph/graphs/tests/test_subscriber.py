@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 # Copyright 2004-present Facebook. All Rights Reserved.
 
+from typing import List
+
 import pytest
 
 from ...messages.message import Message
 from ...util.error import LabgraphError
-from ..method import subscriber
+from ..method import publisher, subscriber
 from ..node import Node
-from ..topic import Topic
+from ..topic import OverflowPolicy, Topic
 
 
 class MyMessage(Message):
@@ -52,3 +54,178 @@ def test_subscriber_signature() -> None:
         "Expected subscriber 'my_subscriber' to have signature def my_subscriber(self, "
         "message: MyMessage) -> None"
     ) in str(err.value)
+
+
+def test_batch_subscriber_signature() -> None:
+    """
+    Tests that an error is thrown when a batched subscriber does not take a list of
+    messages.
+    """
+    with pytest.raises(LabgraphError) as err:
+
+        class MyNode(Node):
+            A = Topic(MyMessage)
+
+            @subscriber(A, batch=True)
+            def my_subscriber(self, message: MyMessage) -> None:
+                pass
+
+    assert (
+        "Expected subscriber 'my_subscriber' to have signature def my_subscriber(self, "
+        "messages: List[MyMessage]) -> None"
+    ) in str(err.value)
+
+
+def test_batch_subscriber() -> None:
+    """
+    Tests that a batched subscriber's options are kept on its node method.
+    """
+
+    class MyNode(Node):
+        A = Topic(MyMessage)
+
+        @subscriber(A, batch=True, max_batch_size=10, max_wait=0.1)
+        def my_subscriber(self, messages: List[MyMessage]) -> None:
+            pass
+
+    node = MyNode()
+    method = node.__methods__["my_subscriber"]
+    assert method.batch
+    assert method.max_batch_size == 10
+    assert method.max_wait == 0.1
+
+
+def test_batch_options_without_batch() -> None:
+    """
+    Tests that an error is thrown when a subscriber has batch options but is not
+    batched.
+    """
+    with pytest.raises(LabgraphError) as err:
+
+        class MyNode(Node):
+            A = Topic(MyMessage)
+
+            @subscriber(A, max_batch_size=10)
+            def my_subscriber(self, message: MyMessage) -> None:
+                pass
+
+    assert "Expected batch=True for a subscriber with a max batch size" in str(
+        err.value
+    )
+
+
+def test_batch_transformer() -> None:
+    """
+    Tests that an error is thrown when a batched subscriber also publishes.
+    """
+    with pytest.raises(LabgraphError) as err:
+
+        class MyNode(Node):
+            A = Topic(MyMessage)
+            B = Topic(MyMessage)
+
+            @publisher(B)
+            @subscriber(A, batch=True)
+            def my_subscriber(self, messages: List[MyMessage]) -> None:
+                pass
+
+    assert (
+        "Method 'my_subscriber' cannot have both a batched @subscriber decorator and "
+        "a @publisher decorator"
+    ) in str(err.value)
+
+
+def test_queue_settings() -> None:
+    """
+    Tests that a subscriber's queue settings are kept on its node method, and a
+    topic's on the topic.
+    """
+
+    class MyNode(Node):
+        A = Topic(MyMessage, queue_capacity=2, overflow_policy=OverflowPolicy.BLOCK)
+
+        @subscriber(A, queue_capacity=1, overflow_policy=OverflowPolicy.DROP_NEWEST)
+        def my_subscriber(self, message: MyMessage) -> None:
+            pass
+
+    node = MyNode()
+    method = node.__methods__["my_subscriber"]
+    assert method.queue_capacity == 1
+    assert method.overflow_policy == OverflowPolicy.DROP_NEWEST
+    assert node.A.queue_capacity == 2
+    assert node.A.overflow_policy == OverflowPolicy.BLOCK
+
+
+def test_invalid_queue_capacity() -> None:
+    """
+    Tests that an error is thrown when a subscriber or topic has a queue capacity that
+    is not positive.
+    """
+    with pytest.raises(LabgraphError) as err:
+
+        class MyNode(Node):
+            A = Topic(MyMessage)
+
+            @subscriber(A, queue_capacity=0)
+            def my_subscriber(self, message: MyMessage) -> None:
+                pass
+
+    assert "Expected a positive queue capacity for a subscriber, got 0" in str(
+        err.value
+    )
+
+    with pytest.raises(LabgraphError) as err:
+        Topic(MyMessage, queue_capacity=0)
+
+    assert "Expected a positive queue capacity for a topic, got 0" in str(err.value)
+
+
+def test_inline_subscriber() -> None:
+    """
+    Tests that an inline subscriber is marked on its node method, and that an error is
+    thrown when it is async.
+    """
+
+    class MyNode(Node):
+        A = Topic(MyMessage)
+
+        @subscriber(A, inline=True)
+        def my_subscriber(self, message: MyMessage) -> None:
+            pass
+
+    node = MyNode()
+    assert node.__methods__["my_subscriber"].inline
+
+    with pytest.raises(LabgraphError) as err:
+
+        class MyAsyncNode(Node):
+            A = Topic(MyMessage)
+
+            @subscriber(A, inline=True)
+            async def my_subscriber(self, message: MyMessage) -> None:
+                pass
+
+    assert "Expected inline subscriber 'my_subscriber' not to be async" in str(
+        err.value
+    )
+
+
+def test_inline_transformer() -> None:
+    """
+    Tests that an error is thrown when an inline subscriber also publishes.
+    """
+    with pytest.raises(LabgraphError) as err:
+
+        class MyNode(Node):
+            A = Topic(MyMessage)
+            B = Topic(MyMessage)
+
+            @publisher(B)
+            @subscriber(A, inline=True)
+            def my_subscriber(self, message: MyMessage) -> None:
+                pass
+
+    assert (
+        "Method 'my_subscriber' cannot have both an inline @subscriber decorator and "
+        "a @publisher decorator"
+    ) in str(err.value)
@@ -4,6 +4,7 @@
 from abc import ABC, ABCMeta, abstractmethod
 from collections import namedtuple
 from copy import deepcopy
+from enum import Enum, auto
 from typing import Any, Dict, NamedTuple, Optional, Tuple, Type, Union, cast
 
 from ..messages.message import Message
@@ -13,6 +14,22 @@ from ..util.error import LabgraphError
 PATH_DELIMITER = "/"
 
 
+class OverflowPolicy(Enum):
+    """
+    What a runner does with a message that arrives for a subscriber whose queue is
+    full.
+
+    `BLOCK` holds up the thread that delivers the stream's messages to the
+    subscriber's queue, but not the publishers of the stream. The stream's consumer
+    buffers the messages that keep arriving without bound, so none are dropped.
+    """
+
+    DROP_OLDEST = auto()  # Drop the oldest message in the queue
+    DROP_NEWEST = auto()  # Drop the message that arrived
+    BLOCK = auto()  # Hold up the stream's delivery until the queue has room
+    ERROR = auto()  # Drop the message that arrived and stop the graph with an error
+
+
 class Topic:
     """
     Represents a topic in a graph. A user can instantiate this in a `Module` in
@@ -25,12 +42,31 @@ class Topic:
 
     Args:
         message_type: The message type for messages that are in this topic.
+        queue_capacity:
+            The most messages that can wait for each subscriber to this topic. If not
+            set, the queue is unbounded.
+        overflow_policy:
+            What to do with a message that arrives for a subscriber to this topic
+            whose queue is full. Defaults to `OverflowPolicy.DROP_OLDEST`.
     """
 
     message_type: Type[Message]
+    queue_capacity: Optional[int]
+    overflow_policy: Optional[OverflowPolicy]
 
-    def __init__(self, message_type: Type[Message]) -> None:
+    def __init__(
+        self,
+        message_type: Type[Message],
+        queue_capacity: Optional[int] = None,
+        overflow_policy: Optional[OverflowPolicy] = None,
+    ) -> None:
+        if queue_capacity is not None and queue_capacity < 1:
+            raise LabgraphError(
+                f"Expected a positive queue capacity for a topic, got {queue_capacity}"
+            )
         self.message_type = message_type
+        self.queue_capacity = queue_capacity
+        self.overflow_policy = overflow_policy
         self._name: Optional[str] = None
 
     def _assign_name(self, name: str) -> None:
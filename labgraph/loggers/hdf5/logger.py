@@ -12,13 +12,15 @@ import numpy as np
 from ...graphs.parent_graph_info import ParentGraphInfo
 from ...graphs.stream import Stream
 from ...graphs.topic import PATH_DELIMITER
-from ...messages.message import Message
+from ...messages.message import Field, Message, MessageFieldType
 from ...messages.types import (
     T_I,
     BoolType,
     BytesType,
+    BytesViewType,
     CFloatType,
     CIntType,
+    CompressedType,
     DataclassType,
     DictType,
     DynamicType,
@@ -29,10 +31,17 @@ from ...messages.types import (
     ListType,
     NumpyDynamicType,
     NumpyType,
+    OptionalDynamicType,
+    OptionalType,
     StrDynamicType,
     StrEnumType,
     StrType,
+    StrViewType,
     T,
+    TupleDynamicType,
+    TupleType,
+    UnionDynamicType,
+    UnionType,
 )
 from ...util.error import LabgraphError
 from ..logger import Logger
@@ -45,7 +54,17 @@ SERIALIZABLE_DYNAMIC_TYPES = (
     DictType,
     NumpyDynamicType,
     StrEnumType,
+    OptionalDynamicType,
+    TupleDynamicType,
+    UnionDynamicType,
+    CompressedType,
+    MessageFieldType,
+    BytesViewType,
+    StrViewType,
 )
+# Fixed-length field types that are logged as their serialized bytes
+SERIALIZABLE_FIXED_TYPES = (OptionalType, TupleType, UnionType)
+SERIALIZABLE_TYPES = SERIALIZABLE_DYNAMIC_TYPES + SERIALIZABLE_FIXED_TYPES
 
 logger = logging.getLogger(__name__)
 
@@ -101,17 +120,25 @@ class HDF5Logger(Logger):
                 for i, message in enumerate(messages):
                     # Convert dynamic-length bytes fields into numpy arrays so h5py can
                     # read/write them
-                    message_fields = list(message.astuple())
                     fields = list(message.__class__.__message_fields__.values())
-                    for j, value in enumerate(message_fields):
-                        if not isinstance(fields[j].data_type, DynamicType):
-                            continue
-                        if isinstance(fields[j].data_type, SERIALIZABLE_DYNAMIC_TYPES):
-                            value = fields[j].data_type.preprocess(value)
-                        if isinstance(value, bytes):
-                            message_fields[j] = np.array(bytearray(value))
-                        elif isinstance(value, bytearray):
-                            message_fields[j] = np.array(value)
+                    message_fields = []
+                    for field in fields:
+                        if isinstance(field.data_type, CompressedType):
+                            value = get_compressed_field(message, field)
+                        else:
+                            value = getattr(message, field.name)
+                            if isinstance(field.data_type, SERIALIZABLE_TYPES):
+                                value = field.data_type.preprocess(value)
+                        if isinstance(field.data_type, DynamicType) or isinstance(
+                            field.data_type, SERIALIZABLE_TYPES
+                        ):
+                            if isinstance(value, bytes):
+                                value = np.array(bytearray(value))
+                            elif isinstance(value, bytearray):
+                                value = np.array(value)
+                            elif isinstance(value, memoryview):
+                                value = np.frombuffer(value, dtype=np.uint8)
+                        message_fields.append(value)
 
                     dataset[-len(messages) + i] = tuple(message_fields)
 
@@ -129,6 +156,16 @@ class HDF5Logger(Logger):
                 self.file = None
 
 
+def get_compressed_field(message: Message, field: Field[Any]) -> bytes:
+    """
+    Returns the serialized value of a compressed field. The field is copied from the
+    message's sample when possible, so it is not decompressed and compressed again.
+    """
+    if message._sample is not None and message._has_native_sample():
+        return bytes(message.__sample__.dynamicParameters[field.offset])
+    return field.data_type.preprocess(getattr(message, field.name))  # type: ignore
+
+
 def get_numpy_type_for_field_type(
     field_type: FieldType[T],
 ) -> Union[Tuple[np.dtype], Tuple[np.dtype, Tuple[int, ...]]]:
@@ -145,6 +182,8 @@ def get_numpy_type_for_field_type(
         return (np.bool,)
     elif isinstance(field_type, NumpyType):
         return (field_type.dtype, field_type.shape)
+    elif isinstance(field_type, SERIALIZABLE_FIXED_TYPES):
+        return (h5py.vlen_dtype(np.uint8),)
     elif isinstance(field_type, DynamicType):
         return (get_dynamic_type(field_type),)
 
@@ -22,7 +22,7 @@ from ...messages.types import (
     StrType,
     T,
 )
-from .logger import SERIALIZABLE_DYNAMIC_TYPES
+from .logger import SERIALIZABLE_TYPES
 
 FILELIKE_T = Union[str, BinaryIO]
 LOGGER = logging.getLogger(__name__)
@@ -56,7 +56,7 @@ class HDF5Reader:
                     kwargs = {}
                     raw_values = tuple(raw)
                     for index, field in enumerate(type_.__message_fields__.values()):
-                        if isinstance(field.data_type, SERIALIZABLE_DYNAMIC_TYPES):
+                        if isinstance(field.data_type, SERIALIZABLE_TYPES):
                             value = field.data_type.postprocess(
                                 bytes(raw_values[index])
                             )
@@ -10,7 +10,7 @@ from ....messages.types import (
     StrDynamicType,
     StrType,
 )
-from ..logger import HDF5Logger, SERIALIZABLE_DYNAMIC_TYPES
+from ..logger import HDF5Logger, SERIALIZABLE_TYPES
 from .test_utils import LOGGING_IDS, write_logs_to_hdf5
 
 
@@ -40,7 +40,7 @@ def test_hdf5_logger() -> None:
                             actual_value.decode(field.data_type.encoding)
                             == expected_value
                         )
-                    elif isinstance(field.data_type, SERIALIZABLE_DYNAMIC_TYPES):
+                    elif isinstance(field.data_type, SERIALIZABLE_TYPES):
                         actual_value = field.data_type.postprocess(bytes(actual_value))
                         assert actual_value == expected_value
                     elif isinstance(field.data_type, DynamicType) and not isinstance(
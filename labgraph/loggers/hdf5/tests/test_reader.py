@@ -33,6 +33,13 @@ def test_hdf5_reader() -> None:
             list_field=[5, 6, 7],
             dict_field={"test_key": "test_val"},
             dataclass_field=MyDataclass(sub_int_field=7, sub_str_field="seven"),
+            optional_field=float(index) if index % 2 == 0 else None,
+            optional_str_field=str(index) if index % 2 == 0 else None,
+            tuple_field=(index, index + 1),
+            union_field=index if index % 2 == 0 else str(index),
+            compressed_field=str(index).encode("ascii") * 100,
+            bytes_view_field=str(index).encode("ascii"),
+            str_view_field=str(index),
         )
         assert reader.logs["test1"][index] == expected
         assert reader.logs["test2"][index] == expected
@@ -16,11 +16,11 @@ import tempfile
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Tuple, Type
+from typing import Dict, List, Optional, Tuple, Type, Union
 
 from ....graphs.node_test_harness import run_with_harness
 from ....messages.message import Message
-from ....messages.types import BytesType
+from ....messages.types import BytesType, BytesView, Compressed, StrView
 from ....util.random import random_string
 from ...logger import Logger, LoggerConfig
 
@@ -56,6 +56,13 @@ class MyMessage(Message):
     list_field: List[int]
     dict_field: Dict[str, str]
     dataclass_field: MyDataclass
+    optional_field: Optional[float]
+    optional_str_field: Optional[str]
+    tuple_field: Tuple[int, int]
+    union_field: Union[int, str]
+    compressed_field: Compressed[bytes]  # type: ignore
+    bytes_view_field: BytesView
+    str_view_field: StrView
 
 
 async def _test_fn(
@@ -90,6 +97,13 @@ def write_logs_to_hdf5(logger: Type[Logger]) -> Tuple[Path, List[Tuple[str, Mess
             list_field=[5, 6, 7],
             dict_field={"test_key": "test_val"},
             dataclass_field=MyDataclass(sub_int_field=7, sub_str_field="seven"),
+            optional_field=float(i) if i % 2 == 0 else None,
+            optional_str_field=str(i) if i % 2 == 0 else None,
+            tuple_field=(i, i + 1),
+            union_field=i if i % 2 == 0 else str(i),
+            compressed_field=str(i).encode("ascii") * 100,
+            bytes_view_field=str(i).encode("ascii"),
+            str_view_field=str(i),
         )
         for logging_id in random.sample(LOGGING_IDS, k=len(LOGGING_IDS)):
             logging_ids_and_messages.append((logging_id, message))
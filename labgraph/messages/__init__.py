@@ -3,27 +3,44 @@
 
 __all__ = [
     "BytesType",
+    "BytesView",
+    "BytesViewType",
     "CFloatType",
     "CIntType",
+    "Compressed",
+    "CompressedType",
     "FieldType",
     "FloatType",
     "IntType",
     "Message",
+    "MessageBatch",
+    "MessageFieldType",
+    "MessageLayout",
     "NumpyDynamicType",
     "NumpyType",
     "StrType",
+    "StrView",
+    "StrViewType",
     "TimestampedMessage",
 ]
 
-from .message import Message, TimestampedMessage
+from .batch import MessageBatch
+from .message import Message, MessageFieldType, TimestampedMessage
 from .types import (
     BytesType,
+    BytesView,
+    BytesViewType,
     CFloatType,
     CIntType,
+    Compressed,
+    CompressedType,
     FieldType,
     FloatType,
     IntType,
+    MessageLayout,
     NumpyDynamicType,
     NumpyType,
     StrType,
+    StrView,
+    StrViewType,
 )
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# Copyright 2004-present Facebook. All Rights Reserved.
+
+# Defines message batches, which carry many messages in a single Cthulhu sample
+
+from typing import Any, ClassVar, Dict, Iterator, List, Sequence, Tuple, Type
+
+import numpy as np
+
+from .message import Message, MessageMeta, _is_passthrough
+from .types import FieldType, ListType, NumpyColumnType, NumpyType, StructType
+
+
+class MessageBatchRow:
+    """
+    A read-only view of one row of a `MessageBatch`. Fields are read as attributes, as
+    with the batch's message type.
+
+    Args:
+        columns: The batch's decoded columns, by field name.
+        index: The index of the row in the batch.
+    """
+
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns: Dict[str, Sequence[Any]], index: int) -> None:
+        self._columns = columns
+        self._index = index
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            column = self._columns[name]
+        except KeyError:
+            raise AttributeError(name)
+        return column[self._index]
+
+    def __repr__(self) -> str:
+        values = ", ".join(
+            f"{name}={column[self._index]!r}" for name, column in self._columns.items()
+        )
+        return f"{self.__class__.__name__}({values})"
+
+
+class MessageBatch(Message):
+    """
+    Represents a batch of messages of one message type, stored column-wise in a single
+    Cthulhu sample so that a whole batch is sent with a single signal. Use
+    `MessageBatch[MyMessage]` to get the batch type for `MyMessage`.
+
+    A batch type has a field for each field of its message type. Reading a field
+    returns the column of values for that field: a numpy array for a fixed-length field
+    (whose first axis indexes the rows), or a list for a dynamic-length field. Numpy
+    columns are read-only views of the batch's shared memory, and hold the preprocessed
+    values of their field type (e.g., the encoded bytes of a `StrType` field); rows and
+    `to_messages` return the postprocessed values.
+    """
+
+    __batch_message_type__: ClassVar[Type[Message]]
+
+    def __class_getitem__(cls, message_type: Type[Message]) -> Type["MessageBatch"]:
+        batch_type = _BATCH_TYPES.get(message_type)
+        if batch_type is None:
+            batch_type = _create_batch_type(message_type)
+            _BATCH_TYPES[message_type] = batch_type
+        return batch_type
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super(MessageBatch, self).__init__(*args, **kwargs)
+        if "__sample__" not in kwargs:
+            lengths = {len(value) for value in (*args, *kwargs.values())}
+            if len(lengths) > 1:
+                raise ValueError(
+                    f"__init__() for {type(self).__name__} got columns of different "
+                    f"lengths: {sorted(lengths)}"
+                )
+
+    @classmethod
+    def from_messages(cls, messages: Sequence[Message]) -> "MessageBatch":
+        """
+        Creates a batch from a sequence of messages of the batch's message type.
+
+        Args:
+            messages: The messages to put in the batch, in order.
+        """
+        columns: Dict[str, Any] = {}
+        for field in cls.__batch_message_type__.__message_fields__.values():
+            values = [getattr(message, field.name) for message in messages]
+            data_type = field.data_type
+            if isinstance(data_type, StructType):
+                column_type = cls.__message_fields__[field.name].data_type
+                assert isinstance(column_type, NumpyColumnType)
+                if not isinstance(data_type, NumpyType):
+                    values = [data_type.preprocess(value) for value in values]
+                columns[field.name] = np.array(values, dtype=column_type.dtype).reshape(
+                    (len(values),) + column_type.item_shape
+                )
+            else:
+                columns[field.name] = values
+        return cls(**columns)
+
+    def to_messages(self) -> List[Message]:
+        """
+        Returns the rows of the batch as messages of the batch's message type.
+        """
+        message_type = self.__batch_message_type__
+        columns = {
+            field.name: (
+                getattr(self, field.name)
+                if isinstance(field.data_type, NumpyType)
+                else self._decode_column(field.name)
+            )
+            for field in message_type.__message_fields__.values()
+        }
+        return message_type.build_many(columns)
+
+    def __len__(self) -> int:
+        if len(self.__field_names__) == 0:
+            return 0
+        return len(getattr(self, self.__field_names__[0]))
+
+    def __iter__(self) -> Iterator[MessageBatchRow]:
+        columns = {name: self._decode_column(name) for name in self.__field_names__}
+        for i in range(len(self)):
+            yield MessageBatchRow(columns, i)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Batch types are created dynamically, so they are pickled by message type
+        return (_create_batch, (self.__batch_message_type__, dict(self.asdict())))
+
+    def _decode_column(self, name: str) -> Sequence[Any]:
+        """
+        Returns the values of a column as they are read from the message type's field.
+        """
+        column = getattr(self, name)
+        data_type = self.__batch_message_type__.__message_fields__[name].data_type
+        if isinstance(data_type, NumpyType) or not isinstance(data_type, StructType):
+            return column  # type: ignore
+        values = column.tolist()
+        if _is_passthrough(data_type):
+            return values  # type: ignore
+        return [data_type.postprocess(value) for value in values]
+
+
+_BATCH_TYPES: Dict[Type[Message], Type[MessageBatch]] = {}
+
+
+def _create_batch_type(message_type: Type[Message]) -> Type[MessageBatch]:
+    """
+    Creates the `MessageBatch` type for a message type.
+
+    Args:
+        message_type: The message type to create a batch type for.
+    """
+    annotations: Dict[str, FieldType[Any]] = {}
+    for field in message_type.__message_fields__.values():
+        if isinstance(field.data_type, StructType):
+            annotations[field.name] = NumpyColumnType(field.data_type)
+        else:
+            annotations[field.name] = ListType(field.data_type)  # type: ignore
+    name = f"MessageBatch[{message_type.__name__}]"
+    batch_type = MessageMeta(
+        name,
+        (MessageBatch,),
+        {
+            "__annotations__": annotations,
+            "__module__": message_type.__module__,
+            "__qualname__": name,
+            "__batch_message_type__": message_type,
+        },
+    )
+    return batch_type  # type: ignore
+
+
+def _create_batch(message_type: Type[Message], columns: Dict[str, Any]) -> MessageBatch:
+    """
+    Creates a batch of `message_type` from columns. Used to unpickle batches.
+    """
+    return MessageBatch[message_type](**columns)  # type: ignore
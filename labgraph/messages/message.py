@@ -8,12 +8,29 @@ import hashlib
 import importlib
 import logging
 import struct
+from abc import ABC, abstractmethod
 from collections import OrderedDict
 from enum import Enum
-from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+import numpy as np
 
 from .._cthulhu.bindings import (
     Field as CthulhuField,
+    MemoryPool,
     memoryPool,
     StreamSample,
     TypeDefinition,
@@ -22,8 +39,16 @@ from .._cthulhu.bindings import (
 from ..util.error import LabgraphError
 from .types import (
     DEFAULT_BYTE_ORDER,
+    LEN_PREFIX,
+    ByteOrder,
+    DataclassType,
+    DynamicType,
     FieldType,
     LOCAL_INTERNAL_FIELDS,
+    MessageLayout,
+    NumpyDynamicType,
+    NumpyType,
+    ObjectDynamicType,
     StructType,
     get_field_type,
 )
@@ -48,6 +73,7 @@ class Field(Generic[T]):
     data_type: FieldType[T]
     offset: int
     dataclasses_field: dataclasses.Field  # type: ignore
+    cached: bool
 
     def __init__(
         self,
@@ -60,6 +86,7 @@ class Field(Generic[T]):
         self.data_type = data_type
         self.offset = offset
         self.dataclasses_field = dataclasses_field
+        self.cached = dataclasses_field.metadata.get(CACHE_METADATA_KEY, True)
 
     @property
     def required(self) -> bool:
@@ -83,24 +110,410 @@ class Field(Generic[T]):
         return value  # type: ignore
 
 
+# Message types by `__type_id__`, for decoding `MessageFieldType` fields
+_MESSAGE_TYPES_BY_ID: Dict[int, "MessageMeta"] = {}
+
+# Key in a dataclass field's metadata that controls whether messages cache the field's
+# decoded value
+CACHE_METADATA_KEY = "cache"
+
+
+def _is_passthrough(data_type: FieldType[Any]) -> bool:
+    """
+    Returns true if `data_type` does not override `FieldType.postprocess`, meaning the
+    raw deserialized value can be returned as-is.
+    """
+    return type(data_type).postprocess is FieldType.postprocess
+
+
+def _get_preprocess(data_type: FieldType[Any]) -> Optional[Callable[[Any], Any]]:
+    """
+    Returns the preprocessing function for `data_type`, or None if `data_type` does
+    not override `FieldType.preprocess`.
+    """
+    if type(data_type).preprocess is FieldType.preprocess:
+        return None
+    return data_type.preprocess
+
+
+def _get_padding(offset: int, alignment: int) -> str:
+    """
+    Returns the `struct` format string for the padding that aligns `offset` to
+    `alignment`.
+    """
+    padding = -offset % alignment
+    return f"{padding}x" if padding > 0 else ""
+
+
+# The kinds of numpy dtypes that correspond to `struct` format characters
+RECORD_DTYPE_KINDS = {
+    "?": "b",
+    "b": "i",
+    "h": "i",
+    "i": "i",
+    "l": "i",
+    "q": "i",
+    "B": "u",
+    "H": "u",
+    "I": "u",
+    "L": "u",
+    "Q": "u",
+    "e": "f",
+    "f": "f",
+    "d": "f",
+}
+
+
+def _get_record_dtype(
+    fields: Sequence[Field[Any]], byte_order: ByteOrder, size: int
+) -> np.dtype:
+    """
+    Returns a numpy structured dtype that describes the layout of a message type's
+    fixed-length fields. Numpy fields are described by their dtype and shape, numeric
+    fields by the corresponding numpy dtype, and other fields as raw bytes.
+
+    Args:
+        fields: The fixed-length fields of the message type.
+        byte_order: The byte order of the fixed-length fields.
+        size: The size of the fixed-length fields, including padding.
+    """
+    formats: List[Any] = []
+    for field in fields:
+        data_type = field.data_type
+        assert isinstance(data_type, StructType)
+        kind = RECORD_DTYPE_KINDS.get(data_type.format_string)
+        if isinstance(data_type, NumpyType):
+            dtype = np.dtype(data_type.dtype).newbyteorder(byte_order.value)
+            formats.append((dtype, data_type.shape))
+        elif kind is not None:
+            formats.append(np.dtype(f"{byte_order.value}{kind}{data_type.size}"))
+        else:
+            formats.append(np.dtype(f"S{data_type.size}"))
+    return np.dtype(
+        {
+            "names": [field.name for field in fields],
+            "formats": formats,
+            "offsets": [field.offset for field in fields],
+            "itemsize": size,
+        }
+    )
+
+
+def _buffers_equal(buffer1: Any, buffer2: Any) -> bool:
+    """
+    Returns true if two buffers hold the same bytes.
+    """
+    view1 = memoryview(buffer1)
+    view2 = memoryview(buffer2)
+    # Comparing memoryviews unpacks each item, so compare copies of the bytes instead
+    return view1.nbytes == view2.nbytes and view1.tobytes() == view2.tobytes()
+
+
+def _views_sample(field: Field[Any]) -> bool:
+    """
+    Returns whether values decoded for a field can be views of the shared memory of
+    the sample they are read from.
+    """
+    data_type = field.data_type
+    if isinstance(data_type, (NumpyType, NumpyDynamicType, ObjectDynamicType)):
+        return data_type.zero_copy
+    return (
+        data_type.size is None
+        and type(data_type).postprocess_buffer is not FieldType.postprocess_buffer
+    )
+
+
+def _same_field_type(field1: Field[Any], field2: Field[Any]) -> bool:
+    """
+    Returns true if every value decoded for `field2` is a valid value for `field1`.
+    """
+    type1, type2 = field1.data_type, field2.data_type
+    return (
+        type(type1) is type(type2)
+        and type1.description == type2.description
+        and type1.python_type is type2.python_type
+    )
+
+
+class FieldAccessor(ABC):
+    """
+    Descriptor that reads a field of a message directly from the message's Cthulhu
+    sample. `MessageMeta` installs one accessor for each field of a message class when
+    the class is created, so reading a field does not need to look up the field's
+    layout.
+
+    Unless the field opts out of caching, the decoded value is stored in the instance's
+    `__dict__`, which takes precedence over this (non-data) descriptor, so later reads
+    of the field are plain attribute reads. Messages stay frozen because `dataclasses`
+    rejects assignments to fields. On the class, an accessor reads as the field's
+    default value, as a dataclass field would.
+
+    Args:
+        field: The field read by this accessor.
+        index: The index of the field in its message type.
+    """
+
+    field: Field[Any]
+    name: str
+    index: int
+    cached: bool
+
+    def __init__(self, field: Field[Any], index: int) -> None:
+        self.field = field
+        self.name = field.name
+        self.index = index
+        self.cached = field.cached
+        self._conversion_source_type: Optional["MessageMeta"] = None
+        self._conversion: Tuple["FieldAccessor", Optional[FieldType[Any]]]
+
+    def __get__(self, instance: Optional["Message"], owner: "MessageMeta") -> Any:
+        if instance is None:
+            return self.get_default()
+        original_message_type = instance.__original_message_type__
+        if original_message_type is not None and original_message_type is not owner:
+            value = self.convert(instance, owner, original_message_type)
+        else:
+            value = self.decode(instance._sample or instance.__sample__)
+        if self.cached:
+            instance.__dict__[self.name] = value
+        return value
+
+    def get_default(self) -> Any:
+        """
+        Returns the default value of this accessor's field, which is what the field
+        reads as on its message class. Raises `AttributeError` if the field has no
+        default value (or only a default factory), as a dataclass does, so that
+        `dataclasses` finds the same defaults in subclasses of the message class.
+        """
+        default = self.field.dataclasses_field.default
+        if default is dataclasses.MISSING:
+            raise AttributeError(self.name)
+        return default
+
+    @abstractmethod
+    def decode(self, sample: StreamSample) -> Any:
+        """
+        Decodes this accessor's field from a Cthulhu sample.
+
+        Args:
+            sample: The sample to decode the field from.
+        """
+
+    def convert(
+        self,
+        instance: "Message",
+        owner: "MessageMeta",
+        original_message_type: "MessageMeta",
+    ) -> Any:
+        """
+        Reads this accessor's field from a message whose sample was produced by a
+        different (but connectable) message type. The field is decoded by the
+        corresponding accessor of the original message type, found in the owner's
+        conversion plan.
+
+        Args:
+            instance: The message to read the field from.
+            owner: The message type of `instance`.
+            original_message_type: The message type that produced the sample.
+        """
+        # Most subscribers only receive messages of one other type, so the entry of
+        # the plan for the last type is kept on the accessor
+        if original_message_type is not self._conversion_source_type:
+            self._conversion = owner._get_conversion_plan(original_message_type)[
+                self.index
+            ]
+            self._conversion_source_type = original_message_type
+        source_accessor, target_type = self._conversion
+        value = source_accessor.decode(instance.__sample__)
+        if target_type is not None and not target_type.isinstance(value):
+            raise LabgraphError(
+                f"Could not convert from {original_message_type.__name__}."
+                f"{source_accessor.name} to {owner.__name__}.{self.name}: invalid "
+                f"value {value}"
+            )
+        return value
+
+
+class FixedFieldAccessor(FieldAccessor):
+    """
+    Accessor for a fixed-length field. Unpacks the field from the sample's parameters
+    using a precompiled `struct.Struct`.
+
+    Args:
+        field: The field read by this accessor.
+        index: The index of the field in its message type.
+        byte_order: The byte order of the message type's fixed-length fields.
+    """
+
+    def __init__(
+        self,
+        field: Field[Any],
+        index: int,
+        byte_order: ByteOrder = DEFAULT_BYTE_ORDER,
+    ) -> None:
+        super(FixedFieldAccessor, self).__init__(field, index)
+        assert isinstance(field.data_type, StructType)
+        self.offset = field.offset
+        field_struct = struct.Struct(byte_order.value + field.data_type.format_string)
+        self.unpack_from = field_struct.unpack_from
+        self.pack_into = field_struct.pack_into
+        self.preprocess = field.data_type.preprocess
+        self.postprocess = (
+            None if _is_passthrough(field.data_type) else field.data_type.postprocess
+        )
+
+    def __get__(self, instance: Optional["Message"], owner: "MessageMeta") -> Any:
+        # Same as `FieldAccessor.__get__`, with `decode` inlined for the hot path
+        if instance is None:
+            return self.get_default()
+        original_message_type = instance.__original_message_type__
+        if original_message_type is not None and original_message_type is not owner:
+            value = self.convert(instance, owner, original_message_type)
+        else:
+            value = self.unpack_from(
+                (instance._sample or instance.__sample__).parameters, self.offset
+            )[0]
+            if self.postprocess is not None:
+                value = self.postprocess(value)
+        if self.cached:
+            instance.__dict__[self.name] = value
+        return value
+
+    def decode(self, sample: StreamSample) -> Any:
+        value = self.unpack_from(sample.parameters, self.offset)[0]
+        if self.postprocess is None:
+            return value
+        return self.postprocess(value)
+
+    def encode_into(self, parameters: Any, value: Any) -> None:
+        """
+        Packs a value of the field into a buffer of a message's fixed-length fields.
+        """
+        self.pack_into(parameters, self.offset, self.preprocess(value))
+
+
+class NumpyViewAccessor(FieldAccessor):
+    """
+    Accessor for a `NumpyType` field with `zero_copy` set. Returns a read-only array
+    that views the sample's parameters directly. The array holds a reference to the
+    parameter buffer, so the shared memory outlives the message if necessary.
+    """
+
+    def __init__(self, field: Field[Any], index: int) -> None:
+        super(NumpyViewAccessor, self).__init__(field, index)
+        assert isinstance(field.data_type, NumpyType)
+        self.offset = field.offset
+        self.view = field.data_type.view
+        self.pack_into = struct.Struct(field.data_type.format_string).pack_into
+        self.preprocess = field.data_type.preprocess
+
+    def decode(self, sample: StreamSample) -> Any:
+        return self.view(sample.parameters, self.offset)
+
+    def encode_into(self, parameters: Any, value: Any) -> None:
+        """
+        Packs a value of the field into a buffer of a message's fixed-length fields.
+        """
+        self.pack_into(parameters, self.offset, self.preprocess(value))
+
+
+class DynamicFieldAccessor(FieldAccessor):
+    """
+    Accessor for a dynamic-length field. Reads the field from the sample's dynamic
+    parameters.
+    """
+
+    def __init__(self, field: Field[Any], index: int) -> None:
+        super(DynamicFieldAccessor, self).__init__(field, index)
+        self.offset = field.offset
+        data_type = field.data_type
+        if (
+            type(data_type).postprocess_buffer is FieldType.postprocess_buffer
+            and _is_passthrough(data_type)
+        ):
+            self.postprocess_buffer = bytearray
+        else:
+            self.postprocess_buffer = data_type.postprocess_buffer
+
+    def decode(self, sample: StreamSample) -> Any:
+        return self.postprocess_buffer(sample.dynamicParameters[self.offset])
+
+
+# For each field of a message type, the accessor that decodes the field from a sample of
+# another message type, and the field type to check decoded values against (if any)
+ConversionPlan = Tuple[Tuple[FieldAccessor, Optional[FieldType[Any]]], ...]
+
+
 class MessageMeta(type):
     """
     Metaclass for messages. Responsible for collecting field information from the
     class's type annotations. Works similarly to the builtin `dataclasses` module but is
     not compatible with it. When any class is defined using this metaclass, we also
     register a corresponding Cthulhu type.
+
+    The metaclass also compiles a codec for the class: a precompiled `struct.Struct`
+    for the fixed-length fields, tables of the fixed and dynamic fields, a
+    `FieldAccessor` for every field, and the class's versioned name.
+
+    Args:
+        layout:
+            Class keyword that selects the `MessageLayout` of the class's fixed-length
+            fields. Defaults to the layout of the class's first message base class, or
+            `MessageLayout.PACKED`.
     """
 
+    __layout__: MessageLayout
+    __byte_order__: ByteOrder
     __message_size__: int
     __message_fields__: "OrderedDict[str, Field[Any]]"
+    __field_names__: Tuple[str, ...]
     __format_string__: str
     __num_dynamic_fields__: int
+    __struct__: struct.Struct
+    __fixed_fields__: Tuple[Field[Any], ...]
+    __dynamic_fields__: Tuple[Field[Any], ...]
+    __fixed_preprocessors__: Tuple[Optional[Callable[[Any], Any]], ...]
+    __dynamic_preprocessors__: Tuple[Optional[Callable[[Any], Any]], ...]
+    __field_accessors__: Tuple[FieldAccessor, ...]
+    __conversion_plans__: Dict[int, Tuple["MessageMeta", ConversionPlan]]
+    __record_dtype__: np.dtype
+    __records_dtype__: np.dtype
+    __versioned_name__: str
+    # 64-bit ID of the message type's versioned name, used by `MessageFieldType`
+    __type_id__: int
+
+    def __new__(
+        mcs,
+        name: str,
+        bases: Tuple[type, ...],
+        members: Dict[str, Any],
+        layout: Optional[Union[MessageLayout, str]] = None,
+    ) -> "MessageMeta":
+        # Consume the `layout` class keyword so it is not passed to `__init_subclass__`
+        return super(MessageMeta, mcs).__new__(mcs, name, bases, members)
 
     def __init__(
-        cls, name: str, bases: Tuple[type, ...], members: Dict[str, Any]
+        cls,
+        name: str,
+        bases: Tuple[type, ...],
+        members: Dict[str, Any],
+        layout: Optional[Union[MessageLayout, str]] = None,
     ) -> None:
         super(MessageMeta, cls).__init__(name, bases, members)
 
+        # Use the layout of the first message base class unless one is given
+        if layout is None:
+            layout = next(
+                (base.__layout__ for base in bases if isinstance(base, MessageMeta)),
+                MessageLayout.PACKED,
+            )
+        cls.__layout__ = MessageLayout(layout)
+        cls.__byte_order__ = (
+            ByteOrder.NATIVE
+            if cls.__layout__ == MessageLayout.NATIVE
+            else DEFAULT_BYTE_ORDER
+        )
+
         # Make the class a dataclass
         dataclasses.dataclass(frozen=True, init=False, eq=False)(cls)  # type: ignore
         assert dataclasses.is_dataclass(cls)
@@ -109,8 +522,7 @@ class MessageMeta(type):
         if not hasattr(cls, "__post_init__"):
             cls.__post_init__ = lambda self: None
 
-        # Use big endian by default for all IPC communications
-        cls.__format_string__ = DEFAULT_BYTE_ORDER.value
+        cls.__format_string__ = cls.__byte_order__.value
         cls.__message_fields__ = OrderedDict([])
         cls.__num_dynamic_fields__ = 0
 
@@ -139,6 +551,10 @@ class MessageMeta(type):
                     )
                     cls.__num_dynamic_fields__ += 1
                 elif isinstance(data_type, StructType):
+                    if cls.__layout__ == MessageLayout.NATIVE:
+                        cls.__format_string__ += _get_padding(
+                            struct.calcsize(cls.__format_string__), data_type.alignment
+                        )
                     my_field = Field(
                         name=field.name,
                         data_type=data_type,
@@ -153,7 +569,74 @@ class MessageMeta(type):
 
                 cls.__message_fields__[my_field.name] = my_field
 
-        cls.__message_size__ = struct.calcsize(cls.__format_string__)
+        if cls.__layout__ == MessageLayout.NATIVE:
+            # Pad the end of the fixed-length fields as a C struct would be padded
+            cls.__format_string__ += _get_padding(
+                struct.calcsize(cls.__format_string__),
+                max(
+                    (
+                        field.data_type.alignment  # type: ignore
+                        for field in cls.__message_fields__.values()
+                        if field.data_type.size is not None
+                    ),
+                    default=1,
+                ),
+            )
+
+        # Compile the codec for this message type
+        cls.__struct__ = struct.Struct(cls.__format_string__)
+        cls.__message_size__ = cls.__struct__.size
+        cls.__field_names__ = tuple(cls.__message_fields__.keys())
+        cls.__fixed_fields__ = tuple(
+            field
+            for field in cls.__message_fields__.values()
+            if field.data_type.size is not None
+        )
+        cls.__dynamic_fields__ = tuple(
+            field
+            for field in cls.__message_fields__.values()
+            if field.data_type.size is None
+        )
+        cls.__fixed_preprocessors__ = tuple(
+            _get_preprocess(field.data_type) for field in cls.__fixed_fields__
+        )
+        cls.__dynamic_preprocessors__ = tuple(
+            _get_preprocess(field.data_type) for field in cls.__dynamic_fields__
+        )
+        accessors: List[FieldAccessor] = []
+        for index, field in enumerate(cls.__message_fields__.values()):
+            accessor: FieldAccessor
+            if field.data_type.size is None:
+                accessor = DynamicFieldAccessor(field, index)
+            elif isinstance(field.data_type, NumpyType) and field.data_type.zero_copy:
+                accessor = NumpyViewAccessor(field, index)
+            else:
+                accessor = FixedFieldAccessor(field, index, cls.__byte_order__)
+            setattr(cls, field.name, accessor)
+            accessors.append(accessor)
+        cls.__field_accessors__ = tuple(accessors)
+        cls.__conversion_plans__ = {}
+        cls.__record_dtype__ = _get_record_dtype(
+            cls.__fixed_fields__, cls.__byte_order__, cls.__message_size__
+        )
+        cls.__records_dtype__ = np.dtype(
+            [
+                (
+                    field.name,
+                    cls.__record_dtype__.fields[field.name][0]
+                    if field.data_type.size is not None
+                    else np.dtype(object),
+                )
+                for field in cls.__message_fields__.values()
+            ]
+        )
+
+        hash_input = f"{cls.__format_string__},{cls.__num_dynamic_fields__}"
+        fields_hash = hashlib.sha256(hash_input.encode("ascii")).hexdigest()
+        cls.__versioned_name__ = f"{cls.full_name}:{fields_hash}"
+        versioned_digest = hashlib.sha256(cls.__versioned_name__.encode("utf-8"))
+        cls.__type_id__ = int.from_bytes(versioned_digest.digest()[:8], "little")
+        _MESSAGE_TYPES_BY_ID[cls.__type_id__] = cls
 
         logger.debug(
             f"{cls.__name__}:registering cthulhu type with length "
@@ -232,9 +715,7 @@ class MessageMeta(type):
         """
         # TODO: Remove dependency on `versioned_name` for message equivalency (see
         # T64643702, https://fb.quip.com/1dcNAmzas8No)
-        hash_input = f"{cls.__format_string__},{cls.__num_dynamic_fields__}"
-        fields_hash = hashlib.sha256(hash_input.encode("ascii")).hexdigest()
-        return f"{cls.full_name}:{fields_hash}"
+        return cls.__versioned_name__
 
     def _index_of_field(cls, field_name: str) -> int:
         """
@@ -243,14 +724,40 @@ class MessageMeta(type):
         Args:
             field_name: The name of the field.
         """
-        for i, (_, field) in enumerate(cls.__message_fields__.items()):
-            if field.name == field_name:
+        for i, name in enumerate(cls.__field_names__):
+            if name == field_name:
                 return i
         raise LabgraphError(f"{cls.__name__} has no field '{field_name}'")
 
+    def _get_conversion_plan(cls, source_type: "MessageMeta") -> ConversionPlan:
+        """
+        Returns the plan for reading messages of this type from samples produced by
+        `source_type`. Fields are matched by position: the plan has an entry for each
+        field of this type, holding the accessor of `source_type` that decodes the
+        field and the field type that decoded values must be checked against (None if
+        both fields have the same type, in which case no check is needed). The plan is
+        built once per source type.
 
-class IsOriginalMessage:
-    pass
+        Args:
+            source_type: The message type that produced the samples.
+        """
+        # Plans are keyed by identity, as message types compare equal by layout
+        entry = cls.__conversion_plans__.get(id(source_type))
+        if entry is not None and entry[0] is source_type:
+            return entry[1]
+        plan = tuple(
+            (
+                source_accessor,
+                None
+                if _same_field_type(target_accessor.field, source_accessor.field)
+                else target_accessor.field.data_type,
+            )
+            for target_accessor, source_accessor in zip(
+                cls.__field_accessors__, source_type.__field_accessors__
+            )
+        )
+        cls.__conversion_plans__[id(source_type)] = (source_type, plan)
+        return plan
 
 
 M = TypeVar("M", bound="Message", covariant=True)
@@ -268,20 +775,38 @@ class Message(metaclass=MessageMeta):
 
     Messages' data are stored in shared memory via Cthulhu, meaning the transmission of
     messages between nodes requires no copying of data.
+
+    Fields are decoded from shared memory when they are first read, and the decoded
+    value is cached on the message. To decode a field on every read instead (e.g., for
+    a very large field that is read once), declare it with
+    `dataclasses.field(metadata={"cache": False})`.
+
+    Messages are not slots-only. Their sample and original message type are kept in
+    `__slots__`, but decoded field values are cached in an instance `__dict__`, which
+    is allocated when a cached field is first read. Only messages whose cached fields
+    are never read (e.g., messages that are forwarded or logged as raw buffers) avoid
+    the `__dict__`. A message that is kept for a long time after its fields are read
+    can call `release()` to let its sample's shared memory be reused.
+
+    Fixed-length fields are packed without padding by default. Declare a message type
+    with `layout="native"` (e.g., `class MyMessage(Message, layout="native")`) to store
+    them in native byte order with aligned offsets, so that numpy can view them
+    without copying or swapping bytes (see `as_record`). Subclasses inherit the
+    layout of their base class.
     """
 
-    # If __original_message_type__ is set, then we cache an instance of that class for
-    # faster message reading
-    __original_message__: Optional[Union["Message", IsOriginalMessage]]
+    # `__dict__` holds the cached field values (see `FieldAccessor`)
+    __slots__ = ("_sample", "__original_message_type__", "__dict__", "__weakref__")
 
     # Cthulhu sample that backs this message - the Cthulhu sample manages this message's
-    # shared memory
-    __sample__: StreamSample
+    # shared memory. None if the sample was released (see `release`).
+    _sample: Optional[StreamSample]
 
+    # If set, the message type that produced `__sample__`, whose fields are read by
+    # position using this message type's conversion plan
     __original_message_type__: Optional[Type["Message"]]
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
-        super().__setattr__("__original_message__", None)
         super().__setattr__("__original_message_type__", None)
         if 1 <= len(kwargs) <= 2 and "__sample__" in kwargs.keys():
             # Option to create a message directly from Cthulhu sample
@@ -291,7 +816,7 @@ class Message(metaclass=MessageMeta):
                 super().__setattr__(
                     "__original_message_type__", kwargs["__original_message_type__"]
                 )
-            super().__setattr__("__sample__", kwargs["__sample__"])
+            super().__setattr__("_sample", kwargs["__sample__"])
             return
 
         # Otherwise, build up a Cthulhu sample using the provided arguments
@@ -310,7 +835,7 @@ class Message(metaclass=MessageMeta):
                     f"__init__() takes {len(cls.__message_fields__)} positional "
                     f"arguments but {len(args)} were given"
                 )
-            values[list(cls.__message_fields__.keys())[i]] = arg
+            values[cls.__field_names__[i]] = arg
 
         # Add to the dictionary from the keyword arguments
         for key, value in kwargs.items():
@@ -328,12 +853,7 @@ class Message(metaclass=MessageMeta):
             values[key] = value
 
         # Ensure we have all required values, and fill in default values
-        for field in cls.__message_fields__.values():
-            if field.name not in values.keys():
-                if field.required:
-                    raise TypeError(f"__init__() missing argument: '{field.name}'")
-                else:
-                    values[field.name] = field.get_default_value()
+        cls._fill_default_values(values)
 
         # Validate all the values
         for field in cls.__message_fields__.values():
@@ -345,53 +865,415 @@ class Message(metaclass=MessageMeta):
                     f"{field.data_type.description})"
                 )
 
-        # Allocate shared memory for a Cthulhu sample
-        sample = StreamSample()
+        # Preprocess the field values and serialize them into a Cthulhu sample
+        sample = cls._pack_sample(*cls._preprocess_values(values))
 
+        # Bypasses frozen check due to `frozen=True` by calling `__setattr__` on
+        # `object`
+        super().__setattr__("_sample", sample)
+
+    @property
+    def __sample__(self) -> StreamSample:
+        """
+        The Cthulhu sample that backs this message. If the message was embedded in
+        another message, its buffers are copied to a new sample. Raises an error if
+        the message released its sample.
+        """
+        sample = self._sample
+        if sample is None:
+            raise LabgraphError(
+                f"{type(self).__name__} released its sample; create a new message to "
+                "publish its values"
+            )
+        elif type(sample) is EmbeddedSample:
+            sample = type(self)._copy_sample(sample)
+            object.__setattr__(self, "_sample", sample)
+        return sample
+
+    def release(self) -> None:
+        """
+        Decodes and caches every field of the message, then releases its sample so
+        that the sample's shared memory can be reused while the message is alive (e.g.,
+        while it is buffered by a logger or an aligner). The message's fields can
+        still be read, and it can still be compared, copied and embedded in other
+        messages, but it cannot be published; create a new message from its values
+        instead.
+
+        Raises an error if a field is not cached, or if its values can be views of the
+        sample's shared memory.
+        """
+        cls = type(self)
+        for field in cls.__message_fields__.values():
+            if not field.cached or _views_sample(field):
+                raise LabgraphError(
+                    f"{cls.__name__} cannot release its sample: field '{field.name}' "
+                    "is read from the sample"
+                )
+        for name in cls.__field_names__:
+            getattr(self, name)
+        object.__setattr__(self, "_sample", None)
+
+    @classmethod
+    def create_unchecked(cls: Type[M], *args: Any, **kwargs: Any) -> M:
+        """
+        Creates a message without validating the field values. This is faster than
+        calling the message type's constructor, and is meant for hot loops that
+        produce trusted values (e.g., in device source nodes). Values that do not match
+        their field types may be serialized incorrectly or raise errors from `struct`.
+        Missing fields are still filled in with their default values, and
+        `__post_init__` still runs.
+
+        Args:
+            args: Field values, by position.
+            kwargs: Field values, by name.
+        """
+        values = dict(zip(cls.__field_names__, args))
+        if len(kwargs) > 0:
+            values.update(kwargs)
+        if len(values) < len(cls.__field_names__):
+            cls._fill_default_values(values)
+        return cls._from_sample(cls._pack_sample(*cls._preprocess_values(values)))
+
+    @classmethod
+    def build_many(cls: Type[M], columns: Mapping[str, Sequence[Any]]) -> List[M]:
+        """
+        Creates several messages from columns of field values, without validating the
+        values. Each field is preprocessed column by column, and the fixed-length
+        fields of each message are serialized with a single `struct` call. Fields that
+        have no column are filled in with their default values.
+
+        Args:
+            columns:
+                A mapping from field names to sequences of values, all of the same
+                length. NumPy arrays are accepted; for `NumpyType` fields, the array's
+                first axis indexes the messages.
+        """
+        for name in columns.keys():
+            if name not in cls.__message_fields__:
+                raise TypeError(
+                    f"build_many() for {cls.__name__} got an unexpected column '{name}'"
+                )
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(
+                f"build_many() for {cls.__name__} got columns of different lengths: "
+                f"{sorted(lengths)}"
+            )
+        num_messages = lengths.pop() if len(lengths) > 0 else 0
+
+        fixed_columns = [
+            cls._get_column(columns, field, preprocess, num_messages)
+            for field, preprocess in zip(
+                cls.__fixed_fields__, cls.__fixed_preprocessors__
+            )
+        ]
+        dynamic_columns = [
+            cls._get_column(columns, field, preprocess, num_messages)
+            for field, preprocess in zip(
+                cls.__dynamic_fields__, cls.__dynamic_preprocessors__
+            )
+        ]
+        empty_row: Tuple[Any, ...] = ()
+        fixed_rows = (
+            zip(*fixed_columns)
+            if len(fixed_columns) > 0
+            else [empty_row] * num_messages
+        )
+        dynamic_rows = (
+            zip(*dynamic_columns)
+            if len(dynamic_columns) > 0
+            else [empty_row] * num_messages
+        )
+        pool = memoryPool()
+        return [
+            cls._from_sample(cls._pack_sample(fixed_row, dynamic_row, pool))
+            for fixed_row, dynamic_row in zip(fixed_rows, dynamic_rows)
+        ]
+
+    @classmethod
+    def to_records(cls, messages: Sequence["Message"]) -> np.ndarray:
+        """
+        Returns a numpy structured array with a row for each message and a column for
+        each field of this message type, with the `__records_dtype__` of the type.
+
+        Fixed-length fields are copied from the messages' samples in bulk, and hold the
+        serialized values of their field types, as in `as_record` (e.g., the encoded
+        bytes of a `StrType` field). Dynamic-length fields are object columns of the
+        values read from the messages.
+
+        Args:
+            messages:
+                The messages to convert. Messages of another message type are read by
+                field name.
+        """
+        records = np.empty(len(messages), dtype=cls.__records_dtype__)
+        if len(messages) == 0:
+            return records
         if cls.__message_size__ > 0:
-            sample.parameters = memoryPool().getBufferFromPool("", cls.__message_size__)
+            buffers = []
+            fixed_fields = cls.__fixed_fields__
+            preprocessors = cls.__fixed_preprocessors__
+            for message in messages:
+                sample = message._sample
+                source_type = message.__original_message_type__ or type(message)
+                if sample is not None and source_type is cls:
+                    buffers.append(sample.parameters)
+                else:
+                    values = [getattr(message, field.name) for field in fixed_fields]
+                    for i, preprocess in enumerate(preprocessors):
+                        if preprocess is not None:
+                            values[i] = preprocess(values[i])
+                    buffers.append(cls.__struct__.pack(*values))
+            fixed_records = np.frombuffer(b"".join(buffers), dtype=cls.__record_dtype__)
+            for field in fixed_fields:
+                records[field.name] = fixed_records[field.name]
+        for field in cls.__dynamic_fields__:
+            column = records[field.name]
+            for i, message in enumerate(messages):
+                column[i] = getattr(message, field.name)
+        return records
 
-            # Preprocess the fixed-length field values and put them in the correct sequence
-            # for serialization
-            fixed_values = [
-                field.data_type.preprocess(values[field.name])
-                for field in cls.__message_fields__.values()
-                if field.data_type.size is not None
-            ]
+    @classmethod
+    def from_records(cls: Type[M], records: np.ndarray) -> List[M]:
+        """
+        Creates a message for each row of a numpy structured array, without validating
+        the values. The inverse of `to_records`: fixed-length fields are serialized in
+        bulk from columns that hold the serialized values of their field types, and
+        dynamic-length fields are preprocessed from the values in their columns. Fields
+        that have no column are filled in with their default values.
 
-            # Serialize the fixed-length field values
-            fixed_bytes = struct.pack(cls.__format_string__, *fixed_values)
+        Args:
+            records: The structured array, with a column for each field.
+        """
+        names = records.dtype.names or ()
+        for name in names:
+            if name not in cls.__message_fields__:
+                raise TypeError(
+                    f"from_records() for {cls.__name__} got an unexpected column "
+                    f"'{name}'"
+                )
+        for field in cls.__message_fields__.values():
+            if field.name not in names and field.required:
+                raise TypeError(f"from_records() missing column: '{field.name}'")
+        num_messages = len(records)
 
-            # Write the serialized fixed-length field values to shared memory
-            memoryview(sample.parameters)[
-                : cls.__message_size__
-            ] = fixed_bytes  # type: ignore
+        fixed_buffer = memoryview(b"")
+        if cls.__message_size__ > 0:
+            fixed_records = np.zeros(num_messages, dtype=cls.__record_dtype__)
+            for field, preprocess in zip(
+                cls.__fixed_fields__, cls.__fixed_preprocessors__
+            ):
+                if field.name in names:
+                    fixed_records[field.name] = records[field.name]
+                else:
+                    value = field.get_default_value()
+                    if preprocess is not None:
+                        value = preprocess(value)
+                    fixed_records[field.name] = value
+            fixed_buffer = memoryview(fixed_records.tobytes())
+        dynamic_columns = [
+            cls._get_column(
+                {field.name: records[field.name]} if field.name in names else {},
+                field,
+                preprocess,
+                num_messages,
+            )
+            for field, preprocess in zip(
+                cls.__dynamic_fields__, cls.__dynamic_preprocessors__
+            )
+        ]
+
+        pool = memoryPool()
+        size = cls.__message_size__
+        return [
+            cls._from_sample(
+                cls._pack_raw_sample(
+                    fixed_buffer[i * size : (i + 1) * size],
+                    [column[i] for column in dynamic_columns],
+                    pool,
+                )
+            )
+            for i in range(num_messages)
+        ]
 
-        if cls.__num_dynamic_fields__ > 0:
-            # Preprocess the dynamic-length field values
-            dynamic_values = [
-                field.data_type.preprocess(values[field.name])
-                for field in cls.__message_fields__.values()
-                if field.data_type.size is None
+    @classmethod
+    def _get_column(
+        cls,
+        columns: Mapping[str, Sequence[Any]],
+        field: Field[Any],
+        preprocess: Optional[Callable[[Any], Any]],
+        num_messages: int,
+    ) -> Sequence[Any]:
+        """
+        Returns the preprocessed values of a field for `build_many`.
+        """
+        if field.name not in columns:
+            if field.required:
+                raise TypeError(f"build_many() missing column: '{field.name}'")
+            column: Sequence[Any] = [
+                field.get_default_value() for _ in range(num_messages)
             ]
+        else:
+            column = columns[field.name]
+            if isinstance(column, np.ndarray) and not isinstance(
+                field.data_type, NumpyType
+            ):
+                # Unpack scalar columns to Python values in one call
+                column = column.tolist()
+        if preprocess is None:
+            return column
+        return [preprocess(value) for value in column]
 
-            # Allocate shared memory for the dynamic-length field values
-            dynamic_buffers = [
-                memoryPool().getBufferFromPool("", len(value))
-                for value in dynamic_values
-            ]
+    @classmethod
+    def _fill_default_values(cls, values: Dict[str, Any]) -> None:
+        """
+        Adds default values to `values` for the fields that are missing from it.
 
-            # Write the serialized dynamic-length field values to shared memory
-            for value, buffer in zip(dynamic_values, dynamic_buffers):
-                memoryview(buffer)[: len(value)] = value
+        Args:
+            values: A dictionary from field names to values.
+        """
+        for field in cls.__message_fields__.values():
+            if field.name not in values:
+                if field.required:
+                    raise TypeError(f"__init__() missing argument: '{field.name}'")
+                else:
+                    values[field.name] = field.get_default_value()
+
+    @classmethod
+    def _preprocess_values(cls, values: Dict[str, Any]) -> Tuple[List[Any], List[Any]]:
+        """
+        Preprocesses a value for every field, returning the fixed-length and the
+        dynamic-length field values in order.
+
+        Args:
+            values: A dictionary from field names to values.
+        """
+        fixed_values = [values[field.name] for field in cls.__fixed_fields__]
+        for i, preprocess in enumerate(cls.__fixed_preprocessors__):
+            if preprocess is not None:
+                fixed_values[i] = preprocess(fixed_values[i])
+        dynamic_values = [values[field.name] for field in cls.__dynamic_fields__]
+        for i, preprocess in enumerate(cls.__dynamic_preprocessors__):
+            if preprocess is not None:
+                dynamic_values[i] = preprocess(dynamic_values[i])
+        return fixed_values, dynamic_values
+
+    @classmethod
+    def _pack_sample(
+        cls,
+        fixed_values: Sequence[Any],
+        dynamic_values: Sequence[Any],
+        pool: Optional[MemoryPool] = None,
+    ) -> StreamSample:
+        """
+        Allocates shared memory for a Cthulhu sample and serializes preprocessed field
+        values into it.
+
+        Every buffer is requested from the memory pool separately: Cthulhu's IPC
+        memory pool looks up the shared memory of each of a sample's buffers by its
+        exact address when the sample is published, so a buffer that views part of a
+        larger allocation would be copied into new shared memory.
+
+        Args:
+            fixed_values: The preprocessed fixed-length field values, in order.
+            dynamic_values: The preprocessed dynamic-length field values, in order.
+            pool:
+                The memory pool to allocate from. Defaults to the framework's memory
+                pool; pass it in when packing several samples to look it up once.
+        """
+        if pool is None:
+            pool = memoryPool()
+        sample = StreamSample()
+
+        if cls.__message_size__ > 0:
+            parameters = pool.getBufferFromPool("", cls.__message_size__)
+
+            # Serialize the fixed-length field values directly into shared memory
+            cls.__struct__.pack_into(parameters, 0, *fixed_values)
+            sample.parameters = parameters
+
+        if cls.__num_dynamic_fields__ > 0:
+            # Allocate shared memory for the dynamic-length field values, and write
+            # the serialized values to it
+            get_buffer = pool.getBufferFromPool
+            dynamic_buffers = []
+            for value in dynamic_values:
+                buffer = get_buffer("", len(value))
+                memoryview(buffer)[:] = value
+                dynamic_buffers.append(buffer)
 
             # Set the sample's dynamic parameters
-            if len(dynamic_buffers) > 0:
-                sample.dynamicParameters = dynamic_buffers
+            sample.dynamicParameters = dynamic_buffers
 
-        # Bypasses frozen check due to `frozen=True` by calling `__setattr__` on
-        # `object`
-        super().__setattr__("__sample__", sample)
+        return sample
+
+    @classmethod
+    def _copy_sample(cls, source: Any) -> StreamSample:
+        """
+        Copies the buffers of an object with a sample's attributes (e.g., an
+        `EmbeddedSample`) to a new Cthulhu sample of this message type.
+
+        Args:
+            source: The object whose buffers to copy.
+        """
+        return cls._pack_raw_sample(
+            source.parameters if cls.__message_size__ > 0 else b"",
+            source.dynamicParameters if cls.__num_dynamic_fields__ > 0 else (),
+        )
+
+    @classmethod
+    def _pack_raw_sample(
+        cls,
+        parameters: Any,
+        dynamic_values: Sequence[Any],
+        pool: Optional[MemoryPool] = None,
+    ) -> StreamSample:
+        """
+        Allocates shared memory for a Cthulhu sample and copies already serialized
+        fields into it.
+
+        Args:
+            parameters: The serialized fixed-length fields.
+            dynamic_values: The preprocessed dynamic-length field values, in order.
+            pool:
+                The memory pool to allocate from. Defaults to the framework's memory
+                pool.
+        """
+        if pool is None:
+            pool = memoryPool()
+        sample = StreamSample()
+        if cls.__message_size__ > 0:
+            buffer = pool.getBufferFromPool("", cls.__message_size__)
+            memoryview(buffer)[:] = parameters
+            sample.parameters = buffer
+        if cls.__num_dynamic_fields__ > 0:
+            dynamic_buffers = []
+            for value in dynamic_values:
+                buffer = pool.getBufferFromPool("", len(value))
+                memoryview(buffer)[:] = value
+                dynamic_buffers.append(buffer)
+            sample.dynamicParameters = dynamic_buffers
+        return sample
+
+    @classmethod
+    def _from_sample(
+        cls: Type[M],
+        sample: StreamSample,
+        original_message_type: Optional[Type["Message"]] = None,
+    ) -> M:
+        """
+        Creates a message of this type backed by `sample`, then runs `__post_init__`.
+
+        Args:
+            sample: The Cthulhu sample to back the message.
+            original_message_type:
+                The message type that produced `sample`, if it is not this type.
+        """
+        message = cls.__new__(cls)
+        object.__setattr__(message, "__original_message_type__", original_message_type)
+        object.__setattr__(message, "_sample", sample)
+        message.__post_init__()
+        return message
 
     def asdict(self) -> "OrderedDict[str, Any]":
         """
@@ -420,75 +1302,159 @@ class Message(metaclass=MessageMeta):
         """
         return cls(**data)
 
-    def replace(self: M, **kwargs: Dict[str, Any]) -> M:
+    def replace(self: M, **kwargs: Any) -> M:
         """
         Returns a new message with the fields replaced by the provided keyword
         arguments.
+
+        Only the replaced fields are serialized: the new message's fixed-length fields
+        are copied from this message's sample before the replaced ones are packed over
+        them, and the new message shares the buffers of the dynamic-length fields that
+        are not replaced with this message.
         """
-        values = self.asdict()
-        values.update(kwargs)
-        return self.__class__(**values)
+        cls = type(self)
+        if self._sample is None or not self._has_native_sample():
+            values = self.asdict()
+            values.update(kwargs)
+            return cls(**values)
 
-    def __getstate__(self) -> Dict[str, Any]:
-        return self.asdict()
+        for key, value in kwargs.items():
+            field = cls.__message_fields__.get(key)
+            if field is None:
+                raise TypeError(
+                    f"replace() for {cls.__name__} got an unexpected keyword argument "
+                    f"'{key}'"
+                )
+            if not field.data_type.isinstance(value):
+                raise TypeError(
+                    f"replace() for {cls.__name__} got invalid value for argument "
+                    f"'{key}': {value} (expected a {field.data_type.description})"
+                )
 
-    def __setstate__(self, state: Dict[str, Any]) -> None:
-        self.__class__.__init__(self, **state)
+        pool = memoryPool()
+        old_sample = self.__sample__
+        sample = StreamSample()
 
-    def __getattribute__(self, name: str) -> Any:
-        all_fields = super().__getattribute__("__class__").__message_fields__
-        if name not in all_fields:
-            return super().__getattribute__(name)
-        cls = type(self)
-        field = all_fields[name]
+        if cls.__message_size__ > 0:
+            parameters = pool.getBufferFromPool("", cls.__message_size__)
+            memoryview(parameters)[:] = memoryview(old_sample.parameters)
+            for accessor in cls.__field_accessors__:
+                if accessor.name not in kwargs or accessor.field.data_type.size is None:
+                    continue
+                # Fixed-length fields are packed with their accessors' compiled structs
+                accessor.encode_into(parameters, kwargs[accessor.name])  # type: ignore
+            sample.parameters = parameters
 
-        # Use __original_message__ if necessary
-        if not isinstance(self.__original_message__, IsOriginalMessage):
-            message_cls = self.__original_message_type__
-            if message_cls is None or message_cls is cls:
-                super().__setattr__("__original_message__", IsOriginalMessage())
-            else:
-                if self.__original_message__ is None:
-                    super().__setattr__(
-                        "__original_message__", message_cls(__sample__=self.__sample__)
-                    )
-                original_field_name = list(message_cls.__message_fields__.items())[
-                    cls._index_of_field(name)
-                ][0]
-                result = getattr(self.__original_message__, original_field_name)
-                if not field.data_type.isinstance(result):
-                    raise LabgraphError(
-                        f"Could not convert from {message_cls.__name__}."
-                        f"{original_field_name} to {cls.__name__}.{name}: invalid "
-                        f"value {result}"
-                    )
-                return result
-
-        if field.data_type.size is None:
-            # Dynamic field
-            field_buffer = bytearray(self.__sample__.dynamicParameters[field.offset])
-            return field.data_type.postprocess(field_buffer)
-        elif isinstance(field.data_type, StructType):
-            field_memoryview = memoryview(self.__sample__.parameters)[
-                field.offset : field.offset + field.data_type.size
+        if cls.__num_dynamic_fields__ > 0:
+            old_dynamic_parameters = old_sample.dynamicParameters
+            dynamic_buffers = [
+                old_dynamic_parameters[i] for i in range(cls.__num_dynamic_fields__)
             ]
-            return field.data_type.postprocess(
-                struct.unpack(
-                    DEFAULT_BYTE_ORDER.value + field.data_type.format_string,
-                    field_memoryview,
-                )[0]
-            )
-        else:
-            raise NotImplementedError(
-                f"Unexpected field type {field.data_type.__class__}"
-            )
+            for key, value in kwargs.items():
+                field = cls.__message_fields__[key]
+                if field.data_type.size is None:
+                    value = field.data_type.preprocess(value)
+                    buffer = pool.getBufferFromPool("", len(value))
+                    memoryview(buffer)[:] = value
+                    dynamic_buffers[field.offset] = buffer
+            sample.dynamicParameters = dynamic_buffers
+
+        return cls._from_sample(sample)
+
+    def copy(self: M) -> M:
+        """
+        Returns a copy of the message. Messages are immutable, so the copy shares this
+        message's shared memory (or, if it was released, its field values) rather than
+        copying it.
+        """
+        if self._sample is None:
+            message = object.__new__(type(self))
+            object.__setattr__(message, "_sample", None)
+            object.__setattr__(message, "__original_message_type__", None)
+            message.__dict__.update(self.__dict__)
+            return message
+        return type(self)._from_sample(self.__sample__, self.__original_message_type__)
+
+    __copy__ = copy
+
+    def as_record(self) -> np.ndarray:
+        """
+        Returns a read-only, zero-dimensional numpy structured array over the message's
+        fixed-length fields, without copying them. The array's dtype is the
+        `__record_dtype__` of the message type that produced the message's sample.
+        """
+        message_type = self.__original_message_type__ or type(self)
+        if message_type.__message_size__ == 0:
+            return np.zeros((), dtype=message_type.__record_dtype__)
+        record = np.frombuffer(
+            self.__sample__.parameters, dtype=message_type.__record_dtype__, count=1
+        ).reshape(())
+        record.flags.writeable = False
+        return record
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.asdict()
+        for name, value in state.items():
+            if isinstance(value, memoryview):
+                # e.g., a `BytesViewType` field, whose views cannot be pickled
+                state[name] = value.tobytes()
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__class__.__init__(self, **state)
 
     def __eq__(self, other: Any) -> bool:
+        """
+        Returns true if the other message is of an equivalent type and has the same
+        field values.
+
+        Two messages of the same type are compared by their serialized fields, byte for
+        byte, without decoding them. So values compare equal if they serialize the
+        same, rather than if they are `==`: a NaN float is equal to the same NaN, 0.0
+        is not equal to -0.0, and dictionaries with the same items in different
+        insertion orders are not equal. Messages of equivalent but distinct types,
+        messages that released their samples, and messages whose samples were produced
+        by another message type are compared by their decoded field values instead.
+        """
         if not isinstance(other, Message):
             raise NotImplementedError()
         if type(self) != type(other):
             return False
-        return self.asdict() == other.asdict()
+        # Compare embedded messages' buffers in place rather than copying them
+        sample = self._sample
+        other_sample = other._sample
+        if (
+            # Equivalent message types (see `MessageMeta.__eq__`) can serialize the
+            # same values differently
+            type(self) is not type(other)
+            or sample is None
+            or other_sample is None
+            or not self._has_native_sample()
+            or not other._has_native_sample()
+        ):
+            return self.asdict() == other.asdict()
+
+        cls = type(self)
+        if cls.__message_size__ > 0:
+            if not _buffers_equal(sample.parameters, other_sample.parameters):
+                return False
+        if cls.__num_dynamic_fields__ > 0:
+            dynamic_parameters = sample.dynamicParameters
+            other_dynamic_parameters = other_sample.dynamicParameters
+            for i in range(cls.__num_dynamic_fields__):
+                if not _buffers_equal(
+                    dynamic_parameters[i], other_dynamic_parameters[i]
+                ):
+                    return False
+        return True
+
+    def _has_native_sample(self) -> bool:
+        """
+        Returns true if this message's sample was produced by this message's type,
+        rather than by another (but connectable) message type.
+        """
+        original_message_type = self.__original_message_type__
+        return original_message_type is None or original_message_type is type(self)
 
 
 class TimestampedMessage(Message):
@@ -499,3 +1465,106 @@ class TimestampedMessage(Message):
 
     # Convention: units of seconds.
     timestamp: float
+
+
+class EmbeddedSample:
+    """
+    The buffers of a message that is embedded in a field of another message, viewing
+    the shared memory of the other message's sample. Provides the attributes of a
+    Cthulhu sample that field accessors read.
+
+    Args:
+        parameters: The fixed-length fields of the embedded message.
+        dynamic_parameters: The dynamic-length fields of the embedded message.
+    """
+
+    __slots__ = ("parameters", "dynamicParameters")
+
+    def __init__(
+        self, parameters: memoryview, dynamic_parameters: List[memoryview]
+    ) -> None:
+        self.parameters = parameters
+        self.dynamicParameters = dynamic_parameters
+
+
+# Header of a `MessageFieldType` field: magic and the type ID of the message
+EMBEDDED_MESSAGE_HEADER = struct.Struct("<2sQ")
+EMBEDDED_MESSAGE_MAGIC = b"\x93M"
+
+
+class MessageFieldType(DynamicType[M]):
+    """
+    Represents a field whose values are Labgraph messages. A message is serialized as
+    the raw buffers of its sample, prefixed by the type ID of the message's type so
+    that messages of subclasses can be decoded. Decoded messages view the buffers, and
+    decode their own fields when they are read.
+
+    Args:
+        type_: The message type of the field.
+    """
+
+    type_: Type[M]
+
+    def __init__(self, type_: Type[M]) -> None:
+        self.type_ = type_
+
+    @property
+    def python_type(self) -> type:
+        return self.type_
+
+    def isinstance(self, obj: Any) -> bool:
+        return isinstance(obj, self.type_)
+
+    def preprocess(self, message: M) -> bytes:
+        cls = type(message)
+        parts = [EMBEDDED_MESSAGE_HEADER.pack(EMBEDDED_MESSAGE_MAGIC, cls.__type_id__)]
+        sample = message._sample
+        if sample is not None and message._has_native_sample():
+            if cls.__message_size__ > 0:
+                parts.append(sample.parameters)
+            dynamic_parameters = sample.dynamicParameters
+            dynamic_values = [
+                dynamic_parameters[i] for i in range(cls.__num_dynamic_fields__)
+            ]
+        else:
+            # A released message has every field's value in its instance dictionary
+            values = message.__dict__ if sample is None else message.asdict()
+            fixed_values, dynamic_values = cls._preprocess_values(values)
+            if cls.__message_size__ > 0:
+                parts.append(cls.__struct__.pack(*fixed_values))
+        for value in dynamic_values:
+            parts.append(LEN_PREFIX.pack(memoryview(value).nbytes))
+            parts.append(value)
+        return b"".join(parts)
+
+    def postprocess(self, obj_bytes: Any) -> M:
+        buffer = memoryview(obj_bytes).cast("B")
+        if buffer[: len(EMBEDDED_MESSAGE_MAGIC)] != EMBEDDED_MESSAGE_MAGIC:
+            # Messages were serialized as dataclasses before `MessageFieldType`
+            return DataclassType(self.type_).postprocess(bytes(buffer))
+        _, type_id = EMBEDDED_MESSAGE_HEADER.unpack_from(buffer)
+        message_type = _MESSAGE_TYPES_BY_ID.get(type_id)
+        if message_type is None:
+            raise LabgraphError(
+                f"Could not find a message type with type ID {type_id} for a "
+                f"{self.type_.__name__} field"
+            )
+        curr = EMBEDDED_MESSAGE_HEADER.size
+        parameters = buffer[curr : curr + message_type.__message_size__]
+        curr += message_type.__message_size__
+        dynamic_parameters = []
+        for _ in range(message_type.__num_dynamic_fields__):
+            (length,) = LEN_PREFIX.unpack_from(buffer, curr)
+            curr += LEN_PREFIX.size
+            dynamic_parameters.append(buffer[curr : curr + length])
+            curr += length
+        return message_type._from_sample(  # type: ignore
+            EmbeddedSample(parameters, dynamic_parameters)
+        )
+
+    def postprocess_buffer(self, buffer: Any) -> M:
+        return self.postprocess(buffer)
+
+    @property
+    def description(self) -> str:
+        return f"{self.type_}"
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# Copyright 2004-present Facebook. All Rights Reserved.
+
+import pickle
+from enum import Enum
+from typing import List
+
+import numpy as np
+import pytest
+
+from ..batch import MessageBatch
+from ..message import Message
+from ..types import NumpyType, StrType
+
+
+class MyIntEnum(int, Enum):
+    A = 1
+    B = 2
+
+
+class MyBatchedMessage(Message):
+    """
+    Message type with fixed-length and dynamic-length fields for testing batches.
+    """
+
+    timestamp: float
+    counter: int
+    enum_field: MyIntEnum
+    name: StrType(length=8)  # type: ignore
+    data: NumpyType(shape=(2, 3), dtype=np.float32)  # type: ignore
+    label: str
+    values: List[int]
+
+
+def make_messages(count: int) -> List[MyBatchedMessage]:
+    return [
+        MyBatchedMessage(
+            timestamp=float(i),
+            counter=i,
+            enum_field=MyIntEnum.A if i % 2 == 0 else MyIntEnum.B,
+            name=f"name{i}",
+            data=np.full((2, 3), i, dtype=np.float32),
+            label=f"label{i}",
+            values=list(range(i)),
+        )
+        for i in range(count)
+    ]
+
+
+def assert_messages_equal(
+    messages1: List[MyBatchedMessage], messages2: List[MyBatchedMessage]
+) -> None:
+    assert len(messages1) == len(messages2)
+    for message1, message2 in zip(messages1, messages2):
+        assert type(message1) is type(message2)
+        for name, value in message1.asdict().items():
+            assert np.array_equal(value, getattr(message2, name))
+
+
+def test_batch_type() -> None:
+    """
+    Tests that batch types are created once per message type, with a column for each
+    field.
+    """
+    batch_type = MessageBatch[MyBatchedMessage]
+    assert batch_type is MessageBatch[MyBatchedMessage]
+    assert issubclass(batch_type, MessageBatch)
+    assert batch_type.__batch_message_type__ is MyBatchedMessage
+    assert batch_type.__field_names__ == MyBatchedMessage.__field_names__
+    assert batch_type.__num_dynamic_fields__ == len(MyBatchedMessage.__field_names__)
+
+
+def test_batch_columns() -> None:
+    """
+    Tests that fixed-length fields are stored as numpy columns and dynamic-length
+    fields as lists.
+    """
+    messages = make_messages(4)
+    batch = MessageBatch[MyBatchedMessage].from_messages(messages)
+    assert len(batch) == 4
+    assert np.array_equal(batch.timestamp, np.arange(4, dtype=np.float64))
+    assert np.array_equal(batch.counter, np.arange(4))
+    assert batch.enum_field.tolist() == [1, 2, 1, 2]
+    assert batch.name.tolist() == [b"name0", b"name1", b"name2", b"name3"]
+    assert batch.data.shape == (4, 2, 3)
+    assert batch.data.dtype == np.float32
+    assert batch.label == ["label0", "label1", "label2", "label3"]
+    assert batch.values == [[], [0], [0, 1], [0, 1, 2]]
+
+
+def test_batch_rows() -> None:
+    """
+    Tests that rows of a batch read the same values as the original messages.
+    """
+    messages = make_messages(3)
+    batch = MessageBatch[MyBatchedMessage].from_messages(messages)
+    rows = list(batch)
+    assert len(rows) == 3
+    for row, message in zip(rows, messages):
+        assert row.timestamp == message.timestamp
+        assert row.counter == message.counter
+        assert row.enum_field is message.enum_field
+        assert row.name == message.name
+        assert np.array_equal(row.data, message.data)
+        assert row.label == message.label
+        assert row.values == message.values
+    with pytest.raises(AttributeError):
+        rows[0].missing_field
+
+
+def test_batch_to_messages() -> None:
+    """
+    Tests that a batch converts back to the messages it was created from.
+    """
+    messages = make_messages(3)
+    batch = MessageBatch[MyBatchedMessage].from_messages(messages)
+    assert_messages_equal(batch.to_messages(), messages)
+    assert MessageBatch[MyBatchedMessage].from_messages([]).to_messages() == []
+
+
+def test_batch_from_columns() -> None:
+    """
+    Tests that a batch can be created from columns, and that columns must have the same
+    length.
+    """
+    batch_type = MessageBatch[MyBatchedMessage]
+    batch = batch_type(
+        timestamp=np.zeros(2),
+        counter=np.arange(2),
+        enum_field=np.array([1, 2]),
+        name=np.array([b"a", b"b"]),
+        data=np.zeros((2, 2, 3)),
+        label=["a", "b"],
+        values=[[1], [2]],
+    )
+    assert [row.enum_field for row in batch] == [MyIntEnum.A, MyIntEnum.B]
+    assert [row.name for row in batch] == ["a", "b"]
+    with pytest.raises(ValueError):
+        batch_type(
+            timestamp=np.zeros(2),
+            counter=np.arange(3),
+            enum_field=np.array([1, 2]),
+            name=np.array([b"a", b"b"]),
+            data=np.zeros((2, 2, 3)),
+            label=["a", "b"],
+            values=[[1], [2]],
+        )
+
+
+def test_batch_pickle() -> None:
+    """
+    Tests that batches can be pickled even though batch types are created dynamically.
+    """
+    batch = MessageBatch[MyBatchedMessage].from_messages(make_messages(2))
+    unpickled = pickle.loads(pickle.dumps(batch))
+    assert type(unpickled) is type(batch)
+    assert_messages_equal(unpickled.to_messages(), batch.to_messages())
@@ -3,15 +3,55 @@
 
 # Unit tests for the Message class.
 
+import copy
+import dataclasses
+import pickle
+import struct
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, List
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple, Union
+from unittest.mock import patch
 
 import numpy as np
 import pytest
 
-from ..message import Message
-from ..types import NumpyDynamicType, NumpyType
+from ...util.error import LabgraphError
+from .. import message as message_module
+from ..message import (
+    DynamicFieldAccessor,
+    EmbeddedSample,
+    FixedFieldAccessor,
+    Message,
+    MessageFieldType,
+)
+from ..types import (
+    COMPRESSED_HEADER,
+    BytesView,
+    BytesViewType,
+    Compressed,
+    CompressedType,
+    DataclassType,
+    IntType,
+    ListType,
+    MessageLayout,
+    NumpyDynamicType,
+    NumpyType,
+    ObjectDynamicType,
+    OptionalDynamicType,
+    OptionalType,
+    StrEnumType,
+    StrType,
+    StrView,
+    StrViewType,
+    TupleDynamicType,
+    TupleType,
+    UnionDynamicType,
+    UnionType,
+    get_field_type,
+    get_len_bytes,
+    get_packed_value,
+)
 
 
 NUMPY_SHAPE = (10, 10)
@@ -112,6 +152,15 @@ class MyNumpyMessage4(Message):
     field3: int
 
 
+class MyZeroCopyNumpyMessage(Message):
+    """
+    Simple message type with a zero-copy numpy field for testing numpy views.
+    """
+
+    field1: int
+    field2: NumpyType(shape=NUMPY_SHAPE, dtype=np.float64, zero_copy=True)  # type: ignore
+
+
 class MyDynamicNumpyMessage(Message):
     """
     Simple message type with a dynamic numpy field for testing serialization and type
@@ -149,10 +198,133 @@ class MyDataclass:
     sub_field1: int
 
 
+class MyListMessage(Message):
+    """
+    Message type with lists of primitive and non-primitive types.
+    """
+
+    field1: List[float]
+    field2: List[bool]
+    field3: List[str]
+    field4: List[List[int]]
+    field5: Dict[str, List[float]]
+
+
+@dataclass
+class MyNestedDataclass:
+    sub_field1: float
+    sub_field2: str
+    sub_field3: MyDataclass
+    sub_field4: List[int] = dataclasses.field(default_factory=list)
+    sub_field5: bool = dataclasses.field(default=False, init=False)
+
+
+@dataclass
+class MyDataclassSubclass(MyDataclass):
+    sub_field2: str
+
+
 class MyDataclassMessage(Message):
     field1: MyDataclass
 
 
+class MyNestedDataclassMessage(Message):
+    field1: MyNestedDataclass
+    field2: MyStrEnum
+
+
+class MyUncachedMessage(Message):
+    """
+    Message type with a field that opts out of caching.
+    """
+
+    field1: List[int]
+    field2: List[int] = dataclasses.field(
+        default_factory=list, metadata={"cache": False}
+    )
+
+
+class MyObject:
+    def __init__(self, array: np.ndarray, small_array: np.ndarray) -> None:
+        self.array = array
+        self.small_array = small_array
+
+
+class MyObjectMessage(Message):
+    """
+    Message type with an arbitrary object field.
+    """
+
+    field1: MyObject
+
+
+class MyZeroCopyObjectMessage(Message):
+    """
+    Message type with an object field whose large buffers are read without copying.
+    """
+
+    field1: ObjectDynamicType(zero_copy=True)  # type: ignore
+
+
+class MyTypingMessage(Message):
+    """
+    Message type with `typing` constructs that have native field types.
+    """
+
+    field1: Optional[float]
+    field2: Optional[List[int]]
+    field3: Tuple[int, float, bool]
+    field4: Tuple[int, str]
+    field5: Union[int, bool, float]
+    field6: Union[int, str, None]
+
+
+class MyNativeMessage(Message, layout="native"):
+    """
+    Message type with the native layout for testing aligned fields.
+    """
+
+    field1: bool
+    field2: float
+    field3: StrType(length=3)  # type: ignore
+    field4: NumpyType(shape=(2, 2), dtype=np.float32, zero_copy=True)  # type: ignore
+    field5: int
+    field6: str
+
+
+class MyNativeSubclassMessage(MyNativeMessage):
+    field7: bool
+
+
+class MyCompressedMessage(Message):
+    """
+    Message type with compressed fields.
+    """
+
+    field1: Compressed[bytes]  # type: ignore
+    field2: Compressed[np.ndarray, 9]  # type: ignore
+    field3: Compressed[List[int]]  # type: ignore
+    field4: Compressed[float]  # type: ignore
+
+
+class MyEmbeddingMessage(Message):
+    """
+    Message type with fields that hold other messages.
+    """
+
+    field1: MyMessage
+    field2: List[MyMessage]
+
+
+class MyViewMessage(Message):
+    """
+    Message type with bytes and string fields that are read as views.
+    """
+
+    field1: BytesView
+    field2: StrView
+
+
 class MyInvalidDefaultMessage(Message):
     """
     Message type with an invalid default value for testing this error case.
@@ -289,6 +461,99 @@ def test_equality() -> None:
     assert message1 != message3
 
 
+def test_buffer_equality() -> None:
+    """
+    Tests that messages with numpy and dynamic-length fields are compared by their
+    serialized fields.
+    """
+    array = np.random.rand(*NUMPY_SHAPE)
+    message1 = MyDynamicNumpyMessage(field1="hello", field2=array, field3=5)
+    message2 = MyDynamicNumpyMessage(field1="hello", field2=array.copy(), field3=5)
+    message3 = MyDynamicNumpyMessage(field1="hello", field2=array + 1, field3=5)
+    assert message1 == message2
+    assert message1 != message3
+    message4 = MyNumpyMessage(field1="hello", field2=array, field3=5)
+    assert message4 == MyNumpyMessage(field1="hello", field2=array, field3=5)
+    assert message4 != MyNumpyMessage(field1="hello", field2=array, field3=6)
+
+
+def test_byte_wise_equality() -> None:
+    """
+    Tests that messages of the same type are equal if their fields serialize to the
+    same bytes, even where the decoded values compare differently.
+    """
+    nan = float("nan")
+    assert MyMessage(1, "a", nan, True, b"") == MyMessage(1, "a", nan, True, b"")
+    assert MyMessage(1, "a", 0.0, True, b"") != MyMessage(1, "a", -0.0, True, b"")
+    message1 = MyDynamicMessage(field1={"a": 1, "b": 2}, field2=1, field3=[])
+    message2 = MyDynamicMessage(field1={"b": 2, "a": 1}, field2=1, field3=[])
+    assert message1.field1 == message2.field1
+    assert message1 != message2
+    assert message1 == MyDynamicMessage(field1={"a": 1, "b": 2}, field2=1, field3=[])
+
+
+def test_replace() -> None:
+    """
+    Tests that we can replace fixed-length and dynamic-length fields of a message,
+    leaving the other fields and the original message unchanged.
+    """
+    array = np.random.rand(*NUMPY_SHAPE)
+    message = MyNumpyMessage(field1="hello", field2=array, field3=5)
+    replaced = message.replace(field3=6)
+    assert replaced.field1 == "hello"
+    assert (replaced.field2 == array).all()
+    assert replaced.field3 == 6
+    assert message.field3 == 5
+    assert replaced == MyNumpyMessage(field1="hello", field2=array, field3=6)
+
+    replaced = message.replace(field1="world", field2=array + 1)
+    assert replaced.field1 == "world"
+    assert (replaced.field2 == array + 1).all()
+    assert replaced.field3 == 5
+    assert message.field1 == "hello"
+    assert (message.field2 == array).all()
+
+    with pytest.raises(TypeError):
+        message.replace(field4=1)
+    with pytest.raises(TypeError):
+        message.replace(field3="hello")
+
+
+def test_replace_converted() -> None:
+    """
+    Tests that we can replace fields of a message whose sample was produced by a
+    different message type.
+    """
+    array = np.random.rand(*NUMPY_SHAPE)
+    message1 = MyNumpyMessage(field1="hello", field2=array, field3=5)
+    message2 = MyDynamicNumpyMessage(
+        __sample__=message1.__sample__, __original_message_type__=MyNumpyMessage
+    )
+    replaced = message2.replace(field3=6)
+    assert replaced.__original_message_type__ is None
+    assert replaced.field1 == "hello"
+    assert (replaced.field2 == array).all()
+    assert replaced.field3 == 6
+
+
+def test_copy() -> None:
+    """
+    Tests that copies of messages share the messages' samples.
+    """
+    message = MyMessage(
+        int_field=5,
+        str_field="hello",
+        float_field=5.0,
+        bool_field=True,
+        bytes_field=b"world",
+    )
+    for message_copy in (message.copy(), copy.copy(message)):
+        assert type(message_copy) is MyMessage
+        assert message_copy is not message
+        assert message_copy.__sample__ is message.__sample__
+        assert message_copy == message
+
+
 def test_fromdict() -> None:
     """
     Tests that we can deserialize a message from a dictionary.
@@ -328,6 +593,24 @@ def test_numpy() -> None:
     assert message.field3 == 3
 
 
+def test_numpy_zero_copy() -> None:
+    """
+    Tests that zero-copy numpy fields are read as read-only views over the message's
+    shared memory.
+    """
+
+    arr = np.random.rand(*NUMPY_SHAPE)
+    message = MyZeroCopyNumpyMessage(field1=5, field2=arr)
+    view = message.field2
+    assert (view == arr).all()
+    assert not view.flags.writeable
+    assert not view.flags.owndata
+    with pytest.raises(ValueError):
+        view[0, 0] = 1.0
+    del message
+    assert (view == arr).all()
+
+
 def test_invalid_field_error() -> None:
     """
     Tests that setting an invalid field value on a message raises a `TypeError`.
@@ -404,6 +687,68 @@ def test_dynamic_numpy_field_with_type() -> None:
     assert message.field3 == 5
 
 
+def test_dynamic_numpy_field_layouts() -> None:
+    """
+    Tests that dynamic numpy fields round-trip arrays with different layouts and
+    dtypes.
+    """
+    arrays = [
+        np.asfortranarray(np.random.rand(3, 4)),
+        np.arange(20, dtype=np.int32)[::2],
+        np.array(5, dtype=">i4"),
+        np.zeros((0, 3)),
+        np.zeros(3, dtype=[("a", "<f4"), ("b", "S3")]),
+    ]
+    for array in arrays:
+        message = MyDynamicNumpyMessage(field1="hello", field2=array, field3=5)
+        assert message.field2.dtype == array.dtype
+        assert message.field2.shape == array.shape
+        assert (message.field2 == array).all()
+
+
+def test_dynamic_numpy_field_writable() -> None:
+    """
+    Tests that decoded dynamic numpy arrays are writable copies unless the field opts
+    in to zero-copy reads, which return read-only views of the message's shared memory.
+    """
+    array = np.random.rand(3, 4)
+    message = MyDynamicNumpyMessage(field1="hello", field2=array, field3=5)
+    decoded = message.field2
+    decoded[0, 0] = -1.0
+    assert message.field2[0, 0] == -1.0
+    assert MyDynamicNumpyMessage(__sample__=message.__sample__).field2[0, 0] == (
+        array[0, 0]
+    )
+
+    field_type = NumpyDynamicType(zero_copy=True)
+    buffer = field_type.preprocess(array)
+    view = field_type.postprocess_buffer(buffer)
+    assert np.array_equal(view, array)
+    assert not view.flags.writeable
+    assert np.shares_memory(view, np.frombuffer(buffer, dtype=np.uint8))
+
+
+def test_dynamic_numpy_legacy_format() -> None:
+    """
+    Tests that dynamic numpy fields serialized with `np.save` (e.g., in existing HDF5
+    logs) can still be decoded.
+    """
+    array = np.random.randint(5, size=(3, 3), dtype=np.int16)
+    dtype_bytes = pickle.dumps(array.dtype)
+    buf = BytesIO()
+    np.save(buf, array)
+    array_bytes = buf.getvalue()
+    legacy_bytes = (
+        get_len_bytes(dtype_bytes)
+        + dtype_bytes
+        + get_len_bytes(array_bytes)
+        + array_bytes
+    )
+    decoded = NumpyDynamicType().postprocess(legacy_bytes)
+    assert decoded.dtype == array.dtype
+    assert (decoded == array).all()
+
+
 def test_static_to_dynamic_conversion() -> None:
     """
     Tests that we can convert a static field to a dynamic field between equivalent
@@ -434,6 +779,38 @@ def test_dynamic_to_static_conversion() -> None:
     assert message2.field3 == 5
 
 
+def test_conversion_plan() -> None:
+    """
+    Tests that the plan for converting between message types is built once, and only
+    checks values of fields whose types differ.
+    """
+    plan = MyDynamicNumpyMessage._get_conversion_plan(MyNumpyMessage)
+    assert plan is MyDynamicNumpyMessage._get_conversion_plan(MyNumpyMessage)
+    assert [source_accessor.name for source_accessor, _ in plan] == [
+        "field1",
+        "field2",
+        "field3",
+    ]
+    assert plan[0][1] is None
+    assert plan[1][1] is not None
+    assert plan[2][1] is None
+
+
+def test_invalid_conversion() -> None:
+    """
+    Tests that reading a converted field raises an error when the original value is
+    invalid for the field.
+    """
+    array = np.random.rand(*NUMPY_SHAPE)
+    message1 = MyNumpyMessage(field1="hello", field2=array, field3=5)
+    message2 = MyNumpyMessage4(
+        __sample__=message1.__sample__, __original_message_type__=MyNumpyMessage
+    )
+    assert message2.field1 == "hello"
+    with pytest.raises(LabgraphError):
+        message2.field2
+
+
 def test_dynamic_fields() -> None:
     """
     Tests that we can serialize some more dynamic field types.
@@ -447,6 +824,55 @@ def test_dynamic_fields() -> None:
     assert message.field3 == field3
 
 
+def test_list_fields() -> None:
+    """
+    Tests that we can serialize lists as typed arrays and as individual items.
+    """
+    field1 = [1.0, 2.5, -3.0]
+    field2 = [True, False, True]
+    field3 = ["a", "", "bc"]
+    field4 = [[1, 2], [], [2 ** 62]]
+    field5 = {"a": [1.0], "b": []}
+    message = MyListMessage(
+        field1=field1, field2=field2, field3=field3, field4=field4, field5=field5
+    )
+    assert message.field1 == field1
+    assert message.field2 == field2
+    assert message.field3 == field3
+    assert message.field4 == field4
+    assert message.field5 == field5
+
+
+def test_list_invalid_items() -> None:
+    """
+    Tests that lists of ints and floats with items of other types are not coerced to
+    typed arrays, and that a list of bools is encoded like the items would be.
+    """
+    with pytest.raises(struct.error):
+        ListType(int).preprocess([1.5])
+    with pytest.raises(struct.error):
+        ListType(float).preprocess([None])  # type: ignore
+    field_type = ListType(bool)
+    assert field_type.postprocess(field_type.preprocess([2])) == [True]  # type: ignore
+    assert ListType(float).postprocess(ListType(float).preprocess([1, 2.5])) == [
+        1.0,
+        2.5,
+    ]
+
+
+def test_list_legacy_format() -> None:
+    """
+    Tests that lists serialized with decimal length prefixes (e.g., in existing HDF5
+    logs) can still be decoded.
+    """
+    field_type = ListType(int)
+    items = [get_packed_value(field_type._sub_type, item) for item in (5, 6)]
+    legacy_bytes = get_len_bytes(items) + b"".join(
+        get_len_bytes(item) + item for item in items
+    )
+    assert field_type.postprocess(legacy_bytes) == [5, 6]
+
+
 def test_dataclass_fields() -> None:
     """
     Tests that we can serialize some more dynamic field types.
@@ -456,6 +882,593 @@ def test_dataclass_fields() -> None:
     assert message.field1 == field1
 
 
+def test_nested_dataclass_fields() -> None:
+    """
+    Tests that dataclasses with nested dataclass, list and non-init fields round-trip.
+    """
+    field1 = MyNestedDataclass(
+        sub_field1=1.5,
+        sub_field2="hello",
+        sub_field3=MyDataclass(sub_field1=7),
+        sub_field4=[1, 2, 3],
+    )
+    field1.sub_field5 = True
+    message = MyNestedDataclassMessage(field1=field1, field2=MyStrEnum.B)
+    assert message.field1 == field1
+    assert message.field1.sub_field5 is True
+    assert message.field2 is MyStrEnum.B
+
+
+def test_dataclass_subclass_field() -> None:
+    """
+    Tests that instances of subclasses of a dataclass field's type are decoded as the
+    subclass.
+    """
+    field1 = MyDataclassSubclass(sub_field1=7, sub_field2="hello")
+    message = MyDataclassMessage(field1=field1)
+    assert type(message.field1) is MyDataclassSubclass
+    assert message.field1 == field1
+
+
+def test_dataclass_and_enum_legacy_format() -> None:
+    """
+    Tests that dataclasses and enums serialized with pickled types and decimal length
+    prefixes (e.g., in existing HDF5 logs) can still be decoded.
+    """
+    type_bytes = pickle.dumps(MyDataclass)
+    value_bytes = get_packed_value(IntType(), 7)
+    legacy_bytes = (
+        get_len_bytes(type_bytes)
+        + type_bytes
+        + get_len_bytes(value_bytes)
+        + value_bytes
+    )
+    assert DataclassType(MyDataclass).postprocess(legacy_bytes) == MyDataclass(
+        sub_field1=7
+    )
+
+    type_bytes = pickle.dumps(MyStrEnum)
+    legacy_bytes = get_len_bytes(type_bytes) + type_bytes + get_len_bytes(b"B") + b"B"
+    assert StrEnumType(MyStrEnum).postprocess(legacy_bytes) is MyStrEnum.B
+
+
+def test_object_field_out_of_band_buffers() -> None:
+    """
+    Tests that large buffers in objects are decoded as writable copies, or as
+    read-only views of the message's shared memory if the field opts in.
+    """
+    array = np.random.rand(100, 100)
+    small_array = np.arange(4)
+    message = MyObjectMessage(field1=MyObject(array=array, small_array=small_array))
+    field1 = message.field1
+    assert np.array_equal(field1.array, array)
+    assert np.array_equal(field1.small_array, small_array)
+    field1.array[0, 0] = -1.0
+    shared_memory = np.frombuffer(
+        message.__sample__.dynamicParameters[0], dtype=np.uint8
+    )
+    assert not np.shares_memory(field1.array, shared_memory)
+
+    message = MyZeroCopyObjectMessage(
+        field1=MyObject(array=array, small_array=small_array)
+    )
+    field1 = message.field1
+    assert np.array_equal(field1.array, array)
+    assert not field1.array.flags.writeable
+    shared_memory = np.frombuffer(
+        message.__sample__.dynamicParameters[0], dtype=np.uint8
+    )
+    assert np.shares_memory(field1.array, shared_memory)
+    assert not np.shares_memory(field1.small_array, shared_memory)
+
+
+def test_object_field_legacy_format() -> None:
+    """
+    Tests that objects serialized as a plain pickle can still be decoded.
+    """
+    field_type = ObjectDynamicType()
+    assert field_type.postprocess(pickle.dumps({"a": [1, 2]})) == {"a": [1, 2]}
+    assert field_type.preprocess({"a": [1, 2]}) == pickle.dumps(
+        {"a": [1, 2]}, protocol=5
+    )
+
+
+def test_typing_fields() -> None:
+    """
+    Tests that `Optional`, `Tuple`, and `Union` fields get native field types and
+    round-trip.
+    """
+    fields = MyTypingMessage.__message_fields__
+    assert isinstance(fields["field1"].data_type, OptionalType)
+    assert isinstance(fields["field2"].data_type, OptionalDynamicType)
+    assert isinstance(fields["field3"].data_type, TupleType)
+    assert isinstance(fields["field4"].data_type, TupleDynamicType)
+    assert isinstance(fields["field5"].data_type, UnionType)
+    assert isinstance(fields["field6"].data_type, OptionalDynamicType)
+    assert isinstance(fields["field6"].data_type.sub_type, UnionDynamicType)
+
+    values = [
+        dict(
+            field1=1.5,
+            field2=[1, 2],
+            field3=(1, 2.5, True),
+            field4=(3, "hello"),
+            field5=True,
+            field6="hello",
+        ),
+        dict(
+            field1=None,
+            field2=None,
+            field3=(0, 0.0, False),
+            field4=(0, ""),
+            field5=7,
+            field6=None,
+        ),
+    ]
+    for kwargs in values:
+        message = MyTypingMessage(**kwargs)
+        for name, value in kwargs.items():
+            assert getattr(message, name) == value
+            assert type(getattr(message, name)) is type(value)
+
+    with pytest.raises(TypeError):
+        MyTypingMessage(**{**values[0], "field3": (1, 2.5)})
+
+
+def test_typing_fields_int_for_float() -> None:
+    """
+    Tests that ints are accepted for float members of `Optional`, `Tuple`, and `Union`
+    fields, and are decoded as floats.
+    """
+    message = MyTypingMessage(
+        field1=1,
+        field2=None,
+        field3=(1, 2, True),
+        field4=(3, "hello"),
+        field5=4,
+        field6=None,
+    )
+    assert message.field1 == 1.0 and type(message.field1) is float
+    assert message.field3 == (1, 2.0, True) and type(message.field3[1]) is float
+    assert message.field5 == 4 and type(message.field5) is int
+    assert get_field_type(Union[float, str]).isinstance(1)
+    assert get_field_type(Optional[float]).python_type == Optional[float]
+    assert get_field_type(Optional[List[int]]).python_type == Optional[list]
+
+
+def test_typing_fields_legacy_format() -> None:
+    """
+    Tests that `Optional`, `Tuple`, and `Union` values that were pickled before these
+    types had native field types (e.g., in existing HDF5 logs) can still be decoded.
+    """
+    for python_type, value in (
+        (Optional[float], 1.5),
+        (Optional[float], None),
+        (Optional[List[int]], [1, 2]),
+        (Tuple[int, float, bool], (1, 2.5, True)),
+        (Tuple[int, str], (3, "hello")),
+        (Union[int, bool, float], 7),
+        (Union[int, str, None], "hello"),
+    ):
+        field_type = get_field_type(python_type)
+        assert field_type.postprocess(pickle.dumps(value)) == value
+
+
+def test_field_accessors() -> None:
+    """
+    Tests that message types compile a field accessor for each field, and that the
+    accessors keep messages frozen.
+    """
+    assert isinstance(MyMessage.__dict__["int_field"], FixedFieldAccessor)
+    assert isinstance(MyMessage.__dict__["str_field"], DynamicFieldAccessor)
+    assert isinstance(MyNestedMessage.__dict__["int_field"], FixedFieldAccessor)
+    assert MyMessage.versioned_name is MyMessage.versioned_name
+
+    message = MyDefaultMessage(field1=5, field2="hello")
+    assert message.field3 is True
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        message.field1 = 6  # type: ignore
+
+
+def test_class_field_defaults() -> None:
+    """
+    Tests that fields read as their default values on the message class, as they would
+    on a dataclass, and that subclasses keep the defaults.
+    """
+    assert MyDefaultMessage.field5 == 10
+    assert MyDefaultMessage.field3 is True
+    assert not hasattr(MyDefaultMessage, "field1")
+
+    class MySubDefaultMessage(MyDefaultMessage):
+        field6: int = 7
+
+    assert MySubDefaultMessage.field5 == 10
+    message = MySubDefaultMessage(field1=5, field2="hello")
+    assert message.field5 == 10
+    assert message.field6 == 7
+
+
+def test_field_caching() -> None:
+    """
+    Tests that decoded field values are cached on the message unless the field opts
+    out.
+    """
+    message = MyUncachedMessage(field1=[1, 2], field2=[3, 4])
+    assert message.field1 is message.field1
+    assert message.field2 == [3, 4]
+    assert message.field2 is not message.field2
+    assert "field2" not in message.__dict__
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        message.field1 = [3]  # type: ignore
+
+
+def test_released_sample() -> None:
+    """
+    Tests that a message keeps its sample after every field is read, and releases it
+    only when asked to.
+    """
+    assert "_sample" in Message.__slots__
+    message = MyMessage(
+        int_field=1,
+        str_field="hello",
+        float_field=0.5,
+        bool_field=True,
+        bytes_field=b"world",
+    )
+    assert message.__dict__ == {}
+    sample = message.__sample__
+    message.asdict()
+    assert message._sample is sample
+
+    message.release()
+    assert message._sample is None
+    assert message.bytes_field == b"world"
+    assert message == MyMessage(1, "hello", 0.5, True, b"world")
+    assert message.copy().str_field == "hello"
+    assert message.replace(int_field=2).int_field == 2
+    assert message._sample is None
+    embedding = MyEmbeddingMessage(field1=message, field2=[])
+    assert embedding.field1 == message
+    with pytest.raises(LabgraphError):
+        message.__sample__
+
+
+def test_read_message_not_repacked() -> None:
+    """
+    Tests that republishing or comparing a message whose fields are all read reuses
+    its sample rather than serializing its values again.
+    """
+    message = MyMessage(1, "hello", 0.5, True, b"world")
+    other = MyMessage(1, "hello", 0.5, True, b"world")
+    message.asdict()
+    other.asdict()
+    sample = message.__sample__
+    with patch.object(
+        MyMessage, "_pack_sample", side_effect=AssertionError("repacked")
+    ):
+        assert message == other
+        assert MyMessage(__sample__=message.__sample__) == other
+        assert message.copy() == other
+        assert message.__sample__ is sample
+
+
+def test_kept_sample() -> None:
+    """
+    Tests that messages cannot release their samples when a field is not cached or its
+    values are views of the sample.
+    """
+    message = MyUncachedMessage(field1=[1, 2], field2=[3, 4])
+    assert message.field1 == [1, 2] and message.field2 == [3, 4]
+    with pytest.raises(LabgraphError):
+        message.release()
+    assert message._sample is not None
+
+    array = np.zeros(NUMPY_SHAPE)
+    message2 = MyZeroCopyNumpyMessage(field1=1, field2=array)
+    assert message2.field1 == 1 and np.array_equal(message2.field2, array)
+    with pytest.raises(LabgraphError):
+        message2.release()
+    assert message2._sample is not None
+
+
+def test_message_fields() -> None:
+    """
+    Tests that messages in fields are serialized as their buffers, and are decoded
+    lazily as messages of their own types.
+    """
+    assert isinstance(get_field_type(MyMessage), MessageFieldType)
+    inner = MyMessage(1, "hello", 0.5, True, b"world")
+    nested = MyNestedMessage(2, "goodbye", 1.5, False, b"", "test", 5)
+    message = MyEmbeddingMessage(field1=inner, field2=[inner, nested])
+
+    field1 = message.field1
+    assert type(field1) is MyMessage
+    assert isinstance(field1._sample, EmbeddedSample)
+    assert field1.__dict__ == {}
+    assert field1.str_field == "hello"
+    assert field1 == inner
+    field2 = message.field2
+    assert [type(item) for item in field2] == [MyMessage, MyNestedMessage]
+    assert field2[1].b_extra_field == "test"
+    assert field2[1].asdict() == nested.asdict()
+
+    # Embedded messages can be embedded again, and published with a new sample
+    assert MyEmbeddingMessage(field1=field2[0], field2=[]).field1 == inner
+    sample = field2[0].__sample__
+    assert not isinstance(sample, EmbeddedSample)
+    assert MyMessage(__sample__=sample) == inner
+
+
+def test_message_field_legacy_format() -> None:
+    """
+    Tests that messages serialized as dataclasses (e.g., in existing HDF5 logs) can
+    still be decoded.
+    """
+    inner = MyMessage(1, "hello", 0.5, True, b"world")
+    legacy_bytes = DataclassType(MyMessage).preprocess(inner)
+    assert MessageFieldType(MyMessage).postprocess(legacy_bytes) == inner
+
+
+def test_view_fields() -> None:
+    """
+    Tests that `BytesView` and `StrView` fields are read as read-only views of the
+    message's shared memory.
+    """
+    assert isinstance(get_field_type(BytesView), BytesViewType)
+    assert isinstance(get_field_type(StrView), StrViewType)
+    message = MyViewMessage(field1=b"\x00" * 1000, field2="héllo")
+    field1 = message.field1
+    assert isinstance(field1, memoryview)
+    assert field1.readonly
+    assert field1 == b"\x00" * 1000
+    shared_memory = np.frombuffer(
+        message.__sample__.dynamicParameters[0], dtype=np.uint8
+    )
+    assert np.shares_memory(np.frombuffer(field1, dtype=np.uint8), shared_memory)
+
+    field2 = message.field2
+    assert isinstance(field2, StrView)
+    assert field2._value is None
+    assert field2 == "héllo"
+    assert str(field2) == "héllo"
+    assert hash(field2) == hash("héllo")
+    assert message._sample is not None
+
+    # Views are forwarded to other messages without decoding
+    received = MyViewMessage(__sample__=message.__sample__)
+    forwarded = MyViewMessage(field1=received.field1, field2=received.field2)
+    assert received.field2._value is None
+    assert forwarded == message
+    assert MyViewMessage(field1=bytearray(b"a"), field2="a").field1 == b"a"
+    assert pickle.loads(pickle.dumps(message)) == message
+
+
+def test_create_unchecked() -> None:
+    """
+    Tests that messages created without validation match messages created with the
+    constructor.
+    """
+    message = MyDefaultMessage.create_unchecked(5, field2="hello")
+    assert message == MyDefaultMessage(5, "hello")
+    assert message.field3 is True
+
+    with pytest.raises(TypeError):
+        MyDefaultMessage.create_unchecked(field2="hello")
+
+
+def test_build_many() -> None:
+    """
+    Tests that we can create several messages from columns of field values.
+    """
+    messages = MyDefaultMessage.build_many(
+        {"field1": np.arange(3), "field2": ["a", "b", "c"]}
+    )
+    assert messages == [
+        MyDefaultMessage(0, "a"),
+        MyDefaultMessage(1, "b"),
+        MyDefaultMessage(2, "c"),
+    ]
+    assert type(messages[0].field1) is int
+
+    arrays = np.random.rand(2, *NUMPY_SHAPE)
+    numpy_messages = MyZeroCopyNumpyMessage.build_many(
+        {"field1": [0, 1], "field2": arrays}
+    )
+    for i, message in enumerate(numpy_messages):
+        assert message.field1 == i
+        assert np.array_equal(message.field2, arrays[i])
+
+    with pytest.raises(ValueError):
+        MyDefaultMessage.build_many({"field1": [1, 2], "field2": ["a"]})
+    with pytest.raises(TypeError):
+        MyDefaultMessage.build_many({"field1": [1], "field6": ["a"]})
+
+
+def test_build_many_memory_pool_lookup(monkeypatch: Any) -> None:
+    """
+    Tests that `build_many` looks up the memory pool once for all messages.
+    """
+    pool = message_module.memoryPool()
+    calls = []
+
+    def memory_pool() -> Any:
+        calls.append(None)
+        return pool
+
+    monkeypatch.setattr(message_module, "memoryPool", memory_pool)
+    messages = MyDynamicMessage.build_many(
+        {"field1": [{"a": 1}] * 3, "field2": [1, 2, 3], "field3": [[1], [2], [3]]}
+    )
+    assert [message.field2 for message in messages] == [1, 2, 3]
+    assert len(calls) == 1
+
+
+def test_native_layout() -> None:
+    """
+    Tests that fields of messages with the native layout are aligned, and that the
+    layout is inherited.
+    """
+    assert MyNativeMessage.__layout__ == MessageLayout.NATIVE
+    assert MyMessage.__layout__ == MessageLayout.PACKED
+    assert MyNativeSubclassMessage.__layout__ == MessageLayout.NATIVE
+    fields = MyNativeMessage.__message_fields__
+    assert [fields[f"field{i}"].offset for i in range(1, 6)] == [0, 8, 16, 20, 36]
+    assert MyNativeMessage.__message_size__ == 40
+    assert MyNativeSubclassMessage.__message_fields__["field7"].offset == 40
+    assert MyNativeSubclassMessage.__message_size__ == 48
+    assert MyNativeMessage.versioned_name != MyNativeSubclassMessage.versioned_name
+
+    array = np.arange(4, dtype=np.float32).reshape((2, 2))
+    message = MyNativeMessage(
+        field1=True, field2=1.5, field3="abc", field4=array, field5=-7, field6="hello"
+    )
+    assert message.field1 is True
+    assert message.field2 == 1.5
+    assert message.field3 == "abc"
+    assert (message.field4 == array).all()
+    assert message.field5 == -7
+    assert message.field6 == "hello"
+    replaced = message.replace(field5=8)
+    assert replaced.field5 == 8
+    assert replaced.field2 == 1.5
+
+    with pytest.raises(ValueError):
+
+        class MyInvalidLayoutMessage(Message, layout="invalid"):
+            field1: int
+
+
+def test_as_record() -> None:
+    """
+    Tests that the fixed-length fields of a message can be viewed as a numpy record.
+    """
+    array = np.arange(4, dtype=np.float32).reshape((2, 2))
+    message = MyNativeMessage(
+        field1=True, field2=1.5, field3="abc", field4=array, field5=-7, field6="hello"
+    )
+    record = message.as_record()
+    assert record.shape == ()
+    assert record.dtype.names == ("field1", "field2", "field3", "field4", "field5")
+    assert record["field1"]
+    assert record["field2"] == 1.5
+    assert record["field3"] == b"abc"
+    assert (record["field4"] == array).all()
+    assert record["field5"] == -7
+    assert not record.flags.writeable
+
+    packed_record = MyNumpyMessage(
+        field1="hello", field2=np.ones(NUMPY_SHAPE), field3=5
+    ).as_record()
+    assert packed_record.dtype.names == ("field2", "field3")
+    assert (packed_record["field2"] == 1).all()
+    assert packed_record["field3"] == 5
+
+
+def test_to_records() -> None:
+    """
+    Tests that messages convert to a structured array with a column for each field.
+    """
+    messages = [
+        MyNativeMessage(
+            field1=i % 2 == 0,
+            field2=i / 2,
+            field3="abc",
+            field4=np.full((2, 2), i, dtype=np.float32),
+            field5=i,
+            field6=str(i),
+        )
+        for i in range(4)
+    ]
+    # Messages of other types are read by field
+    messages[2] = MyNativeSubclassMessage(
+        field1=True,
+        field2=1.0,
+        field3="abc",
+        field4=np.full((2, 2), 2, dtype=np.float32),
+        field5=2,
+        field6="2",
+        field7=False,
+    )
+    records = MyNativeMessage.to_records(messages)
+    assert records.dtype == MyNativeMessage.__records_dtype__
+    assert records.dtype.names == MyNativeMessage.__field_names__
+    assert records["field1"].tolist() == [True, False, True, False]
+    assert records["field2"].tolist() == [0.0, 0.5, 1.0, 1.5]
+    assert records["field3"].tolist() == [b"abc"] * 4
+    assert records["field4"].shape == (4, 2, 2)
+    assert records["field5"].tolist() == [0, 1, 2, 3]
+    assert records["field6"].tolist() == ["0", "1", "2", "3"]
+    assert len(MyNativeMessage.to_records([])) == 0
+
+
+def test_from_records() -> None:
+    """
+    Tests that messages can be created from the rows of a structured array.
+    """
+    messages = [
+        MyDefaultMessage(field1=i, field2=str(i), field4=i % 2 == 0) for i in range(3)
+    ]
+    # Messages that released their samples are read by field
+    messages[0].release()
+    assert messages[0]._sample is None
+    records = MyDefaultMessage.to_records(messages)
+    assert records["field4"].tolist() == [True, False, True]
+    assert MyDefaultMessage.from_records(records) == messages
+
+    records = np.zeros(2, dtype=[("field2", object), ("field1", np.int32)])
+    records["field1"] = [1, 2]
+    records["field2"] = ["a", "b"]
+    assert MyDefaultMessage.from_records(records) == [
+        MyDefaultMessage(1, "a"),
+        MyDefaultMessage(2, "b"),
+    ]
+    with pytest.raises(TypeError):
+        MyDefaultMessage.from_records(records[["field1"]])
+    with pytest.raises(TypeError):
+        MyDefaultMessage.from_records(np.zeros(1, dtype=[("field0", np.int32)]))
+
+
+def test_compressed_fields() -> None:
+    """
+    Tests that compressed fields are decompressed to their original values.
+    """
+    field1 = b"hello" * 1000
+    field2 = np.zeros((100, 100))
+    message = MyCompressedMessage(
+        field1=field1, field2=field2, field3=[1, 2, 3], field4=1.5
+    )
+    assert message.field1 == field1
+    assert (message.field2 == field2).all()
+    assert message.field3 == [1, 2, 3]
+    assert message.field4 == 1.5
+
+    field_types = {
+        field.name: field.data_type
+        for field in MyCompressedMessage.__message_fields__.values()
+    }
+    assert isinstance(field_types["field1"], CompressedType)
+    assert field_types["field2"].level == 9
+    compressed_size, raw_size = field_types["field1"].get_sizes(
+        message.__sample__.dynamicParameters[0]
+    )
+    assert raw_size == len(field1)
+    assert compressed_size < raw_size / 10
+
+
+def test_compressed_field_incompressible() -> None:
+    """
+    Tests that data that does not compress is stored uncompressed.
+    """
+    field_type = CompressedType(get_field_type(bytes))
+    value = bytes(np.random.randint(0, 256, size=1000, dtype=np.uint8))
+    serialized = field_type.preprocess(value)
+    assert field_type.get_sizes(serialized) == (len(serialized), len(value))
+    assert len(serialized) == len(value) + COMPRESSED_HEADER.size
+    assert field_type.postprocess(serialized) == value
+    with pytest.raises(ValueError):
+        CompressedType(get_field_type(bytes), level=10)
+
+
 def test_invalid_default_field() -> None:
     """
     Tests that a badly-typed default field value raises an error.
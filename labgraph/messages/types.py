@@ -1,25 +1,42 @@
 #!/usr/bin/env python3
 # Copyright 2004-present Facebook. All Rights Reserved.
 
+import ast
 import dataclasses
+import functools
+import hashlib
 import pickle
 import struct
+import zlib
 from abc import ABC, abstractmethod, abstractproperty
 from enum import Enum
 from io import BytesIO
-from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 import numpy as np
 import typeguard
 
+from ..util.error import LabgraphError
+
 
 DEFAULT_LEN_LENGTH = 10
 DEFAULT_STR_LENGTH = 128
 # Internal fields that are present on Message instances but are not included when
 # serializing the message for streaming
 LOCAL_INTERNAL_FIELDS = (
+    "_sample",
     "__sample__",
-    "__original_message__",
     "__original_message_type__",
 )
 
@@ -31,11 +48,25 @@ class ByteOrder(str, Enum):
 
     BIG_ENDIAN = ">"
     LITTLE_ENDIAN = "<"
+    NATIVE = "="
 
 
 DEFAULT_BYTE_ORDER = ByteOrder.LITTLE_ENDIAN
 
 
+class MessageLayout(str, Enum):
+    """
+    Represents the layout of a message's fixed-length fields in memory.
+
+    - `PACKED`: Fields are packed without padding, in `DEFAULT_BYTE_ORDER`.
+    - `NATIVE`: Fields are in the machine's native byte order, and each field is
+      padded to its alignment.
+    """
+
+    PACKED = "packed"
+    NATIVE = "native"
+
+
 class CIntType(str, Enum):
     """
     Represents a C integer type. The string value of the C type in this enum is the
@@ -128,6 +159,17 @@ class FieldType(ABC, Generic[T]):
         assert self.isinstance(value)
         return value  # type: ignore
 
+    def postprocess_buffer(self, buffer: Any) -> T:
+        """
+        Postprocesses a dynamic-length field directly from the shared memory buffer
+        that holds it. The default implementation copies the buffer into a `bytearray`
+        and calls `postprocess`; subclasses can override this to avoid the copy.
+
+        Args:
+            buffer: An object supporting the buffer protocol that holds the field.
+        """
+        return self.postprocess(bytearray(buffer))
+
 
 class StructType(FieldType[T]):
     """
@@ -146,6 +188,16 @@ class StructType(FieldType[T]):
     def size(self) -> int:
         return struct.calcsize(f"{DEFAULT_BYTE_ORDER.value}{self.format_string}")
 
+    @property
+    def alignment(self) -> int:
+        """
+        The alignment of this field type in messages with the native layout. Byte
+        strings are unaligned; other values are aligned to their size.
+        """
+        if self.format_string.endswith("s"):
+            return 1
+        return self.size
+
 
 class IntType(StructType[int]):
     """
@@ -354,6 +406,14 @@ class NumpyOrder(str, Enum):
     F = "F"
 
 
+# Header of a `NumpyDynamicType` field: magic, format version, number of dimensions,
+# and length of the dtype descriptor
+NUMPY_DYNAMIC_HEADER = struct.Struct("<2sBBH")
+NUMPY_DYNAMIC_MAGIC = b"\x93L"
+NUMPY_DYNAMIC_VERSION = 1
+NUMPY_DYNAMIC_ALIGNMENT = 16
+
+
 class NumpyType(StructType[np.ndarray]):
     """
     Represents a numpy array type.
@@ -362,21 +422,29 @@ class NumpyType(StructType[np.ndarray]):
         shape: The shape of a numpy array of this type.
         dtype: The dtype of a numpy array of this type.
         order: The order of the numpy array's data for multidimensional arrays ("C" or "F")
+        zero_copy:
+            If true, reading the field returns a read-only view over the message's
+            shared memory instead of a copy. The view keeps the shared memory alive for
+            as long as it exists.
     """
 
     shape: Tuple[int]
     dtype: np.dtype
     order: NumpyOrder
+    zero_copy: bool
 
     def __init__(
         self,
         shape: Tuple[int],
         dtype: np.dtype = np.float64,
         order: NumpyOrder = NumpyOrder.C,
+        zero_copy: bool = False,
     ) -> None:
         self.shape = shape
         self.dtype = dtype
         self.order = order
+        self.zero_copy = zero_copy
+        self._count = int(np.prod(shape))
 
     @property
     def format_string(self) -> str:
@@ -384,6 +452,10 @@ class NumpyType(StructType[np.ndarray]):
         bytes_length = arr.size * arr.itemsize
         return f"{bytes_length}s"
 
+    @property
+    def alignment(self) -> int:
+        return np.dtype(self.dtype).alignment  # type: ignore
+
     def isinstance(self, obj: Any) -> bool:
         return (
             isinstance(obj, np.ndarray)
@@ -401,6 +473,24 @@ class NumpyType(StructType[np.ndarray]):
     def postprocess(self, arr_bytes: bytes) -> np.ndarray:
         return np.frombuffer(buffer=arr_bytes, dtype=self.dtype).reshape(self.shape)
 
+    def view(self, buffer: Any, offset: int) -> np.ndarray:
+        """
+        Returns a read-only array over this field's data in `buffer` without copying.
+        The array references `buffer`, keeping it alive.
+
+        Args:
+            buffer: An object supporting the buffer protocol that holds the field.
+            offset: The offset of the field's data in `buffer`.
+        """
+        arr = np.frombuffer(
+            buffer=buffer,
+            dtype=self.dtype,
+            count=self._count,
+            offset=offset,
+        ).reshape(self.shape)
+        arr.flags.writeable = False
+        return arr
+
     @property
     def python_type(self) -> type:
         return np.ndarray  # type: ignore
@@ -430,9 +520,15 @@ class DynamicType(FieldType[T]):
 T_S = TypeVar("T_S", bound=Enum)  # Enumerated string type
 
 
+# Serialized `StrEnumType` field: magic and the ordinal of the enum member
+ENUM_HEADER = struct.Struct("<2sI")
+ENUM_MAGIC = b"\x93E"
+
+
 class StrEnumType(DynamicType[T_S]):
     """
-    Represents an enumerated string type.
+    Represents an enumerated string type. Values are serialized as the ordinal of the
+    member in its enum type.
 
     Args:
         encoding: The encoding to use to serialize strings for this field.
@@ -441,6 +537,10 @@ class StrEnumType(DynamicType[T_S]):
     def __init__(self, enum_type: Type[T_S], encoding: str = "utf-8") -> None:
         self.enum_type = enum_type
         self.encoding = encoding
+        self._members: List[T_S] = list(enum_type)
+        self._ordinals: Dict[T_S, int] = {
+            member: i for i, member in enumerate(self._members)
+        }
 
     def isinstance(self, obj: Any) -> bool:
         return isinstance(obj, self.enum_type)
@@ -450,31 +550,62 @@ class StrEnumType(DynamicType[T_S]):
         return self.enum_type.__name__
 
     def preprocess(self, obj: T_S) -> bytes:
-        type_ = pickle.dumps(type(obj))
-        type_len = get_len_bytes(type_)
-        str_ = bytes(obj.value, encoding=self.encoding)
-        str_len = get_len_bytes(str_)
-        return type_len + type_ + str_len + str_
+        return ENUM_HEADER.pack(ENUM_MAGIC, self._ordinals[obj])
 
     def postprocess(self, obj_bytes: bytes) -> T_S:
-        raw, curr = get_next_bytes(obj_bytes, 0)
-        type_ = pickle.loads(raw)
+        if obj_bytes[: len(ENUM_MAGIC)] != ENUM_MAGIC:
+            return self._postprocess_legacy(obj_bytes)
+        _, ordinal = ENUM_HEADER.unpack_from(obj_bytes)
+        return self._members[ordinal]
+
+    def _postprocess_legacy(self, obj_bytes: bytes) -> T_S:
+        """
+        Decodes a value serialized in the format used before `ENUM_HEADER`: a pickled
+        enum type and the member's value, with decimal length prefixes.
+        """
+        _, curr = get_next_bytes(obj_bytes, 0)
         raw, curr = get_next_bytes(obj_bytes, curr)
-        str_ = raw.decode(self.encoding)
-        return type_(str_)
+        return self.enum_type(raw.decode(self.encoding))  # type: ignore
 
     @property
     def python_type(self) -> type:
         return self.enum_type
 
 
+# Header of an `ObjectDynamicType` field with out-of-band buffers: magic and the number
+# of out-of-band buffers. It is followed by the lengths of the pickle and of each
+# buffer as 64-bit integers, the pickle, and the buffers, each aligned to
+# `OBJECT_BUFFER_ALIGNMENT` bytes
+OBJECT_HEADER = struct.Struct("<2sI")
+OBJECT_MAGIC = b"\x93O"
+OBJECT_BUFFER_ALIGNMENT = 16
+# Buffers smaller than this many bytes are kept in the pickle
+OBJECT_OUT_OF_BAND_THRESHOLD = 1024
+
+
 class ObjectDynamicType(DynamicType[Any]):
     """
     Represents a dynamic field type for any object. This is a fallback type for when we
     don't know how else to serialize a field. This type simply uses pickling to
     serialize objects.
+
+    Large buffers in the object (e.g., the data of numpy arrays) are pickled out of
+    band with pickle protocol 5, and stored after the pickle instead of being copied
+    into it. Objects without large buffers are stored as a plain pickle.
+
+    Args:
+        zero_copy:
+            If true, the out-of-band buffers of a decoded object are read-only views of
+            the message's shared memory instead of copies. The views keep the shared
+            memory alive for as long as they exist.
     """
 
+    zero_copy: bool
+
+    def __init__(self, zero_copy: bool = False) -> None:
+        super().__init__()
+        self.zero_copy = zero_copy
+
     @property
     def python_type(self) -> Type[object]:
         return object
@@ -484,17 +615,87 @@ class ObjectDynamicType(DynamicType[Any]):
         return "object"
 
     def preprocess(self, obj: T) -> bytes:
-        return pickle.dumps(obj)
+        if pickle.HIGHEST_PROTOCOL < 5:
+            return pickle.dumps(obj)
+
+        buffers: List[memoryview] = []
+
+        def buffer_callback(buffer: Any) -> bool:
+            try:
+                raw = buffer.raw()
+            except BufferError:
+                # Keep non-contiguous buffers in the pickle
+                return True
+            if raw.nbytes < OBJECT_OUT_OF_BAND_THRESHOLD:
+                return True
+            buffers.append(raw)
+            return False
 
-    def postprocess(self, obj_bytes: bytes) -> T:
-        return pickle.loads(obj_bytes)  # type: ignore
+        data = pickle.dumps(obj, protocol=5, buffer_callback=buffer_callback)
+        if len(buffers) == 0:
+            return data
+        header = OBJECT_HEADER.pack(OBJECT_MAGIC, len(buffers)) + struct.pack(
+            f"<{len(buffers) + 1}Q", len(data), *(raw.nbytes for raw in buffers)
+        )
+        values: List[Any] = [header, data]
+        curr = len(header) + len(data)
+        for raw in buffers:
+            padding = -curr % OBJECT_BUFFER_ALIGNMENT
+            values.append(b"\0" * padding)
+            values.append(raw)
+            curr += padding + raw.nbytes
+        return b"".join(values)
+
+    def postprocess(self, obj_bytes: Any) -> T:
+        buffer = memoryview(obj_bytes)
+        if buffer[: len(OBJECT_MAGIC)] != OBJECT_MAGIC:
+            return pickle.loads(buffer)  # type: ignore
+        if self.zero_copy:
+            # Out-of-band buffers view the shared memory, so don't let them modify it
+            buffer = buffer.toreadonly()
+        _, num_buffers = OBJECT_HEADER.unpack_from(buffer)
+        lengths = struct.unpack_from(f"<{num_buffers + 1}Q", buffer, OBJECT_HEADER.size)
+        curr = OBJECT_HEADER.size + 8 * len(lengths)
+        data = buffer[curr : curr + lengths[0]]
+        curr += lengths[0]
+        buffers = []
+        for length in lengths[1:]:
+            curr += -curr % OBJECT_BUFFER_ALIGNMENT
+            if self.zero_copy:
+                buffers.append(buffer[curr : curr + length])
+            else:
+                buffers.append(bytearray(buffer[curr : curr + length]))
+            curr += length
+        return pickle.loads(data, buffers=buffers)  # type: ignore
+
+    def postprocess_buffer(self, buffer: Any) -> T:
+        return self.postprocess(buffer)
 
 
 class NumpyDynamicType(DynamicType[np.ndarray]):
     """
     Represents a numpy dynamic field type.
+
+    Arrays are serialized as a small header followed by the array's raw data. The
+    header is `NUMPY_DYNAMIC_HEADER` (magic, version, number of dimensions, length of
+    the dtype descriptor), then the dtype descriptor, then the shape and the strides as
+    64-bit integers, padded so the data is aligned to `NUMPY_DYNAMIC_ALIGNMENT` bytes.
+    Data serialized with `np.save` by earlier versions of Labgraph can still be
+    decoded.
+
+    Args:
+        zero_copy:
+            If true, decoding returns a read-only array over the message's shared
+            memory instead of a copy. The array keeps the shared memory alive for as
+            long as it exists.
     """
 
+    zero_copy: bool
+
+    def __init__(self, zero_copy: bool = False) -> None:
+        super().__init__()
+        self.zero_copy = zero_copy
+
     @property
     def python_type(self) -> type:
         return np.ndarray  # type: ignore
@@ -504,19 +705,58 @@ class NumpyDynamicType(DynamicType[np.ndarray]):
 
     def preprocess(self, obj: np.ndarray) -> bytes:
         assert self.isinstance(obj)
-        values = []
-        dtype_bytes = get_packed_value(ObjectDynamicType(), obj.dtype)
-        dtype_len = get_len_bytes(dtype_bytes)
-        values.extend([dtype_len, dtype_bytes])
-        buf = BytesIO()
-        np.save(buf, obj)
-        buf.seek(0)
-        array_bytes = buf.read()
-        array_len = get_len_bytes(array_bytes)
-        values.extend([array_len, array_bytes])
-        return b"".join(values)
+        if obj.dtype.hasobject:
+            raise TypeError(
+                f"Cannot serialize numpy array with dtype {obj.dtype} containing Python "
+                "objects"
+            )
+        if obj.flags.f_contiguous and not obj.flags.c_contiguous:
+            order = NumpyOrder.F
+        else:
+            order = NumpyOrder.C
+        dtype_code = _get_numpy_dtype_code(obj.dtype)
+        strides = _get_contiguous_strides(obj.shape, obj.dtype.itemsize, order)
+        header = NUMPY_DYNAMIC_HEADER.pack(
+            NUMPY_DYNAMIC_MAGIC, NUMPY_DYNAMIC_VERSION, obj.ndim, len(dtype_code)
+        )
+        dims = struct.pack(f"<{obj.ndim}Q{obj.ndim}q", *obj.shape, *strides)
+        header_length = len(header) + len(dtype_code) + len(dims)
+        padding = b"\0" * (-header_length % NUMPY_DYNAMIC_ALIGNMENT)
+        return b"".join(
+            (header, dtype_code, dims, padding, obj.tobytes(order=order.value))
+        )
+
+    def postprocess(self, obj_bytes: Any) -> np.ndarray:
+        buffer = memoryview(obj_bytes)
+        if buffer[: len(NUMPY_DYNAMIC_MAGIC)] != NUMPY_DYNAMIC_MAGIC:
+            return self._postprocess_legacy(bytes(buffer))
+        _, _, ndim, dtype_length = NUMPY_DYNAMIC_HEADER.unpack_from(buffer)
+        curr = NUMPY_DYNAMIC_HEADER.size
+        dtype = _get_numpy_dtype(bytes(buffer[curr : curr + dtype_length]))
+        curr += dtype_length
+        dims = struct.unpack_from(f"<{ndim}Q{ndim}q", buffer, curr)
+        curr += 16 * ndim
+        curr += -curr % NUMPY_DYNAMIC_ALIGNMENT
+        arr = np.ndarray(
+            shape=dims[:ndim],
+            dtype=dtype,
+            buffer=buffer,
+            offset=curr,
+            strides=dims[ndim:],
+        )
+        if not self.zero_copy:
+            return arr.copy(order="K")
+        arr.flags.writeable = False
+        return arr
 
-    def postprocess(self, obj_bytes: bytes) -> np.ndarray:
+    def postprocess_buffer(self, buffer: Any) -> np.ndarray:
+        return self.postprocess(buffer)
+
+    def _postprocess_legacy(self, obj_bytes: bytes) -> np.ndarray:
+        """
+        Decodes an array serialized in the format used before `NUMPY_DYNAMIC_VERSION`
+        1: a pickled dtype and an `np.save` payload, each with a decimal length prefix.
+        """
         raw, curr = get_next_bytes(obj_bytes, 0)
         dtype = get_unpacked_value(ObjectDynamicType(), raw)
         raw, curr = get_next_bytes(obj_bytes, curr)
@@ -530,6 +770,47 @@ class NumpyDynamicType(DynamicType[np.ndarray]):
         return "numpy.ndarray"
 
 
+class NumpyColumnType(NumpyDynamicType):
+    """
+    Represents a column of values of a fixed-length field type, stored as a numpy array
+    whose first axis indexes the rows. The column holds the field type's preprocessed
+    values: e.g., a column of a `StrType` field holds encoded bytes.
+
+    Args:
+        field_type: The field type of the column's values.
+        zero_copy: See `NumpyDynamicType`.
+    """
+
+    field_type: StructType[Any]
+    dtype: np.dtype
+    item_shape: Tuple[int, ...]
+
+    def __init__(self, field_type: StructType[Any], zero_copy: bool = True) -> None:
+        super().__init__(zero_copy=zero_copy)
+        self.field_type = field_type
+        if isinstance(field_type, NumpyType):
+            self.dtype = np.dtype(field_type.dtype)
+            self.item_shape = tuple(field_type.shape)
+        elif field_type.format_string.endswith("s"):
+            self.dtype = np.dtype(f"S{field_type.size}")
+            self.item_shape = ()
+        else:
+            self.dtype = np.dtype(DEFAULT_BYTE_ORDER.value + field_type.format_string)
+            self.item_shape = ()
+
+    def isinstance(self, obj: Any) -> bool:
+        return isinstance(obj, np.ndarray) and obj.shape[1:] == self.item_shape
+
+    def preprocess(self, obj: np.ndarray) -> bytes:
+        return super(NumpyColumnType, self).preprocess(
+            np.asarray(obj, dtype=self.dtype)
+        )
+
+    @property
+    def description(self) -> str:
+        return f"numpy.ndarray((N, *{self.item_shape}), {self.dtype})"
+
+
 class StrDynamicType(DynamicType[str]):
     """
     Represents a string dynamic field type.
@@ -570,9 +851,167 @@ class BytesDynamicType(DynamicType[bytes]):
         return "bytes"
 
 
+# Annotation for bytes fields that are read as read-only memoryviews (see
+# `BytesViewType`)
+BytesView = memoryview
+
+
+class BytesViewType(DynamicType[memoryview]):
+    """
+    Represents a bytes dynamic field type whose values are read as read-only
+    memoryviews of the message's shared memory, so reading a field does not copy it.
+    A view keeps the shared memory alive for as long as it is referenced. Values can be
+    set with any bytes-like object.
+    """
+
+    @property
+    def python_type(self) -> type:
+        return memoryview
+
+    def isinstance(self, obj: Any) -> bool:
+        return isinstance(obj, (bytes, bytearray, memoryview))
+
+    def preprocess(self, obj: Any) -> Any:
+        if isinstance(obj, bytes):
+            return obj
+        return memoryview(obj).cast("B")
+
+    def postprocess(self, obj_bytes: Any) -> memoryview:
+        return memoryview(obj_bytes).toreadonly()
+
+    def postprocess_buffer(self, buffer: Any) -> memoryview:
+        return memoryview(buffer).toreadonly()
+
+    @property
+    def description(self) -> str:
+        return "BytesView"
+
+
+class StrView:
+    """
+    A string read from a `StrViewType` field. Holds a read-only view of the encoded
+    string, which is decoded when the string is first used as a `str` (e.g., with
+    `str()`, comparisons, or hashing). Setting another message's field to a `StrView`
+    copies the encoded string without decoding it.
+
+    Args:
+        buffer: An object supporting the buffer protocol that holds the encoded string.
+        encoding: The encoding of the string.
+    """
+
+    __slots__ = ("buffer", "encoding", "_value")
+
+    def __init__(self, buffer: Any, encoding: str = "utf-8") -> None:
+        self.buffer = memoryview(buffer).toreadonly()
+        self.encoding = encoding
+        self._value: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self._value is None:
+            self._value = str(self.buffer, self.encoding)
+        return self._value
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({str(self)!r})"
+
+    def __len__(self) -> int:
+        return len(str(self))
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, StrView) and other.encoding == self.encoding:
+            return self.buffer.tobytes() == other.buffer.tobytes()
+        if isinstance(other, (str, StrView)):
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (StrView, (self.buffer.tobytes(), self.encoding))
+
+
+class StrViewType(DynamicType[StrView]):
+    """
+    Represents a string dynamic field type whose values are read as `StrView`s of the
+    message's shared memory, which are decoded lazily. Values can be set with a `str`
+    or a `StrView`.
+
+    Args:
+        encoding: The encoding of the string.
+    """
+
+    encoding: str
+
+    def __init__(self, encoding: str = "utf-8") -> None:
+        super().__init__()
+        self.encoding = encoding
+
+    @property
+    def python_type(self) -> type:
+        return StrView
+
+    def isinstance(self, obj: Any) -> bool:
+        return isinstance(obj, (str, StrView))
+
+    def preprocess(self, obj: Union[str, StrView]) -> Any:
+        if isinstance(obj, StrView):
+            if obj.encoding == self.encoding:
+                return obj.buffer
+            obj = str(obj)
+        return obj.encode(self.encoding)
+
+    def postprocess(self, obj_bytes: Any) -> StrView:
+        return StrView(obj_bytes, self.encoding)
+
+    def postprocess_buffer(self, buffer: Any) -> StrView:
+        return StrView(buffer, self.encoding)
+
+    @property
+    def description(self) -> str:
+        return "StrView"
+
+
+class ContainerEncoding(int, Enum):
+    """
+    Represents how the items of a serialized `ListType` or `DictType` field are laid
+    out.
+    """
+
+    ITEMS = 0  # Each item has a `LEN_PREFIX`
+    TYPED_ARRAY = 1  # Items are a contiguous array with a `TYPED_ARRAY_DTYPES` dtype
+
+
+# Header of a `ListType` or `DictType` field: magic, `ContainerEncoding`, and number
+# of items
+CONTAINER_HEADER = struct.Struct("<2sBI")
+CONTAINER_MAGIC = b"\x93C"
+# Length prefix of an item in a serialized container
+LEN_PREFIX = struct.Struct("<I")
+
+# Element types of lists that are serialized as a single contiguous typed array
+TYPED_ARRAY_DTYPES = {
+    int: np.dtype("<i8"),
+    float: np.dtype("<f8"),
+    bool: np.dtype("?"),
+}
+# The types of the items that each `TYPED_ARRAY_DTYPES` dtype stores exactly. Lists
+# with other items are serialized item by item, which raises for invalid items.
+TYPED_ARRAY_ITEM_TYPES = {
+    int: (int, bool),
+    float: (float, int, bool),
+    bool: (bool,),
+}
+
+
 class ListType(DynamicType[List[T]]):
     """
     Represents a list dynamic field type.
+
+    Lists are serialized with a `CONTAINER_HEADER` followed by the items. Lists of
+    `int`, `float`, or `bool` are serialized as a single contiguous typed array if
+    their items have `TYPED_ARRAY_ITEM_TYPES`; other lists are serialized item by
+    item, each with a `LEN_PREFIX`.
     """
 
     type_: Type[T]
@@ -580,6 +1019,8 @@ class ListType(DynamicType[List[T]]):
     def __init__(self, type_: Type[T]) -> None:
         self.type_ = type_
         self._sub_type = get_field_type(self.type_)
+        self._array_dtype = TYPED_ARRAY_DTYPES.get(self.type_)  # type: ignore
+        self._array_item_types = TYPED_ARRAY_ITEM_TYPES.get(self.type_)  # type: ignore
 
     @property
     def python_type(self) -> type:
@@ -589,15 +1030,45 @@ class ListType(DynamicType[List[T]]):
         return isinstance(obj, list)
 
     def preprocess(self, obj: List[T]) -> bytes:
-        values = [get_len_bytes(obj)]
+        if self._array_item_types is not None and all(
+            type(item) in self._array_item_types for item in obj
+        ):
+            header = CONTAINER_HEADER.pack(
+                CONTAINER_MAGIC, ContainerEncoding.TYPED_ARRAY, len(obj)
+            )
+            return header + np.array(obj, dtype=self._array_dtype).tobytes()
+        values = [
+            CONTAINER_HEADER.pack(CONTAINER_MAGIC, ContainerEncoding.ITEMS, len(obj))
+        ]
         for item in obj:
             value = get_packed_value(self._sub_type, item)
-            value_len = get_len_bytes(value)
-            values.append(value_len)
+            values.append(LEN_PREFIX.pack(len(value)))
             values.append(value)
         return b"".join(values)
 
     def postprocess(self, obj_bytes: bytes) -> List[T]:
+        if obj_bytes[: len(CONTAINER_MAGIC)] != CONTAINER_MAGIC:
+            return self._postprocess_legacy(obj_bytes)
+        _, encoding, obj_len = CONTAINER_HEADER.unpack_from(obj_bytes)
+        if encoding == ContainerEncoding.TYPED_ARRAY:
+            return np.frombuffer(  # type: ignore
+                obj_bytes,
+                dtype=TYPED_ARRAY_DTYPES[self.type_],  # type: ignore
+                count=obj_len,
+                offset=CONTAINER_HEADER.size,
+            ).tolist()
+        curr = CONTAINER_HEADER.size
+        values = []
+        for _ in range(obj_len):
+            raw, curr = get_next_item(obj_bytes, curr)
+            values.append(get_unpacked_value(self._sub_type, raw))
+        return values
+
+    def _postprocess_legacy(self, obj_bytes: bytes) -> List[T]:
+        """
+        Decodes a list serialized in the format used before `CONTAINER_HEADER`, with
+        decimal length prefixes.
+        """
         obj_len = int(obj_bytes[0:DEFAULT_LEN_LENGTH])
         curr = DEFAULT_LEN_LENGTH
         values = []
@@ -617,6 +1088,9 @@ V = TypeVar("V")
 class DictType(DynamicType[Dict[T, V]]):
     """
     Represents a list dynamic field type.
+
+    Dictionaries are serialized with a `CONTAINER_HEADER` followed by alternating keys
+    and values, each with a `LEN_PREFIX`.
     """
 
     type_: Tuple[Type[T], Type[V]]
@@ -634,16 +1108,41 @@ class DictType(DynamicType[Dict[T, V]]):
         return isinstance(obj, dict)
 
     def preprocess(self, obj: Dict[T, V]) -> bytes:
-        values = [bytes(str(len(obj)).rjust(DEFAULT_LEN_LENGTH, "0"), encoding="ascii")]
+        values = [
+            CONTAINER_HEADER.pack(CONTAINER_MAGIC, ContainerEncoding.ITEMS, len(obj))
+        ]
         for key, val in obj.items():
             key_bytes = get_packed_value(self._key_type, key)
             val_bytes = get_packed_value(self._val_type, val)
-            key_len = get_len_bytes(key_bytes)
-            val_len = get_len_bytes(val_bytes)
-            values.extend([key_len, key_bytes, val_len, val_bytes])
+            values.extend(
+                [
+                    LEN_PREFIX.pack(len(key_bytes)),
+                    key_bytes,
+                    LEN_PREFIX.pack(len(val_bytes)),
+                    val_bytes,
+                ]
+            )
         return b"".join(values)
 
     def postprocess(self, obj_bytes: bytes) -> Dict[T, V]:
+        if obj_bytes[: len(CONTAINER_MAGIC)] != CONTAINER_MAGIC:
+            return self._postprocess_legacy(obj_bytes)
+        _, _, obj_len = CONTAINER_HEADER.unpack_from(obj_bytes)
+        curr = CONTAINER_HEADER.size
+        values = {}
+        for _ in range(obj_len):
+            raw, curr = get_next_item(obj_bytes, curr)
+            key = get_unpacked_value(self._key_type, raw)
+            raw, curr = get_next_item(obj_bytes, curr)
+            val = get_unpacked_value(self._val_type, raw)
+            values[key] = val
+        return values
+
+    def _postprocess_legacy(self, obj_bytes: bytes) -> Dict[T, V]:
+        """
+        Decodes a dictionary serialized in the format used before `CONTAINER_HEADER`,
+        with decimal length prefixes.
+        """
         obj_len = int(obj_bytes[0:DEFAULT_LEN_LENGTH])
         curr = DEFAULT_LEN_LENGTH
         values = {}
@@ -660,9 +1159,476 @@ class DictType(DynamicType[Dict[T, V]]):
         return f"typing.Dict[{self.type_[0]}, {self.type_[1]}]"
 
 
+def _is_legacy_pickle(obj_bytes: Any) -> bool:
+    """
+    Returns true if a serialized `Optional`, `Tuple` or `Union` value is a pickle, as
+    serialized by `ObjectDynamicType` before these types had field types of their own
+    (e.g., in existing HDF5 logs). Pickles of protocol 2 and later start with the
+    PROTO opcode and end with the STOP opcode.
+    """
+    return (
+        len(obj_bytes) > 2
+        and obj_bytes[0] == 0x80
+        and 2 <= obj_bytes[1] <= pickle.HIGHEST_PROTOCOL
+        and obj_bytes[-1] == ord(".")
+    )
+
+
+def _sub_type_isinstance(sub_type: FieldType[Any], obj: Any) -> bool:
+    """
+    Returns true if `obj` conforms to a member type of an `Optional`, `Tuple` or
+    `Union` field type. Ints conform to float types, as they do for pickled fields.
+    """
+    if isinstance(sub_type, FloatType) and isinstance(obj, int):
+        return True
+    return sub_type.isinstance(obj)
+
+
+class OptionalType(StructType[Optional[T]]):
+    """
+    Represents an optional fixed-length field type. Values are serialized as a presence
+    byte followed by the value serialized with the wrapped type; `None` is serialized
+    as zeros.
+
+    Args:
+        sub_type: The field type of the values that are not `None`.
+    """
+
+    sub_type: StructType[T]
+
+    def __init__(self, sub_type: StructType[T]) -> None:
+        self.sub_type = sub_type
+        self._struct = struct.Struct(
+            f"{DEFAULT_BYTE_ORDER.value}?{sub_type.format_string}"
+        )
+        self._none = bytes(self._struct.size)
+
+    @property
+    def format_string(self) -> str:
+        return f"{self._struct.size}s"
+
+    def isinstance(self, obj: Any) -> bool:
+        return obj is None or _sub_type_isinstance(self.sub_type, obj)
+
+    @property
+    def description(self) -> str:
+        return f"typing.Optional[{self.sub_type.description}]"
+
+    def preprocess(self, value: Optional[T]) -> bytes:
+        if value is None:
+            return self._none
+        return self._struct.pack(True, self.sub_type.preprocess(value))
+
+    def postprocess(self, value: bytes) -> Optional[T]:
+        if len(value) != self._struct.size and _is_legacy_pickle(value):
+            return pickle.loads(value)  # type: ignore
+        present, sub_value = self._struct.unpack(value)
+        if not present:
+            return None
+        return self.sub_type.postprocess(sub_value)
+
+    @property
+    def python_type(self) -> Any:
+        return Optional[self.sub_type.python_type]
+
+
+class OptionalDynamicType(DynamicType[Optional[T]]):
+    """
+    Represents an optional dynamic-length field type. Values are serialized as a
+    presence byte followed by the value serialized with the wrapped type.
+
+    Args:
+        sub_type: The field type of the values that are not `None`.
+    """
+
+    sub_type: FieldType[T]
+
+    def __init__(self, sub_type: FieldType[T]) -> None:
+        self.sub_type = sub_type
+
+    def isinstance(self, obj: Any) -> bool:
+        return obj is None or _sub_type_isinstance(self.sub_type, obj)
+
+    @property
+    def description(self) -> str:
+        return f"typing.Optional[{self.sub_type.description}]"
+
+    def preprocess(self, value: Optional[T]) -> bytes:
+        if value is None:
+            return b"\0"
+        return b"\1" + get_packed_value(self.sub_type, value)
+
+    def postprocess(self, obj_bytes: bytes) -> Optional[T]:
+        return self.postprocess_buffer(obj_bytes)
+
+    def postprocess_buffer(self, buffer: Any) -> Optional[T]:
+        buffer = memoryview(buffer)
+        if _is_legacy_pickle(buffer):
+            return pickle.loads(buffer)  # type: ignore
+        if buffer[0] == 0:
+            return None
+        return self.sub_type.postprocess_buffer(buffer[1:])
+
+    @property
+    def python_type(self) -> Any:
+        return Optional[self.sub_type.python_type]
+
+
+class TupleType(StructType[Tuple[Any, ...]]):
+    """
+    Represents a fixed-arity tuple of fixed-length field types. The items are laid out
+    inline, one after another.
+
+    Args:
+        sub_types: The field types of the items.
+    """
+
+    sub_types: Tuple[StructType[Any], ...]
+
+    def __init__(self, sub_types: Sequence[StructType[Any]]) -> None:
+        self.sub_types = tuple(sub_types)
+        self._struct = struct.Struct(
+            DEFAULT_BYTE_ORDER.value
+            + "".join(sub_type.format_string for sub_type in self.sub_types)
+        )
+
+    @property
+    def format_string(self) -> str:
+        return f"{self._struct.size}s"
+
+    def isinstance(self, obj: Any) -> bool:
+        return (
+            isinstance(obj, tuple)
+            and len(obj) == len(self.sub_types)
+            and all(
+                _sub_type_isinstance(sub_type, item)
+                for sub_type, item in zip(self.sub_types, obj)
+            )
+        )
+
+    @property
+    def description(self) -> str:
+        descriptions = ", ".join(sub_type.description for sub_type in self.sub_types)
+        return f"typing.Tuple[{descriptions}]"
+
+    def preprocess(self, value: Tuple[Any, ...]) -> bytes:
+        return self._struct.pack(
+            *(
+                sub_type.preprocess(item)
+                for sub_type, item in zip(self.sub_types, value)
+            )
+        )
+
+    def postprocess(self, value: bytes) -> Tuple[Any, ...]:
+        if len(value) != self._struct.size and _is_legacy_pickle(value):
+            return pickle.loads(value)  # type: ignore
+        return tuple(
+            sub_type.postprocess(item)
+            for sub_type, item in zip(self.sub_types, self._struct.unpack(value))
+        )
+
+    @property
+    def python_type(self) -> type:
+        return tuple
+
+
+class TupleDynamicType(DynamicType[Tuple[Any, ...]]):
+    """
+    Represents a fixed-arity tuple with at least one dynamic-length item type. The
+    items are serialized one after another, each with a `LEN_PREFIX`.
+
+    Args:
+        sub_types: The field types of the items.
+    """
+
+    sub_types: Tuple[FieldType[Any], ...]
+
+    def __init__(self, sub_types: Sequence[FieldType[Any]]) -> None:
+        self.sub_types = tuple(sub_types)
+
+    def isinstance(self, obj: Any) -> bool:
+        return (
+            isinstance(obj, tuple)
+            and len(obj) == len(self.sub_types)
+            and all(
+                _sub_type_isinstance(sub_type, item)
+                for sub_type, item in zip(self.sub_types, obj)
+            )
+        )
+
+    @property
+    def description(self) -> str:
+        descriptions = ", ".join(sub_type.description for sub_type in self.sub_types)
+        return f"typing.Tuple[{descriptions}]"
+
+    def preprocess(self, value: Tuple[Any, ...]) -> bytes:
+        values = []
+        for sub_type, item in zip(self.sub_types, value):
+            packed = get_packed_value(sub_type, item)
+            values.append(LEN_PREFIX.pack(len(packed)))
+            values.append(packed)
+        return b"".join(values)
+
+    def postprocess(self, obj_bytes: bytes) -> Tuple[Any, ...]:
+        if _is_legacy_pickle(obj_bytes) and not self._is_items(obj_bytes):
+            return pickle.loads(obj_bytes)  # type: ignore
+        curr = 0
+        values = []
+        for sub_type in self.sub_types:
+            raw, curr = get_next_item(obj_bytes, curr)
+            values.append(get_unpacked_value(sub_type, raw))
+        return tuple(values)
+
+    def _is_items(self, obj_bytes: bytes) -> bool:
+        """
+        Returns true if the length prefixes of the items in `obj_bytes` add up to its
+        length, i.e., if it was serialized by this type rather than pickled.
+        """
+        curr = 0
+        for _ in self.sub_types:
+            if curr + LEN_PREFIX.size > len(obj_bytes):
+                return False
+            (length,) = LEN_PREFIX.unpack_from(obj_bytes, curr)
+            curr += LEN_PREFIX.size + length
+        return curr == len(obj_bytes)
+
+    @property
+    def python_type(self) -> type:
+        return tuple
+
+
+def _get_union_tag(sub_types: Sequence[FieldType[Any]], obj: Any) -> int:
+    """
+    Returns the index of the member type of a union that `obj` is serialized as: the
+    first member whose Python type is exactly the type of `obj` (so that, e.g., a
+    `bool` is not serialized as an `int`), otherwise the first member that `obj` is an
+    instance of.
+    """
+    for i, sub_type in enumerate(sub_types):
+        if sub_type.python_type is type(obj) and sub_type.isinstance(obj):
+            return i
+    for i, sub_type in enumerate(sub_types):
+        if _sub_type_isinstance(sub_type, obj):
+            return i
+    raise TypeError(f"{obj} is not an instance of any member of the union")
+
+
+class UnionType(StructType[Any]):
+    """
+    Represents a tagged union of fixed-length field types. Values are serialized as
+    the index of their member type followed by the value serialized with that type,
+    padded to the size of the largest member type.
+
+    Args:
+        sub_types: The member types of the union.
+    """
+
+    sub_types: Tuple[StructType[Any], ...]
+
+    def __init__(self, sub_types: Sequence[StructType[Any]]) -> None:
+        assert len(sub_types) <= 256
+        self.sub_types = tuple(sub_types)
+        self._structs = [
+            struct.Struct(DEFAULT_BYTE_ORDER.value + sub_type.format_string)
+            for sub_type in self.sub_types
+        ]
+        self._size = 1 + max(member_struct.size for member_struct in self._structs)
+
+    @property
+    def format_string(self) -> str:
+        return f"{self._size}s"
+
+    def isinstance(self, obj: Any) -> bool:
+        return any(_sub_type_isinstance(sub_type, obj) for sub_type in self.sub_types)
+
+    @property
+    def description(self) -> str:
+        descriptions = ", ".join(sub_type.description for sub_type in self.sub_types)
+        return f"typing.Union[{descriptions}]"
+
+    def preprocess(self, value: Any) -> bytes:
+        tag = _get_union_tag(self.sub_types, value)
+        packed = self._structs[tag].pack(self.sub_types[tag].preprocess(value))
+        return bytes((tag,)) + packed + bytes(self._size - 1 - len(packed))
+
+    def postprocess(self, value: bytes) -> Any:
+        if len(value) != self._size and _is_legacy_pickle(value):
+            return pickle.loads(value)
+        tag = value[0]
+        (sub_value,) = self._structs[tag].unpack_from(value, 1)
+        return self.sub_types[tag].postprocess(sub_value)
+
+    @property
+    def python_type(self) -> type:
+        return object
+
+
+class UnionDynamicType(DynamicType[Any]):
+    """
+    Represents a tagged union with at least one dynamic-length member type. Values are
+    serialized as the index of their member type followed by the value serialized with
+    that type.
+
+    Args:
+        sub_types: The member types of the union.
+    """
+
+    sub_types: Tuple[FieldType[Any], ...]
+
+    def __init__(self, sub_types: Sequence[FieldType[Any]]) -> None:
+        assert len(sub_types) <= 256
+        self.sub_types = tuple(sub_types)
+
+    def isinstance(self, obj: Any) -> bool:
+        return any(_sub_type_isinstance(sub_type, obj) for sub_type in self.sub_types)
+
+    @property
+    def description(self) -> str:
+        descriptions = ", ".join(sub_type.description for sub_type in self.sub_types)
+        return f"typing.Union[{descriptions}]"
+
+    def preprocess(self, value: Any) -> bytes:
+        tag = _get_union_tag(self.sub_types, value)
+        return bytes((tag,)) + get_packed_value(self.sub_types[tag], value)
+
+    def postprocess(self, obj_bytes: bytes) -> Any:
+        return self.postprocess_buffer(obj_bytes)
+
+    def postprocess_buffer(self, buffer: Any) -> Any:
+        buffer = memoryview(buffer)
+        if _is_legacy_pickle(buffer):
+            return pickle.loads(buffer)
+        sub_type = self.sub_types[buffer[0]]
+        if isinstance(sub_type, StructType):
+            return get_unpacked_value(sub_type, bytes(buffer[1:]))
+        return sub_type.postprocess_buffer(buffer[1:])
+
+    @property
+    def python_type(self) -> type:
+        return object
+
+
+# Header of a `DataclassType` field: magic and the type ID of the dataclass
+DATACLASS_HEADER = struct.Struct("<2sQ")
+DATACLASS_MAGIC = b"\x93D"
+
+
+class DataclassCodec(Generic[T]):
+    """
+    Serializes instances of a single dataclass type. The field types are resolved
+    once when the codec is created, and the fixed-length fields are packed with a
+    single precompiled `struct.Struct`. Use `get_dataclass_codec` to get the codec for
+    a type.
+
+    Args:
+        type_: The dataclass type.
+    """
+
+    type_: Type[T]
+    type_id: int
+
+    def __init__(self, type_: Type[T]) -> None:
+        self.type_ = type_
+        self.type_id = get_type_id(type_)
+        fixed_fields = []
+        dynamic_fields = []
+        for field in dataclasses.fields(type_):
+            if field.name in LOCAL_INTERNAL_FIELDS:
+                continue
+            field_type = get_field_type(field.type)
+            if isinstance(field_type, StructType):
+                fixed_fields.append((field, field_type))
+            else:
+                dynamic_fields.append((field, field_type))
+        self.fixed_fields: Tuple[Tuple[dataclasses.Field, StructType[Any]], ...] = tuple(  # type: ignore
+            fixed_fields
+        )
+        self.dynamic_fields: Tuple[Tuple[dataclasses.Field, FieldType[Any]], ...] = tuple(  # type: ignore
+            dynamic_fields
+        )
+        # Use native sizes, as `get_packed_value` does for individual values
+        self.struct = struct.Struct(
+            "@" + "".join(field_type.format_string for _, field_type in fixed_fields)
+        )
+
+    def encode(self, obj: T) -> bytes:
+        values = [
+            DATACLASS_HEADER.pack(DATACLASS_MAGIC, self.type_id),
+            self.struct.pack(
+                *(
+                    field_type.preprocess(getattr(obj, field.name))
+                    for field, field_type in self.fixed_fields
+                )
+            ),
+        ]
+        for field, field_type in self.dynamic_fields:
+            value = get_packed_value(field_type, getattr(obj, field.name))
+            values.append(LEN_PREFIX.pack(len(value)))
+            values.append(value)
+        return b"".join(values)
+
+    def decode(self, obj_bytes: bytes) -> T:
+        curr = DATACLASS_HEADER.size
+        values = self.struct.unpack_from(obj_bytes, curr)
+        curr += self.struct.size
+        init_values = {}
+        non_init_values = {}
+        for (field, field_type), value in zip(self.fixed_fields, values):
+            value = field_type.postprocess(value)
+            if field.init:
+                init_values[field.name] = value
+            else:
+                non_init_values[field.name] = value
+        for field, field_type in self.dynamic_fields:
+            raw, curr = get_next_item(obj_bytes, curr)
+            value = get_unpacked_value(field_type, raw)
+            if field.init:
+                init_values[field.name] = value
+            else:
+                non_init_values[field.name] = value
+        obj = self.type_(**init_values)  # type: ignore
+        for field_name, value in non_init_values.items():
+            setattr(obj, field_name, value)
+        return obj
+
+
+_DATACLASS_CODECS: Dict[type, DataclassCodec[Any]] = {}
+_DATACLASS_CODECS_BY_ID: Dict[int, DataclassCodec[Any]] = {}
+
+
+def get_type_id(type_: type) -> int:
+    """
+    Returns a 64-bit ID for a type that is stable across processes, derived from the
+    type's fully qualified name.
+
+    Args:
+        type_: The type to get an ID for.
+    """
+    full_name = f"{type_.__module__}.{type_.__qualname__}"
+    digest = hashlib.sha256(full_name.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def get_dataclass_codec(type_: Type[T]) -> DataclassCodec[T]:
+    """
+    Returns the codec for a dataclass type, creating it on first use.
+
+    Args:
+        type_: The dataclass type.
+    """
+    codec = _DATACLASS_CODECS.get(type_)
+    if codec is None:
+        codec = DataclassCodec(type_)
+        _DATACLASS_CODECS[type_] = codec
+        _DATACLASS_CODECS_BY_ID[codec.type_id] = codec
+    return codec
+
+
 class DataclassType(DynamicType[T]):
     """
-    Represents a dataclass dynamic field type.
+    Represents a dataclass dynamic field type. Values are serialized with a
+    `DataclassCodec`, prefixed by the type ID of the value's type so that instances of
+    subclasses can be decoded.
     """
 
     type_: Type[T]
@@ -678,20 +1644,37 @@ class DataclassType(DynamicType[T]):
         return isinstance(obj, self.type_)
 
     def preprocess(self, obj: T) -> bytes:
-        type_ = pickle.dumps(type(obj))
-        type_len = get_len_bytes(type_)
-        values = [type_len, type_]
-        for field in dataclasses.fields(obj):
-            if field.name in LOCAL_INTERNAL_FIELDS:
-                continue
-            sub_type = get_field_type(field.type)
-            value = get_packed_value(sub_type, getattr(obj, field.name))
-            value_len = get_len_bytes(value)
-            values.append(value_len)
-            values.append(value)
-        return b"".join(values)
+        return get_dataclass_codec(type(obj)).encode(obj)
 
     def postprocess(self, obj_bytes: bytes) -> T:
+        if obj_bytes[: len(DATACLASS_MAGIC)] != DATACLASS_MAGIC:
+            return self._postprocess_legacy(obj_bytes)
+        _, type_id = DATACLASS_HEADER.unpack_from(obj_bytes)
+        codec = _DATACLASS_CODECS_BY_ID.get(type_id)
+        if codec is None:
+            codec = self._find_codec(type_id)
+        return codec.decode(obj_bytes)  # type: ignore
+
+    def _find_codec(self, type_id: int) -> DataclassCodec[Any]:
+        """
+        Finds the codec for a type ID that has not been seen by this process yet. The
+        type must be this field's type or one of its subclasses.
+        """
+        candidates = [self.type_]
+        while len(candidates) > 0:
+            candidate = candidates.pop()
+            if get_type_id(candidate) == type_id:
+                return get_dataclass_codec(candidate)
+            candidates.extend(candidate.__subclasses__())
+        raise LabgraphError(
+            f"Could not find a subclass of {self.type_.__name__} with type ID {type_id}"
+        )
+
+    def _postprocess_legacy(self, obj_bytes: bytes) -> T:
+        """
+        Decodes a value serialized in the format used before `DATACLASS_HEADER`: a
+        pickled type followed by each field, with decimal length prefixes.
+        """
         raw, curr = get_next_bytes(obj_bytes, 0)
         type_ = pickle.loads(raw)
         init_values = {}
@@ -722,9 +1705,133 @@ PRIMITIVE_TYPES = {
     str: StrDynamicType,
     bool: BoolType,
     bytes: BytesDynamicType,
+    BytesView: BytesViewType,
+    StrView: StrViewType,
 }
 
 
+class CompressionCodec(int, Enum):
+    """
+    Represents the codec of a serialized `CompressedType` field.
+    """
+
+    STORED = 0  # Not compressed, because compression did not reduce the size
+    ZLIB = 1
+
+
+# Header of a serialized `CompressedType` field: magic, codec, and size of the
+# uncompressed data
+COMPRESSED_HEADER = struct.Struct("<2sBQ")
+COMPRESSED_MAGIC = b"\x93Z"
+DEFAULT_COMPRESSION_LEVEL = 1
+
+
+class CompressedType(DynamicType[T]):
+    """
+    Represents a field type whose values are serialized with another field type, then
+    compressed with zlib. Fields of this type are decompressed when they are first
+    read. Data that does not compress is stored as is.
+
+    The serialized field records the size of the uncompressed data, available from
+    `get_sizes`.
+
+    Args:
+        sub_type: The field type that serializes the values.
+        level:
+            The zlib compression level, from 0 (no compression) to 9 (best
+            compression). Defaults to `DEFAULT_COMPRESSION_LEVEL`, which favors speed.
+    """
+
+    sub_type: FieldType[T]
+    level: int
+
+    def __init__(
+        self, sub_type: FieldType[T], level: int = DEFAULT_COMPRESSION_LEVEL
+    ) -> None:
+        if not 0 <= level <= 9:
+            raise ValueError(f"Invalid compression level {level} (expected 0-9)")
+        self.sub_type = sub_type
+        self.level = level
+        if isinstance(sub_type, StructType):
+            self._struct: Optional[struct.Struct] = struct.Struct(
+                DEFAULT_BYTE_ORDER.value + sub_type.format_string
+            )
+        else:
+            self._struct = None
+        self._passthrough = type(sub_type).postprocess is FieldType.postprocess
+
+    @property
+    def python_type(self) -> type:
+        return self.sub_type.python_type
+
+    def isinstance(self, obj: Any) -> bool:
+        return self.sub_type.isinstance(obj)
+
+    @property
+    def description(self) -> str:
+        return f"Compressed[{self.sub_type.description}]"
+
+    def preprocess(self, value: T) -> bytes:
+        raw = self.sub_type.preprocess(value)
+        if self._struct is not None:
+            raw = self._struct.pack(raw)
+        compressed = zlib.compress(raw, self.level)
+        if len(compressed) < len(raw):
+            codec = CompressionCodec.ZLIB
+        else:
+            codec, compressed = CompressionCodec.STORED, raw
+        return COMPRESSED_HEADER.pack(COMPRESSED_MAGIC, codec, len(raw)) + compressed
+
+    def postprocess(self, value: Any) -> T:
+        buffer = memoryview(value)
+        magic, codec, raw_size = COMPRESSED_HEADER.unpack_from(buffer)
+        if magic != COMPRESSED_MAGIC:
+            raise LabgraphError("Invalid compressed field")
+        payload = buffer[COMPRESSED_HEADER.size :]
+        raw: Any
+        if codec == CompressionCodec.ZLIB:
+            raw = zlib.decompress(payload, bufsize=max(raw_size, 1))
+        elif codec == CompressionCodec.STORED:
+            raw = payload
+        else:
+            raise LabgraphError(f"Unknown compression codec {codec}")
+        if self._struct is not None:
+            return self.sub_type.postprocess(self._struct.unpack(raw)[0])
+        if self._passthrough:
+            return bytes(raw)  # type: ignore
+        return self.sub_type.postprocess_buffer(raw)
+
+    def postprocess_buffer(self, buffer: Any) -> T:
+        return self.postprocess(buffer)
+
+    def get_sizes(self, value: Any) -> Tuple[int, int]:
+        """
+        Returns the size of a serialized field of this type and the size of its data
+        before compression, without decompressing it.
+
+        Args:
+            value: A serialized field of this type, e.g. a dynamic parameter buffer.
+        """
+        buffer = memoryview(value)
+        _, _, raw_size = COMPRESSED_HEADER.unpack_from(buffer)
+        return buffer.nbytes, raw_size
+
+
+class Compressed:
+    """
+    Annotation for compressed message fields. `Compressed[T]` is a `CompressedType`
+    field that serializes values with the field type for `T` (e.g., `np.ndarray` or
+    `bytes`), and `Compressed[T, level]` also sets the zlib compression level.
+    """
+
+    def __class_getitem__(cls, params: Any) -> CompressedType[Any]:
+        if isinstance(params, tuple):
+            python_type, level = params
+        else:
+            python_type, level = params, DEFAULT_COMPRESSION_LEVEL
+        return CompressedType(get_field_type(python_type), level=level)
+
+
 def get_field_type(python_type: Type[T]) -> FieldType[T]:
     """
     Returns a `FieldType` that contains all the information Labgraph needs for a field.
@@ -738,15 +1845,32 @@ def get_field_type(python_type: Type[T]) -> FieldType[T]:
     if python_type.__module__ == "typing":
         # TODO: Switch to `typing.get_origin` for py38
         origin = getattr(python_type, "__origin__", None)
+        if not hasattr(python_type, "__args__"):
+            # Unparameterized generic, e.g., `typing.Dict`
+            return ObjectDynamicType()
         if origin in (list, List):
             # TODO: Switch to `typing.get_args` for py38
             return ListType(python_type.__args__[0])  # type: ignore
         elif origin in (dict, Dict):
             # TODO: Switch to `typing.get_args` for py38
             return DictType(python_type.__args__)  # type: ignore
+        elif origin is Union:
+            return get_union_field_type(python_type.__args__)  # type: ignore
+        elif origin in (tuple, Tuple):
+            args = python_type.__args__  # type: ignore
+            if len(args) > 0 and Ellipsis not in args and args != ((),):
+                sub_types = [get_field_type(arg) for arg in args]
+                if all(isinstance(sub_type, StructType) for sub_type in sub_types):
+                    return TupleType(sub_types)  # type: ignore
+                return TupleDynamicType(sub_types)
         return ObjectDynamicType()
     elif not isinstance(python_type, type):
         return ObjectDynamicType()
+    elif hasattr(python_type, "__message_fields__"):
+        # Imported here because the message module depends on this one
+        from .message import MessageFieldType
+
+        return MessageFieldType(python_type)
     elif dataclasses.is_dataclass(python_type):
         return DataclassType(python_type)
     elif issubclass(python_type, Enum):
@@ -766,6 +1890,65 @@ def get_field_type(python_type: Type[T]) -> FieldType[T]:
     return ObjectDynamicType()
 
 
+def get_union_field_type(args: Sequence[Any]) -> FieldType[Any]:
+    """
+    Returns the `FieldType` for a `typing.Union` (including `typing.Optional`) of the
+    provided Python types.
+
+    Args:
+        args: The Python types in the union.
+    """
+    sub_types = [get_field_type(arg) for arg in args if arg is not type(None)]
+    sub_type: FieldType[Any]
+    if len(sub_types) == 1:
+        sub_type = sub_types[0]
+        if isinstance(sub_type, ObjectDynamicType):
+            # Pickling handles `None` already
+            return sub_type
+    elif all(isinstance(member, StructType) for member in sub_types):
+        sub_type = UnionType(sub_types)  # type: ignore
+    else:
+        sub_type = UnionDynamicType(sub_types)
+    if len(sub_types) == len(args):
+        return sub_type
+    if isinstance(sub_type, StructType):
+        return OptionalType(sub_type)
+    return OptionalDynamicType(sub_type)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_numpy_dtype_code(dtype: np.dtype) -> bytes:
+    """
+    Returns the code for a numpy dtype used by `NumpyDynamicType`'s header: the repr of
+    the dtype's `.npy` format descriptor.
+    """
+    return repr(np.lib.format.dtype_to_descr(dtype)).encode("ascii")
+
+
+@functools.lru_cache(maxsize=None)
+def _get_numpy_dtype(dtype_code: bytes) -> np.dtype:
+    """
+    Returns the numpy dtype for a code created by `_get_numpy_dtype_code`.
+    """
+    return np.lib.format.descr_to_dtype(ast.literal_eval(dtype_code.decode("ascii")))
+
+
+def _get_contiguous_strides(
+    shape: Tuple[int, ...], itemsize: int, order: NumpyOrder
+) -> Tuple[int, ...]:
+    """
+    Returns the strides of a contiguous array with the given shape, item size, and
+    order.
+    """
+    strides = []
+    stride = itemsize
+    dims = shape if order == NumpyOrder.F else reversed(shape)
+    for dim in dims:
+        strides.append(stride)
+        stride *= dim
+    return tuple(strides if order == NumpyOrder.F else reversed(strides))
+
+
 def get_len_bytes(obj: Any) -> bytes:
     return bytes(str(len(obj)).rjust(DEFAULT_LEN_LENGTH, "0"), encoding="ascii")
 
@@ -778,6 +1961,18 @@ def get_next_bytes(obj: bytes, curr: int) -> Tuple[bytes, int]:
     return (raw, curr)
 
 
+def get_next_item(obj: bytes, curr: int) -> Tuple[bytes, int]:
+    """
+    Returns the next item of a serialized container that has a `LEN_PREFIX`, and the
+    position following it.
+    """
+    (length,) = LEN_PREFIX.unpack_from(obj, curr)
+    curr += LEN_PREFIX.size
+    raw = obj[curr : curr + length]
+    curr += length
+    return (raw, curr)
+
+
 def get_packed_value(type_: FieldType[T], value: Any) -> bytes:
     value = type_.preprocess(value)
     if isinstance(type_, StructType):
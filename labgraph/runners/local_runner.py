@@ -10,6 +10,7 @@ import sys
 import threading
 import time
 import traceback
+from collections import deque
 from dataclasses import dataclass, field
 from typing import (
     Any,
@@ -17,9 +18,12 @@ from typing import (
     Awaitable,
     Callable,
     Coroutine,
+    Deque,
     Dict,
+    Generator,
     List,
     Optional,
+    Sequence,
     Tuple,
     Type,
 )
@@ -40,8 +44,9 @@ from .._cthulhu.cthulhu import (
 from ..graphs.cpp_node import CPPNode
 from ..graphs.method import SubscriberType, Transformer
 from ..graphs.module import Module
-from ..graphs.topic import PATH_DELIMITER, Topic
+from ..graphs.topic import PATH_DELIMITER, OverflowPolicy, Topic
 from ..messages.message import Message
+from ..util.error import LabgraphError
 from ..util.logger import get_logger
 from .cthulhu import create_module_streams
 from .exceptions import ExceptionMessage, NormalTermination
@@ -56,10 +61,34 @@ BARRIER_TIMEOUT = 60
 ASYNCIO_SHUTDOWN_POLL_TIME = 1
 ASYNCIO_SHUTDOWN_TIME = 10
 DEFAULT_QUEUE_CAPACITY = 10000
+# The capacity of a Cthulhu consumer's queue that never drops samples
+UNBOUNDED_CONSUMER_QUEUE_CAPACITY = 2 ** 64 - 1
+QUEUE_BLOCK_POLL_TIME = 0.1
+BATCH_FLUSH_TIME = 0.01
 
 EXCEPTION_STREAM_SUFFIX = "_EXCEPTION"
 
 
+@dataclass
+class SubscriberQueueStats:
+    """
+    Counters for the queue of messages waiting for a subscriber.
+
+    Args:
+        dropped: The number of messages dropped because the queue was full.
+        high_water_mark: The most messages that have been in the queue at once.
+        stream_dropped:
+            The number of samples dropped by the Cthulhu consumer of the subscriber's
+            stream, before they reached the queue of any subscriber to the stream.
+            The consumer holds at least `DEFAULT_QUEUE_CAPACITY` samples, and never
+            drops samples of a stream with a subscriber whose policy is `BLOCK`.
+    """
+
+    dropped: int = 0
+    high_water_mark: int = 0
+    stream_dropped: int = 0
+
+
 @dataclass
 class LocalRunnerState:
     """
@@ -79,6 +108,10 @@ class LocalRunnerState:
             has completed all its startup tasks.
         setup_complete: A flag indicating whether setup is complete for this module.
         cleanup_started: A flag indicating whether cleanup has started for this module.
+        stop_loop:
+            Stops the background thread's event loop; can be called from any thread.
+            Set by the background thread while its event loop may run.
+        queue_stats: The counters for each subscriber's queue, by subscriber path.
     """
 
     lock: threading.Lock = field(default_factory=threading.Lock)
@@ -91,6 +124,8 @@ class LocalRunnerState:
     ready_event: threading.Event = field(default_factory=threading.Event)
     setup_complete: bool = False
     cleanup_started: bool = False
+    stop_loop: Optional[Callable[[], None]] = None
+    queue_stats: Dict[str, SubscriberQueueStats] = field(default_factory=dict)
 
 
 class LocalRunner(Runner):
@@ -120,6 +155,7 @@ class LocalRunner(Runner):
         self._options = options or RunnerOptions()
 
         self._running = False
+        self._state = LocalRunnerState()
         self._exception: Optional[BaseException] = None
         self._handled_exception: bool = False
 
@@ -197,7 +233,7 @@ class LocalRunner(Runner):
         except BaseException:
             self._handle_exception()
         finally:
-            self._running = False
+            self._stop()
             if self._options.bootstrap_info is not None:
                 # Signal that this process is ready
                 self._options.bootstrap_info.process_manager_state.update(
@@ -226,6 +262,19 @@ class LocalRunner(Runner):
                             f"{format_performance_summary(performance_summary)}"
                         )
 
+            for subscriber_path, stats in self.queue_stats.items():
+                if stats.dropped > 0:
+                    logger.warning(
+                        f"{self._module}:{subscriber_path} dropped {stats.dropped} "
+                        f"messages (queue high-water mark {stats.high_water_mark})"
+                    )
+                if stats.stream_dropped > 0:
+                    logger.warning(
+                        f"{self._module}:{subscriber_path} missed "
+                        f"{stats.stream_dropped} messages dropped by its stream's "
+                        "consumer"
+                    )
+
             logger.debug(f"{self._module}:terminating")
 
             if self._options.bootstrap_info is not None:
@@ -238,6 +287,24 @@ class LocalRunner(Runner):
                 if self._exception is not None:
                     raise self._exception
 
+    @property
+    def queue_stats(self) -> Dict[str, SubscriberQueueStats]:
+        """
+        The counters for the queue of each subscriber in the module, by subscriber
+        path.
+        """
+        with self._state.lock:
+            consumers = dict(self._state.consumers)
+        for subscriber_path, stats in self._state.queue_stats.items():
+            stream_id = self._module._stream_for_topic_path(
+                self._module.subscribers[subscriber_path].subscribed_topic_path
+            ).id
+            consumer = consumers.get(stream_id)
+            if consumer is not None:
+                summary = consumer.get_performance_summary()
+                stats.stream_dropped = summary.num_samples_dropped
+        return self._state.queue_stats
+
     def _setup_cthulhu(self) -> None:
         """
         Sets up Cthulhu as the transport for the Labgraph graph. Creates streams only
@@ -345,8 +412,8 @@ class LocalRunner(Runner):
     def _callback_for_stream(self, stream_id: str) -> Callable[..., None]:
         """
         Returns a callback for the given stream id. The actual callbacks are registered
-        in the `LocalRunner`'s state object by the asyncio thread. This returns a
-        callback that looks up the registered callback and then calls it.
+        in the `LocalRunner`'s state object by the asyncio thread before Cthulhu is set
+        up. This returns a callback that calls the registered callback.
         """
         # Typing `callback` with `MessageType` allows us to know how to deserialize
         # the incoming message in shared memory
@@ -357,13 +424,126 @@ class LocalRunner(Runner):
             # Type with extra information for the aligner
             MessageType = LabgraphCallbackParams[MessageType]  # type: ignore
 
+        with self._state.lock:
+            callback_fn = self._state.callbacks[stream_id]
+
+        if self._is_batched_stream(stream_id):
+
+            def batch_callback(messages: List[MessageType]) -> None:  # type: ignore
+                callback_fn(messages)
+
+            return batch_callback
+
         def callback(message: MessageType) -> None:  # type: ignore
-            with self._state.lock:
-                callback_fn = self._state.callbacks[stream_id]
             callback_fn(message)
 
         return callback
 
+    def _get_queue_settings(
+        self, subscriber_path: str
+    ) -> Tuple[Optional[int], OverflowPolicy]:
+        """
+        Returns the queue capacity and overflow policy of a subscriber, falling back to
+        those of the topic it subscribes to.
+        """
+        subscriber = self._module.subscribers[subscriber_path]
+        topic = self._module.__topics__[subscriber.subscribed_topic_path]
+        capacity = subscriber.queue_capacity
+        if capacity is None:
+            capacity = topic.queue_capacity
+        policy = (
+            subscriber.overflow_policy
+            or topic.overflow_policy
+            or OverflowPolicy.DROP_OLDEST
+        )
+        return capacity, policy
+
+    def _is_inline_subscriber(self, subscriber_path: str) -> bool:
+        """
+        Returns whether a subscriber is called directly in the thread that receives its
+        messages: if it is marked inline, or if `RunnerOptions.inline_subscribers` is
+        set and it is a plain subscriber, i.e., not async, batched or a transformer,
+        and with no queue capacity or overflow policy of its own or of its topic.
+        """
+        subscriber = self._module.subscribers[subscriber_path]
+        if subscriber.inline:
+            return True
+        if (
+            not self._options.inline_subscribers
+            or subscriber.batch
+            or isinstance(subscriber, Transformer)
+        ):
+            return False
+        topic = self._module.__topics__[subscriber.subscribed_topic_path]
+        return (
+            subscriber.queue_capacity is None
+            and subscriber.overflow_policy is None
+            and topic.queue_capacity is None
+            and topic.overflow_policy is None
+            and not inspect.iscoroutinefunction(
+                self._module._get_subscriber_method(subscriber_path)
+            )
+        )
+
+    def _get_consumer_queue_capacity(self, stream_id: str) -> int:
+        """
+        Returns the capacity of the Cthulhu consumer's queue for a stream. The consumer
+        drops its oldest samples beyond this capacity, which `SubscriberQueueStats`
+        counts as `stream_dropped`, so it is at least `DEFAULT_QUEUE_CAPACITY` and the
+        largest queue capacity of the stream's subscribers: the subscribers' queues
+        apply their own overflow policies. It is unbounded if a subscriber's queue
+        blocks when full, since the consumer then holds the samples that arrive while
+        the subscriber is blocked.
+        """
+        stream = self._module.__streams__[stream_id]
+        capacity = DEFAULT_QUEUE_CAPACITY
+        for subscriber_path, subscriber in self._module.subscribers.items():
+            if subscriber.subscribed_topic_path in stream.topic_paths:
+                subscriber_capacity, policy = self._get_queue_settings(subscriber_path)
+                if policy == OverflowPolicy.BLOCK:
+                    return UNBOUNDED_CONSUMER_QUEUE_CAPACITY
+                if subscriber_capacity is not None:
+                    capacity = max(capacity, subscriber_capacity)
+        return capacity
+
+    def _get_consumer_batch_limits(
+        self, stream_id: str
+    ) -> Optional[Tuple[Optional[int], Optional[float]]]:
+        """
+        Returns the `max_batch_size` and `max_wait` that the Cthulhu consumer of a
+        stream applies to the batches it passes on, or None if it passes on all of the
+        samples drained from its queue. The consumer applies the limits when every
+        subscriber to the stream is batched with the same limits; otherwise each
+        batched subscriber collects its own batches, so the others are not held up.
+        """
+        if not self._is_batched_stream(stream_id):
+            return None
+        stream = self._module.__streams__[stream_id]
+        limits = set()
+        for subscriber_path, subscriber in self._module.subscribers.items():
+            if subscriber.subscribed_topic_path in stream.topic_paths:
+                if not subscriber.batch or self._is_inline_subscriber(subscriber_path):
+                    return None
+                limits.add((subscriber.max_batch_size, subscriber.max_wait))
+        if len(limits) != 1:
+            return None
+        return limits.pop()
+
+    def _is_batched_stream(self, stream_id: str) -> bool:
+        """
+        Returns whether the consumer of a stream passes lists of messages to the
+        stream's callback, i.e., whether the stream has a batched subscriber. Streams
+        are not batched when using an aligner, which takes one message at a time.
+        """
+        if self._options.aligner is not None:
+            return False
+        stream = self._module.__streams__[stream_id]
+        return any(
+            subscriber.batch
+            for subscriber in self._module.subscribers.values()
+            if subscriber.subscribed_topic_path in stream.topic_paths
+        )
+
     def _create_consumers(self) -> None:
         """
         Creates a Cthulhu `StreamConsumer` for every stream subscribed to in this
@@ -393,13 +573,21 @@ class LocalRunner(Runner):
                 f"Cthulhu stream for topic {root_topic_path} ({root_stream_id}) was "
                 "not created"
             )
+            callback = self._callback_for_stream(local_stream_id)
+            batched = self._is_batched_stream(local_stream_id)
             consumer = Consumer(
                 stream_interface=cthulhu_stream,
-                sample_callback=self._callback_for_stream(local_stream_id),
+                sample_callback=None if batched else callback,
                 mode=Mode.ASYNC,
                 stream_id=local_stream_id,
+                batch_callback=callback if batched else None,
             )
-            consumer.queue_capacity = DEFAULT_QUEUE_CAPACITY
+            consumer.queue_capacity = self._get_consumer_queue_capacity(local_stream_id)
+            batch_limits = self._get_consumer_batch_limits(local_stream_id)
+            if batch_limits is not None:
+                max_batch_size, max_wait = batch_limits
+                consumer.max_batch_size = max_batch_size or 0
+                consumer.max_batch_wait = max_wait or 0.0
             with self._state.lock:
                 self._state.consumers[local_stream_id] = consumer
 
@@ -430,13 +618,24 @@ class LocalRunner(Runner):
                 for child_module in module.__children__.values():
                     cleanup_stack.append(child_module)
 
+    def _stop(self) -> None:
+        """
+        Stops the module: the background thread's event loop returns once it has
+        finished running its current callback. Can be called from any thread.
+        """
+        self._running = False
+        with self._state.lock:
+            stop_loop = self._state.stop_loop
+        if stop_loop is not None:
+            stop_loop()
+
     def _handle_exception(self) -> None:
         if self._handled_exception:
             return
         else:
             self._handled_exception = True
 
-        self._running = False
+        self._stop()
 
         _, exception, _ = sys.exc_info()
 
@@ -473,6 +672,19 @@ class _AsyncThread(threading.Thread):
         self.options = runner._options or RunnerOptions()
         self.state = runner._state
         self.original_stream_types = self.get_original_stream_types()
+        # The producer for each of the module's topics, by the `id()` of the topic;
+        # filled in once the main thread has created the producers
+        self.producers_by_topic: Dict[int, Producer] = {}
+        # The batchers of the module's batched subscribers, which are flushed when the
+        # event loop stops
+        self.batchers: List[_SubscriberBatcher] = []
+        # The lock held while running the code of a node with inline subscribers, by
+        # node path. Reentrant, since a node's code may call its own subscribers.
+        self.node_locks: Dict[str, threading.RLock] = {
+            subscriber_path.rpartition(PATH_DELIMITER)[0]: threading.RLock()
+            for subscriber_path in self.module.subscribers.keys()
+            if runner._is_inline_subscriber(subscriber_path)
+        }
 
     def run(self) -> None:
         """
@@ -500,23 +712,42 @@ class _AsyncThread(threading.Thread):
             # Create callback methods that run in the event loop
             with self.state.lock:
                 for stream in self.module.__streams__.values():
-                    callbacks = []
+                    queues = []
+                    inline_callbacks = []
                     for subscriber_path, subscriber in self.module.subscribers.items():
                         if subscriber.subscribed_topic_path in stream.topic_paths:
-                            if isinstance(subscriber, Transformer):
-                                callbacks.append(
-                                    self.wrap_transformer_callback(
-                                        transformer_path=subscriber_path, loop=loop
+                            if self.runner._is_inline_subscriber(subscriber_path):
+                                inline_callbacks.append(
+                                    self.wrap_inline_subscriber_callback(
+                                        subscriber_path=subscriber_path, loop=loop
                                     )
                                 )
+                                continue
+                            callback: Callable[..., Any]
+                            if isinstance(subscriber, Transformer):
+                                callback = self.wrap_transformer_callback(
+                                    transformer_path=subscriber_path, loop=loop
+                                )
+                            elif subscriber.batch:
+                                callback = self.wrap_batch_subscriber_callback(
+                                    subscriber_path=subscriber_path, loop=loop
+                                )
                             else:
-                                callbacks.append(
-                                    self.wrap_subscriber_callback(
-                                        subscriber_path=subscriber_path, loop=loop
-                                    )
+                                callback = self.wrap_subscriber_callback(
+                                    subscriber_path=subscriber_path, loop=loop
                                 )
+                            queues.append(
+                                self.create_subscriber_queue(subscriber_path, callback)
+                            )
 
-                    stream_callback = self.wrap_all_callbacks(callbacks, loop=loop)
+                    if self.runner._is_batched_stream(stream.id):
+                        stream_callback = self.wrap_all_batch_callbacks(
+                            tuple(queues), loop=loop, inline_callbacks=inline_callbacks
+                        )
+                    else:
+                        stream_callback = self.wrap_all_callbacks(
+                            tuple(queues), loop=loop, inline_callbacks=inline_callbacks
+                        )
 
                     if self.options.aligner is not None:
                         # Inject aligner into callback if present
@@ -531,6 +762,7 @@ class _AsyncThread(threading.Thread):
 
             # Thread event: wait for main thread to set up Cthulhu
             self.state.ready_event.wait()
+            self.producers_by_topic = self.get_producers_by_topic()
 
             # Schedule startup coroutines in event loop
             for awaitable in self.get_startup_methods():
@@ -543,17 +775,50 @@ class _AsyncThread(threading.Thread):
 
             logger.debug(f"{self.module}:background thread:run event loop")
 
+            # Other threads stop the event loop by scheduling a callback in it, which
+            # wakes the loop up. The callback is ignored once `run_forever` returns,
+            # so that it cannot stop the loop while it shuts down.
+            running_forever = False
+
+            def stop() -> None:
+                if running_forever:
+                    loop.stop()
+
+            with self.state.lock:
+                self.state.stop_loop = functools.partial(
+                    loop.call_soon_threadsafe, stop
+                )
+
             with contextlib.ExitStack() as run_stack:
                 if "PROFILE" in os.environ:
                     # Run yappi profiling
                     run_stack.enter_context(yappi.run())
 
-                # Run event loop
-                while self.runner._running:
-                    loop.run_until_complete(asyncio.sleep(0.01))
+                # Run event loop until the runner stops
+                running_forever = True
+                if self.runner._running:
+                    loop.run_forever()
+                running_forever = False
         except BaseException:
             logger.debug(f"{self.module}:handling exception in background thread")
             self.runner._handle_exception()
+        finally:
+            running_forever = False
+            with self.state.lock:
+                self.state.stop_loop = None
+
+        # Pass on the messages of batches that were still waiting to be filled: the
+        # consumers that wait for batches pass theirs on when they next drain their
+        # queues, and the event loop runs the subscribers in the meantime
+        if len(self.batchers) > 0:
+            with self.state.lock:
+                consumers = list(self.state.consumers.values())
+            for consumer in consumers:
+                if consumer.max_batch_wait > 0:
+                    consumer.max_batch_wait = 0.0
+            for batcher in self.batchers:
+                batcher.flush()
+            loop.run_until_complete(asyncio.sleep(BATCH_FLUSH_TIME))
 
         if not self.state.cleanup_started and self.state.setup_complete:
             # The main thread may not be able to run cleanup if it is blocked by a
@@ -642,60 +907,155 @@ class _AsyncThread(threading.Thread):
     async def run_publisher_method(
         self, publisher_method: Callable[[], AsyncIterable[Tuple[Topic, Message]]]
     ) -> None:
-        import asyncio
-
+        producers_by_topic = self.producers_by_topic
         async for topic, message in publisher_method():
-            topic_path = self.module._get_topic_path(topic)
-            stream = self.module._stream_for_topic_path(topic_path)
-            producer = self.state.producers[stream.id]
+            producer = producers_by_topic.get(id(topic))
+            if producer is None:
+                producer = self.get_producer(topic)
             producer.produce_message(message)
 
+    def get_producers_by_topic(self) -> Dict[int, Producer]:
+        """
+        Returns the producer for each of the module's topics, by the `id()` of the
+        topic, so that publishing a message does not look up the topic's stream.
+        """
+        producers_by_topic = {}
+        with self.state.lock:
+            for stream in self.module.__streams__.values():
+                producer = self.state.producers.get(stream.id)
+                if producer is None:
+                    continue
+                for topic_path in stream.topic_paths:
+                    topic = self.module.__topics__[topic_path]
+                    producers_by_topic[id(topic)] = producer
+        return producers_by_topic
+
+    def get_producer(self, topic: Topic) -> Producer:
+        """
+        Returns the producer for a topic by looking up the topic's stream. Raises an
+        error if the topic is not in the module.
+        """
+        topic_path = self.module._get_topic_path(topic)
+        stream = self.module._stream_for_topic_path(topic_path)
+        return self.state.producers[stream.id]
+
     def get_publisher_methods(
         self,
     ) -> List[Callable[[], AsyncIterable[Tuple[Topic, Message]]]]:
         return [
-            self.module._get_publisher_method(publisher_path)
+            self.lock_publisher_method(
+                publisher_path, self.module._get_publisher_method(publisher_path)
+            )
             for publisher_path, publisher in self.module.publishers.items()
             # Transformers don't run on graph startup
             if not isinstance(publisher, Transformer)
         ]
 
     def get_background_methods(self) -> List[Awaitable[None]]:
-        return [
-            self.module._get_background_method(background_path)()
-            for background_path in self.module.backgrounds.keys()
-        ]
+        awaitables: List[Awaitable[None]] = []
+        for background_path in self.module.backgrounds.keys():
+            awaitable = self.module._get_background_method(background_path)()
+            lock = self.get_node_lock(background_path)
+            if lock is not None:
+                awaitable = _NodeLockedAwaitable(awaitable, lock)
+            awaitables.append(awaitable)
+        return awaitables
+
+    def get_node_lock(self, method_path: str) -> Optional[threading.RLock]:
+        """
+        Returns the lock of the node with a method, if the node has inline
+        subscribers.
+
+        Args:
+            method_path: The path to the method.
+        """
+        return self.node_locks.get(method_path.rpartition(PATH_DELIMITER)[0])
+
+    def lock_publisher_method(
+        self,
+        publisher_path: str,
+        publisher_method: Callable[[], AsyncIterable[Tuple[Topic, Message]]],
+    ) -> Callable[[], AsyncIterable[Tuple[Topic, Message]]]:
+        """
+        Returns a publisher method (or a transformer method applied to a message) that
+        holds its node's lock whenever it runs, if the node has inline subscribers.
+        The lock is released while the method awaits.
+
+        Args:
+            publisher_path: The path to the @publisher-decorated method.
+            publisher_method: The method to lock.
+        """
+        lock = self.get_node_lock(publisher_path)
+        if lock is None:
+            return publisher_method
+
+        async def locked_publisher_method() -> AsyncIterable[Tuple[Topic, Message]]:
+            publisher = publisher_method().__aiter__()
+            try:
+                while True:
+                    try:
+                        yield await _NodeLockedAwaitable(
+                            publisher.__anext__(), lock  # type: ignore
+                        )
+                    except StopAsyncIteration:
+                        return
+            finally:
+                await _NodeLockedAwaitable(publisher.aclose(), lock)  # type: ignore
+
+        return locked_publisher_method
+
+    def get_subscriber_method(self, subscriber_path: str) -> Callable[..., Any]:
+        """
+        Returns a subscriber's method, which holds its node's lock whenever it runs if
+        the node has inline subscribers. The lock is released while an async
+        subscriber awaits.
+
+        Args:
+            subscriber_path: The path to the @subscriber-decorated method.
+        """
+        subscriber_method = self.module._get_subscriber_method(subscriber_path)
+        lock = self.get_node_lock(subscriber_path)
+        if lock is None:
+            return subscriber_method
+
+        if inspect.iscoroutinefunction(subscriber_method):
+
+            async def locked_async_subscriber_method(*args: Any) -> None:
+                await _NodeLockedAwaitable(subscriber_method(*args), lock)
+
+            return locked_async_subscriber_method
+
+        def locked_subscriber_method(*args: Any) -> None:
+            with lock:
+                subscriber_method(*args)
+
+        return locked_subscriber_method
 
     def wrap_subscriber_callback(
         self, subscriber_path: str, loop: Any
-    ) -> Callable[[Message], Awaitable[None]]:
+    ) -> Callable[[Message], Any]:
         """
-        Returns a subscriber callback as an async function.
+        Returns a subscriber callback, which is async if the subscriber is.
 
         Args:
             subscriber_path: The path to the @subscriber-decorated callback.
             loop: The event loop to run the callback on.
         """
 
-        subscriber_method = self.module._get_subscriber_method(subscriber_path)
+        subscriber_method = self.get_subscriber_method(subscriber_path)
+        original_stream_type = self.original_stream_types.get(subscriber_path)
 
-        if inspect.iscoroutinefunction(subscriber_method):
+        if (
+            inspect.iscoroutinefunction(subscriber_method)
+            or original_stream_type is None
+        ):
             return subscriber_method
 
-        async def subscriber_callback(message: Message) -> None:
-            if subscriber_path in self.original_stream_types:
-                object.__setattr__(
-                    message,
-                    "__original_message_type__",
-                    self.original_stream_types[subscriber_path],
-                )
-            if loop.is_closed():
-                logger.warn(
-                    f"{message.__class__.__name__} dropped while graph shutting down"
-                )
-                return
-            loop.call_soon(self.module._get_subscriber_method(subscriber_path), message)
-            return
+        def subscriber_callback(message: Message) -> None:
+            object.__setattr__(
+                message, "__original_message_type__", original_stream_type
+            )
+            subscriber_method(message)
 
         return subscriber_callback
 
@@ -712,45 +1072,200 @@ class _AsyncThread(threading.Thread):
             loop: The event loop to run the callback on.
         """
 
+        transformer_method = self.module._get_transformer_method(transformer_path)
+        original_stream_type = self.original_stream_types.get(transformer_path)
+
         async def transformer_callback(message: Message) -> None:
-            if transformer_path in self.original_stream_types:
+            if original_stream_type is not None:
                 object.__setattr__(
-                    message,
-                    "__original_message_type__",
-                    self.original_stream_types[transformer_path],
+                    message, "__original_message_type__", original_stream_type
                 )
             await self.run_publisher_method(
-                functools.partial(
-                    self.module._get_transformer_method(transformer_path), message
+                self.lock_publisher_method(
+                    transformer_path, functools.partial(transformer_method, message)
                 )
             )
 
         return transformer_callback
 
+    def wrap_batch_subscriber_callback(
+        self, subscriber_path: str, loop: Any
+    ) -> Callable[[Sequence[Message]], None]:
+        """
+        Returns a callback for a batched subscriber that is called in the event loop
+        with lists of messages, and collects them into batches for the subscriber. If
+        the stream's Cthulhu consumer already waits for the subscriber's batches to
+        fill, the lists are only split into batches of at most `max_batch_size`.
+
+        Args:
+            subscriber_path: The path to the batched @subscriber-decorated callback.
+            loop: The event loop to run the callback on.
+        """
+        subscriber = self.module.subscribers[subscriber_path]
+        stream_id = self.module._stream_for_topic_path(
+            subscriber.subscribed_topic_path
+        ).id
+        max_wait = subscriber.max_wait
+        if self.runner._get_consumer_batch_limits(stream_id) is not None:
+            max_wait = None
+        batcher = _SubscriberBatcher(
+            subscriber_method=self.get_subscriber_method(subscriber_path),
+            max_batch_size=subscriber.max_batch_size,
+            max_wait=max_wait,
+            original_stream_type=self.original_stream_types.get(subscriber_path),
+            loop=loop,
+        )
+        self.batchers.append(batcher)
+        return batcher.add
+
+    def wrap_inline_subscriber_callback(
+        self, subscriber_path: str, loop: Any
+    ) -> Callable[[Message], None]:
+        """
+        Returns a callback for an inline subscriber, which calls it directly in the
+        thread that receives the message, under its node's lock.
+
+        Args:
+            subscriber_path: The path to the inline @subscriber-decorated callback.
+            loop: The event loop that runs the module's other callbacks.
+        """
+        subscriber_callback = self.wrap_subscriber_callback(subscriber_path, loop)
+        runner = self.runner
+
+        def inline_callback(message: Message) -> None:
+            if not runner._running:
+                return
+            try:
+                subscriber_callback(message)
+            except BaseException:
+                # Exceptions must not propagate into Cthulhu's threads
+                runner._handle_exception()
+
+        return inline_callback
+
+    def create_subscriber_queue(
+        self, subscriber_path: str, callback: Callable[..., Any]
+    ) -> "_SubscriberQueue":
+        """
+        Returns the queue of messages waiting for a subscriber, with the queue capacity
+        and overflow policy of the subscriber or its topic.
+
+        Args:
+            subscriber_path: The path to the subscriber.
+            callback: The subscriber callback to pass the queued messages to.
+        """
+        capacity, policy = self.runner._get_queue_settings(subscriber_path)
+        if policy == OverflowPolicy.BLOCK and self.options.aligner is not None:
+            raise LabgraphError(
+                f"Subscriber '{subscriber_path}' cannot use the "
+                f"{OverflowPolicy.BLOCK.name} overflow policy with an aligner"
+            )
+        stats = SubscriberQueueStats()
+        self.state.queue_stats[subscriber_path] = stats
+        return _SubscriberQueue(
+            subscriber_path=subscriber_path,
+            callback=callback,
+            batch=self.module.subscribers[subscriber_path].batch,
+            capacity=capacity,
+            policy=policy,
+            stats=stats,
+            runner=self.runner,
+        )
+
     def wrap_all_callbacks(
-        self, callbacks: List[Callable[[Message], Awaitable[None]]], loop: Any
+        self,
+        queues: Sequence["_SubscriberQueue"],
+        loop: Any,
+        inline_callbacks: Sequence[Callable[[Message], None]] = (),
     ) -> SubscriberType:
         """
-        Given a list of callbacks, returns a callback that wraps all of them by
-        scheduling all of them on the event loop when a message is received.
+        Given the queues of a stream's subscribers, returns a callback that puts a
+        received message in all of them, and schedules the subscribers on the event
+        loop.
 
         Args:
-            callbacks: The callbacks to wrap.
+            queues: The queues of the subscribers to the stream.
             loop: The event loop to schedule the callbacks on.
+            inline_callbacks: The callbacks for inline subscribers to the stream, which
+                are called directly.
         """
-        import asyncio
+        schedule_callbacks = functools.partial(self.schedule_queued_callbacks, queues)
 
         def callback(message: Message) -> None:
-            if loop.is_closed():
+            for inline_callback in inline_callbacks:
+                inline_callback(message)
+            if len(queues) == 0:
+                return
+            # Called from Cthulhu's threads: queue the message, then wake the event
+            # loop up to schedule the callbacks
+            accepted = [queue.put((message,)) for queue in queues]
+            try:
+                loop.call_soon_threadsafe(schedule_callbacks, accepted, loop)
+            except RuntimeError:
+                # The event loop is closed
                 logger.warn(
                     f"{message.__class__.__name__} dropped while graph shutting down"
                 )
-                return
-            for callback in callbacks:
-                asyncio.ensure_future(callback(message), loop=loop)
 
         return callback
 
+    def wrap_all_batch_callbacks(
+        self,
+        queues: Sequence["_SubscriberQueue"],
+        loop: Any,
+        inline_callbacks: Sequence[Callable[[Message], None]] = (),
+    ) -> Callable[[List[Message]], None]:
+        """
+        Given the queues of a stream's subscribers, returns a callback that puts a
+        received list of messages in all of them, and schedules the subscribers on the
+        event loop. The event loop is woken up once for the whole list.
+
+        Args:
+            queues: The queues of the subscribers to the stream.
+            loop: The event loop to schedule the callbacks on.
+            inline_callbacks: The callbacks for inline subscribers to the stream, which
+                are called directly with each message.
+        """
+        schedule_callbacks = functools.partial(self.schedule_queued_callbacks, queues)
+
+        def batch_callback(messages: List[Message]) -> None:
+            for message in messages:
+                for inline_callback in inline_callbacks:
+                    inline_callback(message)
+            # Called from Cthulhu's threads: queue the messages, then wake the event
+            # loop up to schedule the callbacks
+            accepted = [queue.put(messages) for queue in queues]
+            try:
+                loop.call_soon_threadsafe(schedule_callbacks, accepted, loop)
+            except RuntimeError:
+                # The event loop is closed
+                logger.warn(
+                    f"{len(messages)} messages dropped while graph shutting down"
+                )
+
+        return batch_callback
+
+    def schedule_queued_callbacks(
+        self, queues: Sequence["_SubscriberQueue"], accepted: List[int], loop: Any
+    ) -> None:
+        """
+        Schedules the subscribers to handle the messages just put in their queues. Runs
+        in the event loop.
+
+        Args:
+            queues: The queues of the subscribers to the stream.
+            accepted: The number of messages just put in each queue.
+            loop: The event loop to schedule the callbacks on.
+        """
+        error = None
+        for queue, count in zip(queues, accepted):
+            if count > 0:
+                queue.schedule(count, loop)
+            if queue.error is not None:
+                error, queue.error = queue.error, None
+        if error is not None:
+            raise error
+
     def handle_exception(self, loop: Any, context: Dict[str, Any]) -> None:
         try:
             if "exception" in context:
@@ -762,6 +1277,234 @@ class _AsyncThread(threading.Thread):
             self.runner._handle_exception()
 
 
+class _NodeLockedAwaitable:
+    """
+    Runs an awaitable of a node with inline subscribers under the node's lock. The lock
+    is held for each step of the awaitable, i.e., while it runs code between awaits,
+    and released while it waits, so that the node's inline subscribers can run in the
+    meantime but never at the same time as the node's code in the event loop.
+
+    Args:
+        awaitable: The awaitable to run under the lock.
+        lock: The node's lock.
+    """
+
+    def __init__(self, awaitable: Awaitable[Any], lock: threading.RLock) -> None:
+        self.awaitable = awaitable
+        self.lock = lock
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        iterator = self.awaitable.__await__()
+        value: Any = None
+        error: Optional[BaseException] = None
+        while True:
+            with self.lock:
+                try:
+                    if error is None:
+                        result = iterator.send(value)
+                    else:
+                        result = iterator.throw(error)
+                except StopIteration as stop:
+                    return stop.value
+            try:
+                value = yield result
+                error = None
+            except BaseException as exception:
+                # E.g., the task running the awaitable was cancelled
+                value = None
+                error = exception
+
+
+class _SubscriberQueue:
+    """
+    The queue of messages that have arrived for a subscriber, but that the subscriber
+    has not started to handle. Messages are put in the queue from Cthulhu's threads
+    and taken from it in the event loop, where one handler is scheduled for each
+    queued message (or one for all of them, for a batched subscriber).
+
+    Args:
+        subscriber_path: The path to the subscriber.
+        callback: The subscriber callback to pass the queued messages to.
+        batch: Whether the callback takes lists of messages.
+        capacity: The most messages that can be in the queue, if bounded.
+        policy: What to do with a message that arrives when the queue is full.
+        stats: The counters to update for the queue.
+        runner: The runner, which stops blocked producers when it stops.
+    """
+
+    def __init__(
+        self,
+        subscriber_path: str,
+        callback: Callable[..., Any],
+        batch: bool,
+        capacity: Optional[int],
+        policy: OverflowPolicy,
+        stats: SubscriberQueueStats,
+        runner: LocalRunner,
+    ) -> None:
+        self.subscriber_path = subscriber_path
+        self.callback = callback
+        self.is_async = inspect.iscoroutinefunction(callback)
+        self.batch = batch
+        self.capacity = capacity
+        self.policy = policy
+        self.stats = stats
+        self.runner = runner
+        self.messages: Deque[Message] = deque()
+        self.condition = threading.Condition()
+        self.error: Optional[LabgraphError] = None
+
+    def put(self, messages: Sequence[Message]) -> int:
+        """
+        Puts messages in the queue, applying the overflow policy while it is full.
+        Returns the number of messages that need a handler to be scheduled.
+        """
+        accepted = 0
+        with self.condition:
+            for message in messages:
+                if self.capacity is not None and len(self.messages) >= self.capacity:
+                    if self.policy == OverflowPolicy.DROP_OLDEST:
+                        # The handler scheduled for the dropped message takes this one
+                        self.messages.popleft()
+                        self.messages.append(message)
+                        self.stats.dropped += 1
+                        continue
+                    elif self.policy == OverflowPolicy.BLOCK:
+                        while (
+                            len(self.messages) >= self.capacity and self.runner._running
+                        ):
+                            self.condition.wait(QUEUE_BLOCK_POLL_TIME)
+                    if len(self.messages) >= self.capacity:
+                        self.stats.dropped += 1
+                        if self.policy == OverflowPolicy.ERROR and self.error is None:
+                            self.error = LabgraphError(
+                                f"Queue for subscriber '{self.subscriber_path}' is "
+                                f"full ({self.capacity} messages)"
+                            )
+                        continue
+                self.messages.append(message)
+                accepted += 1
+            if len(self.messages) > self.stats.high_water_mark:
+                self.stats.high_water_mark = len(self.messages)
+        return accepted
+
+    def schedule(self, count: int, loop: Any) -> None:
+        """
+        Schedules the subscriber to handle `count` newly queued messages. Runs in the
+        event loop.
+        """
+        if self.batch:
+            loop.call_soon(self.handle_batch)
+        elif self.is_async:
+            for _ in range(count):
+                loop.create_task(self.handle_async())
+        else:
+            for _ in range(count):
+                loop.call_soon(self.handle)
+
+    def take(self) -> Message:
+        with self.condition:
+            message = self.messages.popleft()
+            self.condition.notify()
+        return message
+
+    def handle(self) -> None:
+        self.callback(self.take())
+
+    async def handle_async(self) -> None:
+        await self.callback(self.take())
+
+    def handle_batch(self) -> None:
+        with self.condition:
+            messages = list(self.messages)
+            self.messages.clear()
+            self.condition.notify()
+        if len(messages) > 0:
+            self.callback(messages)
+
+
+class _SubscriberBatcher:
+    """
+    Collects the messages for a batched subscriber in the event loop, and calls the
+    subscriber with lists of them.
+
+    Args:
+        subscriber_method: The batched subscriber method.
+        max_batch_size: The most messages to pass to the subscriber at once.
+        max_wait:
+            If set, the subscriber is called once `max_batch_size` messages have been
+            collected, or `max_wait` seconds after the first message of a batch was
+            collected. Otherwise, it is called with the messages as soon as they are
+            collected.
+        original_stream_type: The message type to set on messages as their original
+            type, if any.
+        loop: The event loop to run the subscriber on.
+    """
+
+    def __init__(
+        self,
+        subscriber_method: SubscriberType,
+        max_batch_size: Optional[int],
+        max_wait: Optional[float],
+        original_stream_type: Optional[Type[Message]],
+        loop: Any,
+    ) -> None:
+        self.subscriber_method = subscriber_method
+        self.is_async = inspect.iscoroutinefunction(subscriber_method)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.original_stream_type = original_stream_type
+        self.loop = loop
+        self.messages: List[Message] = []
+        self.timer: Optional[Any] = None
+
+    def add(self, messages: Sequence[Message]) -> None:
+        """
+        Adds messages to the current batch. Runs in the event loop.
+        """
+        if self.original_stream_type is not None:
+            for message in messages:
+                object.__setattr__(
+                    message, "__original_message_type__", self.original_stream_type
+                )
+        self.messages.extend(messages)
+        if self.max_wait is None:
+            self.flush()
+            return
+        if (
+            self.max_batch_size is not None
+            and len(self.messages) >= self.max_batch_size
+        ):
+            # Pass on the full batches; the rest starts a new batch
+            self.flush(full_batches_only=True)
+        if len(self.messages) > 0 and self.timer is None:
+            self.timer = self.loop.call_later(self.max_wait, self.flush)
+
+    def flush(self, full_batches_only: bool = False) -> None:
+        """
+        Passes the collected messages to the subscriber, in batches of at most
+        `max_batch_size` messages.
+
+        Args:
+            full_batches_only:
+                If set, keeps the messages that do not fill a batch of
+                `max_batch_size` messages.
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch_size = self.max_batch_size or max(len(self.messages), 1)
+        while len(self.messages) >= batch_size or (
+            len(self.messages) > 0 and not full_batches_only
+        ):
+            batch = self.messages[:batch_size]
+            self.messages = self.messages[batch_size:]
+            if self.is_async:
+                self.loop.create_task(self.subscriber_method(batch))
+            else:
+                self.loop.call_soon(self.subscriber_method, batch)
+
+
 class _MonitorThread(threading.Thread):
     def __init__(self, runner: LocalRunner) -> None:
         super().__init__()
@@ -784,9 +1527,9 @@ class _MonitorThread(threading.Thread):
                     logger.debug(
                         f"{self.runner._module}:stopping due to graph shutdown"
                     )
-                    self.runner._running = False
+                    self.runner._stop()
                     return
             except (EOFError, ConnectionError, OSError, BrokenPipeError):
                 logger.warning(f"{self.runner._module}:lost process manager, stopping")
-                self.runner._running = False
+                self.runner._stop()
             time.sleep(0.1)
@@ -38,12 +38,18 @@ class RunnerOptions:
             streams.
         logger_type: The Python class for the logger type to use.
         logger_config: Configuration to provide the logger.
+        inline_subscribers:
+            Whether to call every plain subscriber inline, as if it were decorated with
+            `@subscriber(..., inline=True)`. Plain subscribers are not async, batched
+            or transformers, and have no queue capacity or overflow policy of their own
+            or of their topic.
     """
 
     aligner: Optional[Aligner] = None
     bootstrap_info: Optional[BootstrapInfo] = None
     logger_type: Type[Logger] = HDF5Logger
     logger_config: LoggerConfig = field(default_factory=LoggerConfig)
+    inline_subscribers: bool = False
 
 
 class Runner(ABC):
@@ -5,8 +5,9 @@ import asyncio
 import json
 import os
 import threading
+import time
 from pathlib import Path
-from typing import Dict, Sequence, Union
+from typing import Dict, List, Sequence, Union
 
 import h5py
 import pytest
@@ -17,19 +18,35 @@ from ...graphs.group import Connections, Group
 from ...graphs.method import AsyncPublisher, background, main, publisher, subscriber
 from ...graphs.module import Module
 from ...graphs.node import Node
-from ...graphs.topic import Topic
+from ...graphs.state import State
+from ...graphs.topic import OverflowPolicy, Topic
 from ...messages.message import Message
 from ...util.random import random_string
 from ...util.testing import get_test_filename, local_test
 from ..exceptions import NormalTermination
-from ..local_runner import LocalRunner
+from ..local_runner import (
+    DEFAULT_QUEUE_CAPACITY,
+    QUEUE_BLOCK_POLL_TIME,
+    UNBOUNDED_CONSUMER_QUEUE_CAPACITY,
+    LocalRunner,
+    SubscriberQueueStats,
+    _AsyncThread,
+    _NodeLockedAwaitable,
+    _SubscriberQueue,
+)
 from ..parallel_runner import ParallelRunner
+from ..runner import RunnerOptions
 
 
 NUM_MESSAGES = 30
 SAMPLE_RATE = 10
 
+MAX_BATCH_SIZE = 4
+
 LOCAL_OUTPUT_FILENAME = get_test_filename("json")
+INLINE_OUTPUT_FILENAME = get_test_filename("json")
+INLINE_RELAY_OUTPUT_FILENAME = get_test_filename("json")
+BATCH_OUTPUT_FILENAME = get_test_filename("json")
 DISTRIBUTED_OUTPUT_FILENAME = get_test_filename("json")
 PARALLEL_ONE_PROCESS_FILENAME = get_test_filename("json")
 
@@ -102,14 +119,12 @@ class MyLocalGraph(Graph):
         return {"source_a": self.SOURCE.A, "transform_c": self.TRANSFORM.C}
 
 
-@local_test
-def test_local_run() -> None:
-    runner = LocalRunner(
-        module=MyLocalGraph(config=MySinkConfig(output_filename=LOCAL_OUTPUT_FILENAME))
-    )
-    runner.run()
+def check_output_file(filename: str) -> None:
+    """
+    Checks that a sink wrote every message to a file, one message per line.
+    """
     remaining_numbers = {str(i) for i in range(NUM_MESSAGES)}
-    with open(LOCAL_OUTPUT_FILENAME, "r") as output_file:
+    with open(filename, "r") as output_file:
         lines = output_file.readlines()
     assert len(lines) == NUM_MESSAGES
     for line in lines:
@@ -118,7 +133,16 @@ def test_local_run() -> None:
         remaining_numbers.remove(message.str_field)
 
     assert len(remaining_numbers) == 0
-    os.remove(LOCAL_OUTPUT_FILENAME)
+    os.remove(filename)
+
+
+@local_test
+def test_local_run() -> None:
+    runner = LocalRunner(
+        module=MyLocalGraph(config=MySinkConfig(output_filename=LOCAL_OUTPUT_FILENAME))
+    )
+    runner.run()
+    check_output_file(LOCAL_OUTPUT_FILENAME)
 
 
 class PubGroup(Group):
@@ -129,6 +153,392 @@ class PubGroup(Group):
         return ((self.SOURCE.A, self.TRANSFORM.B),)
 
 
+class MyPubSinkGraph(Graph):
+    config: MySinkConfig
+
+    PUB: PubGroup
+    SINK: MySink
+
+    def setup(self) -> None:
+        self.SINK.configure(self.config)
+
+    def connections(self) -> Connections:
+        return ((self.PUB.TRANSFORM.C, self.SINK.D),)
+
+
+class MyInlineSink(MySink):
+    @subscriber(MySink.D, inline=True)
+    def sink(self, message: MyMessage2) -> None:
+        MySink.sink(self, message)
+
+
+# A graph's children are declared by its own annotations, so subclasses of
+# `MyPubSinkGraph` repeat them
+class MyInlineGraph(MyPubSinkGraph):
+    config: MySinkConfig
+
+    PUB: PubGroup
+    SINK: MyInlineSink
+
+
+@local_test
+def test_inline_subscriber() -> None:
+    """
+    Tests that an inline subscriber receives every message, and that it can stop the
+    graph by raising an exception.
+    """
+    runner = LocalRunner(
+        module=MyInlineGraph(
+            config=MySinkConfig(output_filename=INLINE_OUTPUT_FILENAME)
+        )
+    )
+    runner.run()
+    check_output_file(INLINE_OUTPUT_FILENAME)
+
+
+class MyInlineRelay(Node):
+    D = Topic(MyMessage2)
+    E = Topic(MyMessage2)
+
+    def setup(self) -> None:
+        self.pending: List[MyMessage2] = []
+
+    @subscriber(D, inline=True)
+    def collect(self, message: MyMessage2) -> None:
+        self.pending.append(message)
+
+    @publisher(E)
+    async def relay(self) -> AsyncPublisher:
+        while True:
+            pending, self.pending = self.pending, []
+            for message in pending:
+                yield self.E, message
+            await asyncio.sleep(1 / SAMPLE_RATE)
+
+
+class MyInlineRelayGraph(Graph):
+    config: MySinkConfig
+
+    PUB: PubGroup
+    RELAY: MyInlineRelay
+    SINK: MySink
+
+    def setup(self) -> None:
+        self.SINK.configure(self.config)
+
+    def connections(self) -> Connections:
+        return (
+            (self.PUB.TRANSFORM.C, self.RELAY.D),
+            (self.RELAY.E, self.SINK.D),
+        )
+
+
+@local_test
+def test_inline_subscriber_publisher() -> None:
+    """
+    Tests that a node can share state between an inline subscriber and a publisher,
+    which holds the node's lock between its awaits.
+    """
+    runner = LocalRunner(
+        module=MyInlineRelayGraph(
+            config=MySinkConfig(output_filename=INLINE_RELAY_OUTPUT_FILENAME)
+        )
+    )
+    runner.run()
+    check_output_file(INLINE_RELAY_OUTPUT_FILENAME)
+
+
+def test_locked_publisher_method() -> None:
+    """
+    Tests that the publisher of a node with inline subscribers is run under the node's
+    lock, and that it publishes and closes as usual.
+    """
+    graph = MyInlineRelayGraph()
+    thread = _AsyncThread(runner=LocalRunner(module=graph))
+    assert "RELAY" in thread.node_locks
+    message = MyMessage2(str_field="0")
+    graph.RELAY.pending = [message]
+    relay = thread.lock_publisher_method(
+        "RELAY/relay", thread.module._get_publisher_method("RELAY/relay")
+    )
+    assert relay is not graph.RELAY.relay
+
+    loop = asyncio.new_event_loop()
+    try:
+        publisher = relay().__aiter__()
+        topic, published = loop.run_until_complete(publisher.__anext__())
+        assert topic is graph.RELAY.E
+        assert published is message
+        loop.run_until_complete(publisher.aclose())  # type: ignore
+    finally:
+        loop.close()
+
+
+def test_node_locked_awaitable() -> None:
+    """
+    Tests that an awaitable run under a node's lock holds it while it runs, but not
+    while it awaits.
+    """
+    lock = threading.RLock()
+
+    def try_acquire(timeout: float = -1) -> bool:
+        if not lock.acquire(blocking=timeout >= 0, timeout=timeout):
+            return False
+        lock.release()
+        return True
+
+    def try_acquire_in_thread() -> bool:
+        acquired: List[bool] = []
+        thread = threading.Thread(target=lambda: acquired.append(try_acquire()))
+        thread.start()
+        thread.join()
+        return acquired[0]
+
+    async def method() -> int:
+        assert not try_acquire_in_thread()
+        # The executor thread can only take the lock once the method awaits it
+        assert await asyncio.get_event_loop().run_in_executor(None, try_acquire, 1)
+        assert not try_acquire_in_thread()
+        return 1
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(_NodeLockedAwaitable(method(), lock)) == 1
+    finally:
+        loop.close()
+    assert try_acquire_in_thread()
+
+
+class MyBatchSink(MySink):
+    @subscriber(MySink.D, batch=True, max_batch_size=MAX_BATCH_SIZE, max_wait=0.5)
+    def sink(self, messages: List[MyMessage2]) -> None:
+        with open(self.config.output_filename, "a") as output_file:
+            output_file.write(
+                json.dumps([message.asdict() for message in messages]) + "\n"
+            )
+        self.messages_seen += len(messages)
+        if self.messages_seen == NUM_MESSAGES:
+            raise NormalTermination()
+
+
+class MyBatchGraph(MyPubSinkGraph):
+    config: MySinkConfig
+
+    PUB: PubGroup
+    SINK: MyBatchSink
+
+
+@local_test
+def test_batch_subscriber() -> None:
+    """
+    Tests that a batched subscriber receives every message, in lists of at most its
+    max batch size.
+    """
+    runner = LocalRunner(
+        module=MyBatchGraph(config=MySinkConfig(output_filename=BATCH_OUTPUT_FILENAME))
+    )
+    runner.run()
+    remaining_numbers = {str(i) for i in range(NUM_MESSAGES)}
+    with open(BATCH_OUTPUT_FILENAME, "r") as output_file:
+        batches = [json.loads(line) for line in output_file.readlines()]
+    for batch in batches:
+        assert 0 < len(batch) <= MAX_BATCH_SIZE
+        for fields in batch:
+            message = MyMessage2.fromdict(fields)
+            assert message.str_field in remaining_numbers
+            remaining_numbers.remove(message.str_field)
+
+    assert len(remaining_numbers) == 0
+    os.remove(BATCH_OUTPUT_FILENAME)
+
+
+class MyBurstSource(Node):
+    A = Topic(MyMessage1)
+
+    @publisher(A)
+    async def source(self) -> AsyncPublisher:
+        for i in range(NUM_MESSAGES):
+            yield self.A, MyMessage1(int_field=i)
+        await asyncio.sleep(2)
+        raise NormalTermination()
+
+
+class MySlowSink(Node):
+    A = Topic(MyMessage1)
+
+    @subscriber(A, queue_capacity=1, overflow_policy=OverflowPolicy.DROP_NEWEST)
+    def sink(self, message: MyMessage1) -> None:
+        time.sleep(1 / SAMPLE_RATE)
+
+
+class MySlowGraph(Graph):
+    SOURCE: MyBurstSource
+    SINK: MySlowSink
+
+    def connections(self) -> Connections:
+        return ((self.SOURCE.A, self.SINK.A),)
+
+
+@local_test
+def test_queue_overflow() -> None:
+    """
+    Tests that a subscriber's queue holds at most its capacity, and that messages that
+    arrive when it is full are counted as dropped.
+    """
+    runner = LocalRunner(module=MySlowGraph())
+    runner.run()
+    stats = runner.queue_stats["SINK/sink"]
+    assert stats.high_water_mark == 1
+    assert stats.dropped > 0
+    assert stats.stream_dropped == 0
+
+
+def test_consumer_queue_capacity() -> None:
+    """
+    Tests that a stream's consumer holds at least the default queue capacity, so that
+    its subscribers' queues apply their overflow policies, and that it is unbounded
+    for a subscriber whose queue blocks when full.
+    """
+    graph = MySlowGraph()
+    runner = LocalRunner(module=graph)
+    stream_id = graph._stream_for_topic_path("SINK/A").id
+    assert runner._get_consumer_queue_capacity(stream_id) == DEFAULT_QUEUE_CAPACITY
+
+    graph = MyBlockingGraph()
+    runner = LocalRunner(module=graph)
+    stream_id = graph._stream_for_topic_path("SINK/A").id
+    assert (
+        runner._get_consumer_queue_capacity(stream_id)
+        == UNBOUNDED_CONSUMER_QUEUE_CAPACITY
+    )
+
+
+def test_inline_subscriber_option() -> None:
+    """
+    Tests that `RunnerOptions.inline_subscribers` makes plain subscribers inline.
+    """
+    runner = LocalRunner(module=MyPubSinkGraph())
+    assert not runner._is_inline_subscriber("SINK/sink")
+    runner = LocalRunner(
+        module=MyPubSinkGraph(), options=RunnerOptions(inline_subscribers=True)
+    )
+    assert runner._is_inline_subscriber("SINK/sink")
+    assert not runner._is_inline_subscriber("PUB/TRANSFORM/transform")
+    runner = LocalRunner(
+        module=MySlowGraph(), options=RunnerOptions(inline_subscribers=True)
+    )
+    assert not runner._is_inline_subscriber("SINK/sink")
+
+
+class MyCountState(State):
+    count: int = 0
+
+
+class MyBlockingSink(Node):
+    A = Topic(MyMessage1)
+    state: MyCountState
+
+    @subscriber(A, queue_capacity=1, overflow_policy=OverflowPolicy.BLOCK)
+    def sink(self, message: MyMessage1) -> None:
+        time.sleep(1 / (10 * SAMPLE_RATE))
+        self.state.count += 1
+
+
+class MyBlockingGraph(Graph):
+    SOURCE: MyBurstSource
+    SINK: MyBlockingSink
+
+    def connections(self) -> Connections:
+        return ((self.SOURCE.A, self.SINK.A),)
+
+
+@local_test
+def test_queue_overflow_block() -> None:
+    """
+    Tests that a subscriber whose queue blocks when full receives every message of a
+    burst, which its stream's consumer buffers while the subscriber is blocked.
+    """
+    graph = MyBlockingGraph()
+    runner = LocalRunner(module=graph)
+    runner.run()
+    stats = runner.queue_stats["SINK/sink"]
+    assert stats.high_water_mark == 1
+    assert stats.dropped == 0
+    assert stats.stream_dropped == 0
+    assert graph.SINK.state.count == NUM_MESSAGES
+
+
+class MyWaitingBatchSink(Node):
+    A = Topic(MyMessage1)
+    state: MyCountState
+
+    @subscriber(A, batch=True, max_batch_size=NUM_MESSAGES + 1, max_wait=60)
+    def sink(self, messages: List[MyMessage1]) -> None:
+        self.state.count += len(messages)
+
+
+class MyWaitingBatchGraph(Graph):
+    SOURCE: MyBurstSource
+    SINK: MyWaitingBatchSink
+
+    def connections(self) -> Connections:
+        return ((self.SOURCE.A, self.SINK.A),)
+
+
+@local_test
+def test_batch_subscriber_shutdown() -> None:
+    """
+    Tests that a batch that is still waiting to be filled when the graph stops is
+    passed to the subscriber.
+    """
+    graph = MyWaitingBatchGraph()
+    runner = LocalRunner(module=graph)
+    runner.run()
+    assert graph.SINK.state.count == NUM_MESSAGES
+
+
+def test_subscriber_queue_block() -> None:
+    """
+    Tests that putting a message in a full blocking queue waits until the subscriber
+    takes a message, and drops the message if the runner stops first.
+    """
+    runner = LocalRunner(module=MyBlockingGraph())
+    runner._running = True
+    stats = SubscriberQueueStats()
+    queue = _SubscriberQueue(
+        subscriber_path="SINK/sink",
+        callback=lambda message: None,
+        batch=False,
+        capacity=1,
+        policy=OverflowPolicy.BLOCK,
+        stats=stats,
+        runner=runner,
+    )
+    assert queue.put([MyMessage1(int_field=0)]) == 1
+
+    accepted: List[int] = []
+    thread = threading.Thread(
+        target=lambda: accepted.append(queue.put([MyMessage1(int_field=1)]))
+    )
+    thread.start()
+    thread.join(2 * QUEUE_BLOCK_POLL_TIME)
+    assert thread.is_alive()
+    assert queue.take().int_field == 0
+    thread.join()
+    assert accepted == [1]
+    assert stats.dropped == 0
+
+    thread = threading.Thread(
+        target=lambda: accepted.append(queue.put([MyMessage1(int_field=2)]))
+    )
+    thread.start()
+    runner._running = False
+    thread.join()
+    assert accepted == [1, 0]
+    assert stats.dropped == 1
+    assert queue.take().int_field == 1
+
+
 class SubGroup(Group):
     SINK: MySink
     config: MySinkConfig